@@ -4,6 +4,7 @@ import logging
 
 from django.http import JsonResponse
 from django.db import IntegrityError,transaction
+from django.db.models import Count
 
 from classes.models import SchoolClass,ClassAssignment,SchoolSection
 
@@ -88,62 +89,76 @@ class ClassesService:
 
                 classes_qs = classes_qs.filter(id__in=allowed_class_ids)
 
-            data = []
-            for class_obj in classes_qs:
-                school_board = SchoolBoard.objects.get(
-                    id=class_obj.board_id
-                )
-                class_instance = ClassAssignment.objects.using(school_db_name).filter(
-                    class_instance=class_obj,
-                    academic_year_id=academic_year_id
-                ).first()
-                teacher = None
-                teacher_name = None
-                student_count = 0
-                if class_instance:
-                    try:
-                        class_teacher_id = class_instance.class_teacher_id
-                        if class_teacher_id:
-                            teacher = Teacher.objects.using(school_db_name).get(teacher_id=class_teacher_id)
-                            teacher_name = User.objects.get(
-                                id=teacher.teacher_id,
-                                is_active=True,
-                            ).full_name()
-                    except Teacher.DoesNotExist:
-                        logger.error(f"Teacher with ID {class_instance.class_teacher_id} does not exist.")
-                    except User.DoesNotExist:
-                        logger.error(f"Teacher with ID {teacher.teacher_id} does not exist.")
-
-                    academic_year_obj = SchoolAcademicYear.objects.using(school_db_name).get(
-                        pk=class_instance.academic_year_id)
-
-                    student_ids = StudentClassAssignment.objects.using(school_db_name).filter(
-                        class_instance=class_instance.class_instance_id,
-                        academic_year=academic_year_obj
-                    ).values_list('student_id', flat=True)
-
-                    student_count = Student.objects.using(school_db_name).filter(
-                        student_id__in=student_ids,
-                        is_active=True
-                    ).count()
-
-                    class_data = {
-                        'class_assignment_id': class_instance.id if class_instance else None,
-                        'class_id': class_obj.id,
-                        'class_number': class_obj.class_instance_id,
-                        'section': class_obj.section,
-                        'teacher_id': teacher.teacher_id if teacher else None,
-                        'teacher_name': teacher_name,
-                        # 'academic_year_id': academic_year_obj.id,
-                        # 'academic_year_start_date': str(academic_year_obj.start_date),
-                        # 'academic_year_end_date': str(academic_year_obj.end_date),
-                        'school_id': school_id,
-                        'student_count': student_count,
-                        'school_board_id': school_board.id,
-                        'school_board_name': school_board.board_name,
-                    }
-                    data.append(class_data)
+            classes = list(classes_qs)
+            section_ids = [class_obj.id for class_obj in classes]
 
+            school_boards = SchoolBoard.objects.in_bulk(
+                {class_obj.board_id for class_obj in classes}
+            )
+
+            class_assignments = {}
+            for class_instance in ClassAssignment.objects.using(school_db_name).filter(
+                class_instance_id__in=section_ids,
+                academic_year_id=academic_year_id
+            ).order_by('-id'):
+                class_assignments[class_instance.class_instance_id] = class_instance
+
+            class_teacher_ids = {
+                class_instance.class_teacher_id
+                for class_instance in class_assignments.values()
+                if class_instance.class_teacher_id
+            }
+            existing_teacher_ids = set(
+                Teacher.objects.using(school_db_name).filter(
+                    teacher_id__in=class_teacher_ids
+                ).values_list('teacher_id', flat=True)
+            )
+            teacher_names = {
+                user.id: user.full_name()
+                for user in User.objects.filter(
+                    id__in=existing_teacher_ids,
+                    is_active=True
+                ).only('id', 'first_name', 'last_name')
+            }
+
+            student_counts = dict(
+                StudentClassAssignment.objects.using(school_db_name).filter(
+                    class_instance_id__in=class_assignments.keys(),
+                    academic_year_id=academic_year_id,
+                    student__is_active=True
+                ).values('class_instance_id').annotate(
+                    student_count=Count('id')
+                ).values_list('class_instance_id', 'student_count')
+            )
+
+            data = []
+            for class_obj in classes:
+                school_board = school_boards.get(class_obj.board_id)
+                if school_board is None:
+                    raise SchoolBoard.DoesNotExist(f"School board {class_obj.board_id} does not exist.")
+                class_instance = class_assignments.get(class_obj.id)
+                if not class_instance:
+                    continue
+
+                teacher_id = class_instance.class_teacher_id
+                if teacher_id and teacher_id not in existing_teacher_ids:
+                    logger.error(f"Teacher with ID {teacher_id} does not exist.")
+                    teacher_id = None
+                teacher_name = teacher_names.get(teacher_id) if teacher_id else None
+
+                class_data = {
+                    'class_assignment_id': class_instance.id,
+                    'class_id': class_obj.id,
+                    'class_number': class_obj.class_instance_id,
+                    'section': class_obj.section,
+                    'teacher_id': teacher_id,
+                    'teacher_name': teacher_name,
+                    'school_id': school_id,
+                    'student_count': student_counts.get(class_obj.id, 0),
+                    'school_board_id': school_board.id,
+                    'school_board_name': school_board.board_name,
+                }
+                data.append(class_data)
 
             logger.info(f"Retrieved {len(data)} active classes.")
             return JsonResponse({'classes': data}, status=200)
@@ -1,3 +1,85 @@
-from django.test import TestCase
+import datetime
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connections
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from academics.models import SchoolAcademicYear
+from classes.models import ClassAssignment, SchoolClass, SchoolSection
+from classes.services.classes_service import ClassesService
+from core.models import User
+from school.models import SchoolBoard
+from student.models import Student, StudentClassAssignment
+from teacher.models import Teacher
+
+# School databases are registered at runtime, so the test tenant is added
+# before the test runner creates the test databases.
+TENANT_DB = 'classes_test_school_db'
+if TENANT_DB not in settings.DATABASES:
+    settings.DATABASES[TENANT_DB] = dict(settings.DATABASES['default'], NAME=TENANT_DB, TEST={})
+    connections.configure_settings(settings.DATABASES)
+
+
+class ClassListQueryCountTests(TestCase):
+    """get_classes_by_school_id runs the same queries whatever the number of sections."""
+
+    databases = {'default', TENANT_DB}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.board = SchoolBoard.objects.create(board_name='Query count board')
+        cls.admin = User.objects.create(user_name='classes-admin', email='admin@example.com', school_id=1)
+        cls.academic_year = SchoolAcademicYear.objects.using(TENANT_DB).create(start_year=2025, end_year=2026)
+        cls.school_class = SchoolClass.objects.using(TENANT_DB).create(class_number=1)
+        cls.sections = 0
+
+    def add_sections(self, count):
+        for _ in range(count):
+            self.sections += 1
+            teacher_user = User.objects.create(
+                user_name=f'teacher-{self.sections}', email='teacher@example.com',
+                first_name='Teacher', last_name=str(self.sections), school_id=1
+            )
+            teacher = Teacher.objects.using(TENANT_DB).create(teacher_id=teacher_user.id)
+            section = SchoolSection.objects.using(TENANT_DB).create(
+                class_instance=self.school_class, section=f'S{self.sections}', board_id=self.board.id
+            )
+            ClassAssignment.objects.using(TENANT_DB).create(
+                class_instance=section, class_teacher=teacher, academic_year=self.academic_year
+            )
+            for index in range(3):
+                student = Student.objects.using(TENANT_DB).create(
+                    student_id=self.sections * 100 + index, roll_number=str(index),
+                    admission_date=datetime.date(2025, 6, 1), parent_name='Parent',
+                    parent_phone='0', parent_email='parent@example.com'
+                )
+                StudentClassAssignment.objects.using(TENANT_DB).create(
+                    student=student, class_instance=section, academic_year=self.academic_year
+                )
+
+    def list_classes(self):
+        request = RequestFactory().get('/classes/', {
+            'school_id': 1, 'academic_year_id': self.academic_year.id
+        })
+        request.user = self.admin
+        with mock.patch('classes.services.classes_service.CommonFunctions.get_school_db_name',
+                        return_value=TENANT_DB), \
+                CaptureQueriesContext(connections['default']) as default_queries, \
+                CaptureQueriesContext(connections[TENANT_DB]) as school_queries:
+            response = ClassesService().get_classes_by_school_id(request)
+        self.assertEqual(response.status_code, 200)
+        return response, len(default_queries), len(school_queries)
+
+    def test_query_count_does_not_grow_with_sections(self):
+        self.add_sections(2)
+        response, small_default, small_school = self.list_classes()
+        self.assertContains(response, '"student_count": 3', count=2)
+
+        self.add_sections(20)
+        response, large_default, large_school = self.list_classes()
+        self.assertContains(response, '"student_count": 3', count=22)
+
+        self.assertEqual(large_default, small_default)
+        self.assertEqual(large_school, small_school)
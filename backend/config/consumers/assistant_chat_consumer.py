@@ -0,0 +1,62 @@
+import json
+import logging
+from channels.generic.websocket import AsyncWebsocketConsumer
+from asgiref.sync import sync_to_async
+
+logger = logging.getLogger(__name__)
+
+class AssistantChatConsumer(AsyncWebsocketConsumer):
+    """Streams AI assistant answers token by token over a websocket."""
+
+    async def connect(self):
+        from core.common_modules.jwt_utils import get_user_from_jwt
+        from core.common_modules.common_functions import CommonFunctions
+        query_params = dict(qc.split("=") for qc in self.scope["query_string"].decode().split("&") if "=" in qc)
+        token = query_params.get("token")
+        school_id = query_params.get("school_id")
+
+        self.user = await sync_to_async(get_user_from_jwt)(token)
+        if not self.user:
+            await self.close(code=4001)
+            return
+        self.school_db_name = await sync_to_async(CommonFunctions.get_school_db_name)(
+            school_id or getattr(self.user, 'school_id', None)
+        )
+        if not self.school_db_name:
+            await self.close(code=4002)
+            return
+
+        await self.accept()
+        logger.info(f"User {self.user.id} connected to assistant chat")
+
+    async def receive(self, text_data):
+        from core.common_modules.tenant_registry import tenant_registry
+        from syllabus.services.ai_assistant_service import AiAssistantService
+        try:
+            data = json.loads(text_data)
+        except ValueError:
+            await self.send_event({"status": "error", "message": "Invalid message"})
+            return
+
+        tenant_registry.ensure_registered(self.school_db_name)
+        service = AiAssistantService(school_db_name=self.school_db_name)
+        user_message = data.get("message")
+        session, system_instruction = await sync_to_async(service.prepare_chat)(
+            self.user, data.get("lesson_plan_day_id"), user_message
+        )
+        if session is None:
+            await self.send(text_data=system_instruction.content.decode())
+            return
+
+        try:
+            async for event in service.stream_answer(session, system_instruction, user_message):
+                if event["type"] == "token":
+                    await self.send_event({"data": event["data"], "status": "streaming"})
+                else:
+                    await self.send_event({"status": "success"})
+        except Exception as e:
+            logger.error("Error streaming assistant response: %s", e)
+            await self.send_event({"status": "error", "message": "Unable to process your request at the moment"})
+
+    async def send_event(self, payload):
+        await self.send(text_data=json.dumps(payload))
@@ -0,0 +1,54 @@
+import json
+import logging
+from channels.generic.websocket import AsyncWebsocketConsumer
+from asgiref.sync import sync_to_async
+
+logger = logging.getLogger(__name__)
+
+class LlmJobConsumer(AsyncWebsocketConsumer):
+    """Pushes the status of an LLM job to the user who submitted it."""
+
+    async def connect(self):
+        from core.common_modules.jwt_utils import get_user_from_jwt
+        from core.common_modules.llm_job_queue import llm_job_queue
+        self.group_name = None
+        query_params = dict(qc.split("=") for qc in self.scope["query_string"].decode().split("&") if "=" in qc)
+        token = query_params.get("token")
+
+        self.user = await sync_to_async(get_user_from_jwt)(token)
+        if not self.user:
+            await self.close(code=4001)
+            return
+
+        job_id = self.scope['url_route']['kwargs']['job_id']
+        job = await sync_to_async(llm_job_queue.get_job)(job_id)
+        if not job or job["user_id"] != self.user.id:
+            await self.close(code=4004)
+            return
+
+        self.group_name = llm_job_queue.group_name(job_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        logger.info(f"User {self.user.id} subscribed to job {job_id}")
+
+        # The job may have finished before the socket connected, so send the current state first.
+        await self.send_job(job)
+
+    async def disconnect(self, close_code):
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def job_update(self, event):
+        await self.send_job(event["job"])
+
+    async def send_job(self, job):
+        await self.send(text_data=json.dumps({
+            "type": "job_update",
+            "data": {
+                "job_id": job["job_id"],
+                "status": job["status"],
+                "attempts": job["attempts"],
+                "result": job["result"],
+                "error": job["error"],
+            }
+        }))
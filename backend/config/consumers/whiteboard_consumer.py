@@ -1,22 +1,70 @@
 import json
-import redis
-import sys
 import asyncio
 import logging
+from collections import deque
 from channels.generic.websocket import AsyncWebsocketConsumer
 from asgiref.sync import sync_to_async
 
-MAX_CHUNK_SIZE_BYTES = 5 * 1024 * 1024
-r = redis.StrictRedis(host='localhost', port=6379, db=0)
 logger = logging.getLogger(__name__)
 
+
+def strokes_frame(raw_messages):
+    """Build the websocket frame of broadcast messages without re-serializing them."""
+    return '{"type": "whiteboard_strokes", "data": [' + ",".join(raw_messages) + "]}"
+
+
+class WhiteboardOutbox:
+    """
+    Frames waiting to be sent to one connection. When more than MAX_PENDING_FRAMES
+    are waiting the frames are merged into one, dropping replaced scene snapshots,
+    and when the merged messages exceed MAX_PENDING_BYTES they are discarded and
+    the connection is resynced with the full board instead. Frames are dropped
+    until the board has been loaded, since the board already holds them.
+    """
+
+    def __init__(self, max_pending_frames, max_pending_bytes):
+        self.max_pending_frames = max_pending_frames
+        self.max_pending_bytes = max_pending_bytes
+        self.frames = deque()
+        self.needs_resync = False
+        self.ready = asyncio.Event()
+
+    def put(self, messages):
+        """Queue (raw, message) pairs; message may be None, it is only parsed when frames are merged."""
+        from syllabus.services.whiteboard_stroke_log import drop_replaced_snapshots
+        if not self.needs_resync:
+            self.frames.append(messages)
+            if len(self.frames) > self.max_pending_frames:
+                merged = drop_replaced_snapshots([
+                    (raw, json.loads(raw) if message is None else message)
+                    for frame in self.frames for raw, message in frame
+                ])
+                self.frames.clear()
+                if sum(len(raw) for raw, _ in merged) > self.max_pending_bytes:
+                    self.needs_resync = True
+                else:
+                    self.frames.append(merged)
+        self.ready.set()
+
+    def resynced(self):
+        """Resume queueing once the full board has been loaded."""
+        self.needs_resync = False
+        self.frames.clear()
+
+
 class WhiteboardConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         from core.common_modules.jwt_utils import get_user_from_jwt
         from core.common_modules.common_functions import CommonFunctions
+        from syllabus.services.whiteboard_stroke_log import whiteboard_stroke_log
         # Extract token
+        self.user = None
         self.session_id = None
         self.school_name = None
+        self.group_name = None
+        self.pending_broadcast = []
+        self.broadcast_task = None
+        self.send_task = None
         query_params = dict(qc.split("=") for qc in self.scope["query_string"].decode().split("&") if "=" in qc)
         token = query_params.get("token")
         school_id = query_params.get("school_id")
@@ -33,6 +81,14 @@ class WhiteboardConsumer(AsyncWebsocketConsumer):
             await self.close(code=4002)
             return
 
+        self.outbox = WhiteboardOutbox(
+            whiteboard_stroke_log.max_pending_frames, whiteboard_stroke_log.max_pending_bytes
+        )
+        self.group_name = whiteboard_stroke_log.group_name(self.school_name, self.session_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        self.broadcast_task = asyncio.create_task(self.broadcast_loop())
+        self.send_task = asyncio.create_task(self.send_loop())
+
         await self.accept()
         await self.send(text_data=json.dumps({
             "type": "whiteboard_update",
@@ -40,60 +96,95 @@ class WhiteboardConsumer(AsyncWebsocketConsumer):
         }))
 
     async def receive(self, text_data):
-        data = json.loads(text_data)
-        key = f"whiteboard:{self.session_id}"
+        from syllabus.services.whiteboard_stroke_log import whiteboard_stroke_log
+        try:
+            message = json.loads(text_data)
+        except ValueError:
+            logger.warning(f"Ignoring invalid whiteboard message for session {self.session_id}")
+            return
+
+        # Append the delta to the session's log in Redis
+        await whiteboard_stroke_log.append(self.school_name, self.session_id, text_data)
+        self.pending_broadcast.append((text_data, message))
+
+    async def broadcast_loop(self):
+        """Send the messages received from this connection to the session's group in batches."""
+        from syllabus.services.whiteboard_stroke_log import whiteboard_stroke_log
+        while True:
+            await asyncio.sleep(whiteboard_stroke_log.broadcast_interval)
+            await self.broadcast_pending()
+
+    async def broadcast_pending(self):
+        from syllabus.services.whiteboard_stroke_log import drop_replaced_snapshots
+        if not self.pending_broadcast:
+            return
+        messages = drop_replaced_snapshots(self.pending_broadcast)
+        self.pending_broadcast = []
+        try:
+            await self.channel_layer.group_send(self.group_name, {
+                "type": "whiteboard.strokes",
+                "sender": self.channel_name,
+                "messages": [raw for raw, _ in messages],
+            })
+        except Exception:
+            logger.exception(f"Failed to broadcast whiteboard session {self.session_id}")
+
+    async def whiteboard_strokes(self, event):
+        if event["sender"] == self.channel_name:
+            return
+        # Messages are only parsed if this viewer falls behind and its frames get merged
+        self.outbox.put([(raw, None) for raw in event["messages"]])
+
+    async def send_loop(self):
+        """Write queued frames to the socket, one at a time, so a slow client only backs up its own outbox."""
+        while True:
+            await self.outbox.ready.wait()
+            self.outbox.ready.clear()
+            if self.outbox.needs_resync:
+                await self.send_board()
+            while self.outbox.frames:
+                messages = self.outbox.frames.popleft()
+                await self.send(text_data=strokes_frame([raw for raw, _ in messages]))
+
+    async def send_board(self):
+        """Send the full board to a connection that fell too far behind."""
+        from syllabus.models import WhiteboardSession
+        from syllabus.services.whiteboard_stroke_log import whiteboard_stroke_log
+        logger.warning(f"Resyncing a slow whiteboard viewer of session {self.session_id}")
+        await self.flush_to_db()
+        board = await sync_to_async(whiteboard_stroke_log.load_board)(
+            self.school_name, WhiteboardSession(session_id=self.session_id)
+        )
+        self.outbox.resynced()
+        await self.send(text_data=json.dumps({"type": "whiteboard_state", "data": board}))
 
-        # Push to Redis
-        r.set(key, json.dumps(data))
-    
     async def periodic_flush(self):
+        from syllabus.services.whiteboard_stroke_log import whiteboard_stroke_log
         while True:
-            await asyncio.sleep(10)
+            await asyncio.sleep(whiteboard_stroke_log.flush_interval)
             logger.info(f"Periodic flush for session {self.session_id} started")
             await self.flush_to_db()
 
     async def disconnect(self, close_code):
-        logger.info(f"User {self.user.id} disconnected from whiteboard with code {close_code}")
+        logger.info(f"User {getattr(self.user, 'id', None)} disconnected from whiteboard with code {close_code}")
         self.flush_task.cancel()
+        for task in (self.broadcast_task, self.send_task):
+            if task:
+                task.cancel()
+        if self.group_name:
+            await self.broadcast_pending()
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
         await self.flush_to_db()
 
-
-    @sync_to_async
-    def flush_to_db(self):
-        from syllabus.models import WhiteboardSession, WhiteboardDataChunk
-        if not self.session_id:
+    async def flush_to_db(self):
+        from core.common_modules.tenant_registry import tenant_registry
+        from syllabus.services.whiteboard_stroke_log import whiteboard_stroke_log
+        if not self.session_id or not self.school_name:
             return
-        key = f"whiteboard:{self.session_id}"
-        if not r.exists(key):
-            return
-
-        strokes = json.loads(r.get(key))
-        r.delete(key)
-
-        # Get or create session
-        session, _ = WhiteboardSession.objects.using(self.school_name).get_or_create(session_id=self.session_id)
-
-        # Get latest chunk
-        latest_chunk = WhiteboardDataChunk.objects.using(self.school_name).filter(session=session).order_by("-chunk_index").first()
-
-        if not latest_chunk:
-            # Create first chunk
-            chunk_index = 1
-            WhiteboardDataChunk.objects.using(self.school_name).create(
-                session=session, chunk_index=chunk_index, data=strokes
-            )
-            return
-
-        # # Check current size
-        # current_size = sys.getsizeof(json.dumps(latest_chunk.data))
-
-        # if current_size + sys.getsizeof(json.dumps(strokes)) > MAX_CHUNK_SIZE_BYTES:
-        #     # Create new chunk
-        #     new_index = latest_chunk.chunk_index + 1
-        #     WhiteboardDataChunk.objects.using(self.school_name).create(
-        #         session=session, chunk_index=new_index, data=strokes
-        #     )
-        # else:
-        #     # Append to current chunk
-        latest_chunk.data = strokes
-        latest_chunk.save(using=self.school_name)
+        try:
+            # A class can outlast the registry's idle timeout without any HTTP
+            # traffic for the school, so keep the database registered and in use.
+            tenant_registry.ensure_registered(self.school_name)
+            await whiteboard_stroke_log.flush(self.school_name, self.session_id)
+        except Exception:
+            logger.exception(f"Failed to flush whiteboard session {self.session_id}")
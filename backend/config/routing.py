@@ -1,6 +1,10 @@
 from django.urls import re_path
 from .consumers.whiteboard_consumer import WhiteboardConsumer
+from .consumers.llm_job_consumer import LlmJobConsumer
+from .consumers.assistant_chat_consumer import AssistantChatConsumer
 
 websocket_urlpatterns = [
     re_path(r"^ws/whiteboard/(?P<session_id>\w+)/$", WhiteboardConsumer.as_asgi()),
+    re_path(r"^ws/llm_jobs/(?P<job_id>\w+)/$", LlmJobConsumer.as_asgi()),
+    re_path(r"^ws/assistant_chat/$", AssistantChatConsumer.as_asgi()),
 ]
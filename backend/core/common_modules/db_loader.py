@@ -1,16 +1,38 @@
 """Db loader module for managing school databases."""
 
 import logging
+import threading
 
 from django.conf import settings
+from django.db import connections
 
 from school.models import SchoolDbMetadata
 
 logger = logging.getLogger(__name__)
 
+_databases_lock = threading.Lock()
+
+
+def replace_databases(add=None, remove=()):
+    """
+    Publish a new settings.DATABASES with the given aliases added or removed
+    and return the removed aliases. Other threads iterate the current dict
+    through connections.all(), so it is copied instead of changed in place.
+    """
+    with _databases_lock:
+        databases = dict(settings.DATABASES)
+        databases.update(add or {})
+        removed = [alias for alias in remove if databases.pop(alias, None) is not None]
+        settings.DATABASES = databases
+        connections.settings = connections.configure_settings(databases)
+    return removed
+
+
 class DbLoader:
     """Class to handle loading and managing school databases."""
 
+    POOLED_ENGINE = 'core.db_backends.pooled_postgresql'
+
     def __init__(self):
         pass
 
@@ -18,7 +40,14 @@ class DbLoader:
         """Load all dynamic databases from the SchoolDbMetadata model."""
         try:
             if db_key not in settings.DATABASES:
-                settings.DATABASES[db_key] = {
+                pool_config = settings.TENANT_DB_POOL_CONFIG
+                conn_max_age = pool_config['CONN_MAX_AGE']
+                if pool_config['ENABLED'] and engine == 'django.db.backends.postgresql':
+                    # Pooled connections go back to the pool when closed, so
+                    # Django must not keep them open between requests.
+                    engine = self.POOLED_ENGINE
+                    conn_max_age = 0
+                replace_databases(add={db_key: {
                     'ENGINE': engine,
                     'NAME': name,
                     'USER': user,
@@ -27,11 +56,11 @@ class DbLoader:
                     'PORT': port,
                     'ATOMIC_REQUESTS': False,
                     'OPTIONS': {},
-                    'CONN_MAX_AGE': 300,
+                    'CONN_MAX_AGE': conn_max_age,
                     'TIME_ZONE': settings.TIME_ZONE,
                     'CONN_HEALTH_CHECKS': True,
                     'AUTOCOMMIT': True,
-                }
+                }})
             else:
                 logger.info(f"Database {db_key} already exists in settings.DATABASES")
         except Exception as e:
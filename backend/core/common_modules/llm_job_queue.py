@@ -0,0 +1,188 @@
+"""Background queue for long running LLM jobs."""
+
+import logging
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentJobError(Exception):
+    """Raised by a job handler for failures that retrying can't fix."""
+
+
+class LlmJobQueue:
+    """
+    Runs LLM jobs on a bounded worker pool so request threads return
+    immediately with a job id.
+
+    Job state lives in the Django cache so any worker can answer a poll,
+    and every state change is pushed to the Channels group of the job.
+    Failed attempts are retried with exponential backoff and jitter unless
+    the handler raised PermanentJobError. At most MAX_PENDING jobs may be
+    queued or running at once; submit() returns None when that limit is hit.
+
+    Queued jobs and retry timers only live in the process that accepted the
+    job, so a restart loses them. get_job() marks a job that has not changed
+    state for STALE_AFTER seconds as failed instead of leaving it pending
+    forever; STALE_AFTER must exceed the longest attempt of any handler.
+    A worker that outlives that deadline leaves the failed state in place.
+    """
+
+    CACHE_KEY_PREFIX = "llm_job"
+    QUEUED = "queued"
+    RUNNING = "running"
+    RETRYING = "retrying"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    ACTIVE = (QUEUED, RUNNING, RETRYING)
+
+    def __init__(self):
+        config = settings.LLM_JOB_QUEUE_CONFIG
+        self.max_workers = config['MAX_WORKERS']
+        self.max_retries = config['MAX_RETRIES']
+        self.backoff_base = config['BACKOFF_BASE']
+        self.backoff_max = config['BACKOFF_MAX']
+        self.result_ttl = config['RESULT_TTL']
+        self.stale_after = config['STALE_AFTER']
+        self._slots = threading.BoundedSemaphore(config['MAX_PENDING'])
+        self._handlers = {}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="llm-job"
+                )
+            return self._executor
+
+    def register_handler(self, job_type, handler):
+        """Register the callable that runs jobs of the given type."""
+        self._handlers[job_type] = handler
+
+    @staticmethod
+    def group_name(job_id):
+        return f"llm_job_{job_id}"
+
+    def _cache_key(self, job_id):
+        return f"{self.CACHE_KEY_PREFIX}:{job_id}"
+
+    def get_job(self, job_id):
+        """Return the stored state of a job or None."""
+        job = cache.get(self._cache_key(job_id))
+        if job and job["status"] in self.ACTIVE and time.time() - job["updated_at"] > self.stale_after:
+            logger.warning(f"Job {job_id} was {job['status']} for over {self.stale_after}s, marking it as failed")
+            job = self._update_job(job, status=self.FAILED, error="Job was interrupted. Please try again.")
+        return job
+
+    def _marked_failed(self, job):
+        """Whether get_job() already failed this job as stale."""
+        stored = cache.get(self._cache_key(job["job_id"]))
+        return stored is not None and stored["status"] == self.FAILED
+
+    def _update_job(self, job, **changes):
+        job.update(changes, updated_at=time.time())
+        cache.set(self._cache_key(job["job_id"]), job, timeout=self.result_ttl)
+        self._publish(job)
+        return job
+
+    def _publish(self, job):
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        try:
+            async_to_sync(channel_layer.group_send)(
+                self.group_name(job["job_id"]), {"type": "job.update", "job": job}
+            )
+        except Exception as e:
+            logger.warning(f"Failed to push update for job {job['job_id']}: {e}")
+
+    def submit(self, job_type, payload, user_id=None):
+        """Queue a job and return its state, or None if the queue is full."""
+        if job_type not in self._handlers:
+            raise ValueError(f"No handler registered for job type {job_type}")
+        if not self._slots.acquire(blocking=False):
+            logger.warning(f"LLM job queue is full, rejecting {job_type} job")
+            return None
+
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "job_type": job_type,
+            "user_id": user_id,
+            "status": self.QUEUED,
+            "attempts": 0,
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+        }
+        try:
+            self._update_job(job)
+            self._get_executor().submit(self._run, job, payload)
+        except Exception:
+            self._slots.release()
+            raise
+        logger.info(f"Queued {job_type} job {job['job_id']}")
+        return job
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_base * (2 ** (attempt - 1)), self.backoff_max)
+        return delay + random.uniform(0, delay / 2)
+
+    def _run(self, job, payload):
+        if self._marked_failed(job):
+            logger.warning(f"Job {job['job_id']} was marked as failed before it ran, skipping it")
+            self._slots.release()
+            return
+        attempt = job["attempts"] + 1
+        self._update_job(job, status=self.RUNNING, attempts=attempt)
+        close_old_connections()
+        try:
+            result = self._handlers[job["job_type"]](**payload)
+        except PermanentJobError as e:
+            logger.error(f"Job {job['job_id']} failed permanently: {e}")
+            self._finish(job, status=self.FAILED, error=str(e))
+        except Exception as e:
+            if attempt > self.max_retries:
+                logger.error(f"Job {job['job_id']} failed after {attempt} attempts: {e}")
+                self._finish(job, status=self.FAILED, error="Job failed. Please try again.")
+            else:
+                delay = self._backoff(attempt)
+                logger.warning(f"Job {job['job_id']} attempt {attempt} failed, retrying in {delay:.1f}s: {e}")
+                self._update_job(job, status=self.RETRYING, error=str(e))
+                timer = threading.Timer(delay, self._retry, args=(job, payload))
+                timer.daemon = True
+                timer.start()
+        else:
+            self._finish(job, status=self.SUCCEEDED, result=result, error=None)
+        finally:
+            connections.close_all()
+
+    def _retry(self, job, payload):
+        try:
+            self._get_executor().submit(self._run, job, payload)
+        except Exception as e:
+            logger.error(f"Failed to resubmit job {job['job_id']}: {e}")
+            self._finish(job, status=self.FAILED, error="Job failed. Please try again.")
+
+    def _finish(self, job, **changes):
+        try:
+            if self._marked_failed(job):
+                logger.warning(f"Job {job['job_id']} was marked as failed while it ran, dropping its outcome")
+                return
+            self._update_job(job, **changes)
+        finally:
+            self._slots.release()
+
+
+llm_job_queue = LlmJobQueue()
@@ -0,0 +1,215 @@
+"""Per request query metrics keyed by tenant and endpoint."""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_request_context = threading.local()
+
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class RequestQueryStats:
+    """Queries and SQL time of the current request, per database alias."""
+
+    def __init__(self):
+        self.queries = defaultdict(int)
+        self.sql_seconds = defaultdict(float)
+
+    def record(self, alias, seconds):
+        self.queries[alias] += 1
+        self.sql_seconds[alias] += seconds
+
+    @property
+    def total_queries(self):
+        return sum(self.queries.values())
+
+    @property
+    def total_sql_seconds(self):
+        return sum(self.sql_seconds.values())
+
+
+def query_timer(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every connection. It only measures while a
+    request is being tracked on the current thread.
+    """
+    stats = getattr(_request_context, 'stats', None)
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record(context['connection'].alias, time.perf_counter() - start)
+
+
+def escape_label(value):
+    """Escape a Prometheus label value."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def install_query_timer(connection):
+    """Add query_timer to the connection's execute wrappers once."""
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_timer)
+
+
+def start_request():
+    _request_context.stats = RequestQueryStats()
+    return _request_context.stats
+
+
+def finish_request():
+    stats = getattr(_request_context, 'stats', None)
+    _request_context.stats = None
+    return stats
+
+
+class Histogram:
+    """Cumulative Prometheus style histogram."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+
+class QueryMetrics:
+    """
+    In-process aggregation of request metrics.
+
+    Series are keyed by (tenant, endpoint) and the database breakdown uses
+    the labels "default" and "tenant" so the number of series stays bounded
+    by MAX_SERIES; anything beyond it is folded into endpoint="other".
+    """
+
+    def __init__(self):
+        config = settings.QUERY_METRICS_CONFIG
+        self.max_series = config['MAX_SERIES']
+        self.query_budget = config['QUERY_BUDGET']
+        self.time_budget = config['TIME_BUDGET_MS'] / 1000
+        self.log_over_budget = config['LOG_OVER_BUDGET']
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _get_series(self, tenant, endpoint):
+        key = (tenant, endpoint)
+        series = self._series.get(key)
+        if series is None:
+            if len(self._series) >= self.max_series:
+                key = (tenant, "other")
+                series = self._series.get(key)
+            if series is None:
+                series = {
+                    "requests": 0,
+                    "over_budget": 0,
+                    "wall": Histogram(SECONDS_BUCKETS),
+                    "sql": Histogram(SECONDS_BUCKETS),
+                    "queries": Histogram(QUERY_COUNT_BUCKETS),
+                    "db_queries": defaultdict(int),
+                    "db_seconds": defaultdict(float),
+                }
+                self._series[key] = series
+        return series
+
+    def observe(self, tenant, endpoint, wall_seconds, stats):
+        """Record one finished request."""
+        over_budget = (
+            stats.total_queries > self.query_budget or wall_seconds > self.time_budget
+        )
+        with self._lock:
+            series = self._get_series(tenant, endpoint)
+            series["requests"] += 1
+            series["wall"].observe(wall_seconds)
+            series["sql"].observe(stats.total_sql_seconds)
+            series["queries"].observe(stats.total_queries)
+            for alias, count in stats.queries.items():
+                db = "default" if alias == "default" else "tenant"
+                series["db_queries"][db] += count
+                series["db_seconds"][db] += stats.sql_seconds[alias]
+            if over_budget:
+                series["over_budget"] += 1
+
+        if over_budget and self.log_over_budget:
+            logger.warning(
+                f"Request over budget: tenant={tenant} endpoint={endpoint} "
+                f"queries={stats.total_queries} sql_ms={stats.total_sql_seconds * 1000:.1f} "
+                f"wall_ms={wall_seconds * 1000:.1f} by_db={dict(stats.queries)}"
+            )
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    @staticmethod
+    def _labels(**labels):
+        return ",".join(f'{name}="{escape_label(value)}"' for name, value in labels.items())
+
+    def _render_histogram(self, lines, name, histogram, labels):
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            lines.append(f'{name}_bucket{{{self._labels(**labels, le=bound)}}} {count}')
+        lines.append(f'{name}_bucket{{{self._labels(**labels, le="+Inf")}}} {histogram.count}')
+        lines.append(f'{name}_sum{{{self._labels(**labels)}}} {histogram.sum}')
+        lines.append(f'{name}_count{{{self._labels(**labels)}}} {histogram.count}')
+
+    def render(self):
+        """Return the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            series = sorted(self._series.items())
+            lines = [
+                "# HELP http_requests_total Requests handled.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (tenant, endpoint), data in series:
+                lines.append(f'http_requests_total{{{self._labels(tenant=tenant, endpoint=endpoint)}}} {data["requests"]}')
+
+            lines += [
+                "# HELP http_requests_over_budget_total Requests over the query or time budget.",
+                "# TYPE http_requests_over_budget_total counter",
+            ]
+            for (tenant, endpoint), data in series:
+                lines.append(f'http_requests_over_budget_total{{{self._labels(tenant=tenant, endpoint=endpoint)}}} {data["over_budget"]}')
+
+            for name, key, help_text in (
+                ("http_request_duration_seconds", "wall", "Wall time per request."),
+                ("db_request_sql_seconds", "sql", "SQL time per request."),
+                ("db_request_queries", "queries", "Queries per request."),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for (tenant, endpoint), data in series:
+                    self._render_histogram(lines, name, data[key], {"tenant": tenant, "endpoint": endpoint})
+
+            lines += [
+                "# HELP db_queries_total Queries by database.",
+                "# TYPE db_queries_total counter",
+            ]
+            for (tenant, endpoint), data in series:
+                for db, count in sorted(data["db_queries"].items()):
+                    lines.append(f'db_queries_total{{{self._labels(tenant=tenant, endpoint=endpoint, db=db)}}} {count}')
+
+            lines += [
+                "# HELP db_query_seconds_total SQL time by database.",
+                "# TYPE db_query_seconds_total counter",
+            ]
+            for (tenant, endpoint), data in series:
+                for db, seconds in sorted(data["db_seconds"].items()):
+                    lines.append(f'db_query_seconds_total{{{self._labels(tenant=tenant, endpoint=endpoint, db=db)}}} {seconds}')
+        return "\n".join(lines) + "\n"
+
+
+query_metrics = QueryMetrics()
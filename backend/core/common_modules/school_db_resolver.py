@@ -0,0 +1,118 @@
+"""Resolver for mapping a school ID to its tenant database name."""
+
+import logging
+import threading
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import cache
+
+from school.models import SchoolDbMetadata
+
+logger = logging.getLogger(__name__)
+
+
+class SchoolDbResolver:
+    """
+    Two tier cache in front of the SchoolDbMetadata lookup.
+
+    The first tier is a bounded in-process LRU with a short TTL so that
+    changes made by other workers are picked up quickly. The second tier
+    is the shared Django cache (Redis outside of dev), which lets a freshly
+    started worker resolve schools without touching the default database.
+    Only successful lookups are cached, so newly created schools resolve
+    as soon as their metadata row exists.
+    """
+
+    CACHE_KEY_PREFIX = "school_db_name"
+
+    def __init__(self):
+        config = settings.SCHOOL_DB_RESOLVER_CONFIG
+        self.shared_ttl = config['SHARED_TTL']
+        self._local = TTLCache(maxsize=config['LOCAL_MAX_SIZE'], ttl=config['LOCAL_TTL'])
+        self._lock = threading.Lock()
+        self._stats = {
+            "local_hits": 0,
+            "shared_hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+        }
+
+    def _cache_key(self, school_id):
+        return f"{self.CACHE_KEY_PREFIX}:{school_id}"
+
+    def _incr(self, counter):
+        with self._lock:
+            self._stats[counter] += 1
+
+    def resolve(self, school_id):
+        """Return the database name for the school or None if it is unknown."""
+        if school_id in (None, ""):
+            return None
+        school_id = str(school_id)
+
+        with self._lock:
+            db_name = self._local.get(school_id)
+        if db_name:
+            self._incr("local_hits")
+            return db_name
+
+        key = self._cache_key(school_id)
+        try:
+            db_name = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Shared cache lookup failed for school ID {school_id}: {e}")
+            db_name = None
+        if db_name:
+            self._incr("shared_hits")
+            with self._lock:
+                self._local[school_id] = db_name
+            return db_name
+
+        self._incr("misses")
+        db_name = SchoolDbMetadata.objects.filter(
+            school_id=school_id, is_active=True
+        ).values_list('db_name', flat=True).first()
+        if not db_name:
+            logger.error(f"School metadata not found for school ID: {school_id}")
+            return None
+
+        with self._lock:
+            self._local[school_id] = db_name
+        try:
+            cache.set(key, db_name, timeout=self.shared_ttl)
+        except Exception as e:
+            logger.warning(f"Shared cache update failed for school ID {school_id}: {e}")
+        return db_name
+
+    def invalidate(self, school_id):
+        """Drop the cached database name for a school from both tiers."""
+        if school_id in (None, ""):
+            return
+        school_id = str(school_id)
+        with self._lock:
+            self._local.pop(school_id, None)
+            self._stats["invalidations"] += 1
+        try:
+            cache.delete(self._cache_key(school_id))
+        except Exception as e:
+            logger.warning(f"Shared cache invalidation failed for school ID {school_id}: {e}")
+
+    def clear_local(self):
+        """Empty the in-process tier."""
+        with self._lock:
+            self._local.clear()
+
+    def stats(self):
+        """Return a snapshot of the hit/miss counters."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["local_size"] = len(self._local)
+        lookups = snapshot["local_hits"] + snapshot["shared_hits"] + snapshot["misses"]
+        snapshot["hit_ratio"] = round(
+            (snapshot["local_hits"] + snapshot["shared_hits"]) / lookups, 4
+        ) if lookups else 0.0
+        return snapshot
+
+
+school_db_resolver = SchoolDbResolver()
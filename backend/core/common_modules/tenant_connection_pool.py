@@ -0,0 +1,204 @@
+"""Bounded connection pool shared by the tenant (school) databases."""
+
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+
+import psycopg2
+from psycopg2 import extensions
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """Raised when no connection could be acquired within the acquire timeout."""
+
+
+class TenantConnectionPool:
+    """
+    Per process connection pool for the dynamic school databases.
+
+    Every tenant alias is limited to MAX_SIZE_PER_TENANT open connections
+    and all tenants together to MAX_TOTAL. When the global cap is reached
+    an idle connection of another tenant is closed to make room, otherwise
+    the caller waits up to ACQUIRE_TIMEOUT seconds for a connection to be
+    released. Idle connections are closed after IDLE_TIMEOUT seconds.
+    """
+
+    def __init__(self):
+        config = settings.TENANT_DB_POOL_CONFIG
+        self.max_per_tenant = config['MAX_SIZE_PER_TENANT']
+        self.max_total = config['MAX_TOTAL']
+        self.idle_timeout = config['IDLE_TIMEOUT']
+        self.acquire_timeout = config['ACQUIRE_TIMEOUT']
+        self._cond = threading.Condition()
+        self._idle = defaultdict(deque)
+        self._open = defaultdict(int)
+        self._in_use = defaultdict(int)
+        self._waiting = defaultdict(int)
+        self._total_open = 0
+        self._stats = defaultdict(lambda: {
+            "acquired": 0,
+            "created": 0,
+            "reused": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "timeouts": 0,
+            "discarded": 0,
+        })
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled connection: {e}")
+
+    def _drop_idle(self, alias, conn):
+        """Forget an idle connection. Must be called with the lock held."""
+        self._open[alias] -= 1
+        self._total_open -= 1
+        self._stats[alias]["discarded"] += 1
+        self._close_quietly(conn)
+
+    def _prune_idle(self, now):
+        """Close connections idle for longer than the idle timeout (lock held)."""
+        for alias, idle in self._idle.items():
+            while idle and now - idle[0][1] > self.idle_timeout:
+                conn, _ = idle.popleft()
+                self._drop_idle(alias, conn)
+
+    def _steal_idle_slot(self, alias):
+        """Close the oldest idle connection of another tenant (lock held)."""
+        oldest = None
+        for other_alias, idle in self._idle.items():
+            if other_alias == alias or not idle:
+                continue
+            if oldest is None or idle[0][1] < self._idle[oldest][0][1]:
+                oldest = other_alias
+        if oldest is None:
+            return False
+        conn, _ = self._idle[oldest].popleft()
+        self._drop_idle(oldest, conn)
+        return True
+
+    def acquire(self, alias, connect):
+        """Return a connection for the alias, calling connect() to open a new one."""
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        waited = False
+        with self._cond:
+            self._waiting[alias] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._prune_idle(now)
+                    idle = self._idle[alias]
+                    while idle:
+                        conn, _ = idle.pop()
+                        if conn.closed:
+                            self._drop_idle(alias, conn)
+                            continue
+                        self._in_use[alias] += 1
+                        self._record_acquire(alias, start, waited, reused=True)
+                        return conn
+
+                    if self._open[alias] < self.max_per_tenant:
+                        if self._total_open < self.max_total or self._steal_idle_slot(alias):
+                            self._open[alias] += 1
+                            self._in_use[alias] += 1
+                            self._total_open += 1
+                            self._record_acquire(alias, start, waited, reused=False)
+                            break
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._stats[alias]["timeouts"] += 1
+                        logger.error(
+                            f"Timed out waiting for a connection to {alias} "
+                            f"(open={self._open[alias]}, total_open={self._total_open})"
+                        )
+                        raise PoolTimeout(f"Connection pool for {alias} exhausted.")
+                    waited = True
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting[alias] -= 1
+
+        try:
+            return connect()
+        except Exception:
+            with self._cond:
+                self._open[alias] -= 1
+                self._in_use[alias] -= 1
+                self._total_open -= 1
+                self._cond.notify_all()
+            raise
+
+    def _record_acquire(self, alias, start, waited, reused):
+        stats = self._stats[alias]
+        stats["acquired"] += 1
+        stats["reused" if reused else "created"] += 1
+        if waited:
+            stats["waits"] += 1
+            stats["wait_seconds"] += time.monotonic() - start
+
+    def release(self, alias, conn, discard=False):
+        """Return a connection to the pool, closing it if it is no longer usable."""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception as e:
+                logger.warning(f"Discarding pooled connection to {alias}: {e}")
+                discard = True
+        with self._cond:
+            self._in_use[alias] -= 1
+            if discard or conn.closed:
+                self._drop_idle(alias, conn)
+            else:
+                self._idle[alias].append((conn, time.monotonic()))
+            self._prune_idle(time.monotonic())
+            self._cond.notify_all()
+
+    def close_idle(self, alias=None):
+        """Close idle connections for one alias, or for every alias."""
+        with self._cond:
+            aliases = [alias] if alias else list(self._idle)
+            for name in aliases:
+                idle = self._idle.get(name)
+                while idle:
+                    conn, _ = idle.popleft()
+                    self._drop_idle(name, conn)
+            self._cond.notify_all()
+
+    def prune(self):
+        """Close connections that have exceeded the idle timeout."""
+        with self._cond:
+            self._prune_idle(time.monotonic())
+            self._cond.notify_all()
+
+    def stats(self):
+        """Return pool gauges and counters per alias plus global totals."""
+        with self._cond:
+            aliases = set(self._open) | set(self._stats)
+            per_alias = {
+                alias: {
+                    "open": self._open[alias],
+                    "in_use": self._in_use[alias],
+                    "idle": len(self._idle[alias]),
+                    "waiting": self._waiting[alias],
+                    **self._stats[alias],
+                }
+                for alias in aliases
+            }
+            return {
+                "max_per_tenant": self.max_per_tenant,
+                "max_total": self.max_total,
+                "total_open": self._total_open,
+                "total_waiting": sum(self._waiting.values()),
+                "tenants": per_alias,
+            }
+
+
+tenant_connection_pool = TenantConnectionPool()
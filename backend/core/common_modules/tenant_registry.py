@@ -0,0 +1,130 @@
+"""Registry for lazily registered tenant (school) databases."""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from school.models import SchoolDbMetadata
+from core.common_modules.db_loader import DbLoader, replace_databases
+from core.common_modules.tenant_connection_pool import tenant_connection_pool
+from core.common_modules.tenant_replicas import tenant_replicas
+
+logger = logging.getLogger(__name__)
+
+
+class TenantRegistry:
+    """
+    Keeps track of the school databases registered in settings.DATABASES.
+
+    A school database is added the first time a request for that school
+    is resolved and is dropped again once it has been idle for longer than
+    IDLE_TIMEOUT. Django connections are thread local, so an evicted alias
+    is remembered until every thread has closed its own connection to it
+    (see close_evicted_connections). settings.DATABASES is only ever
+    replaced, never changed in place (see replace_databases).
+    """
+
+    def __init__(self):
+        config = settings.TENANT_REGISTRY_CONFIG
+        self.idle_timeout = config['IDLE_TIMEOUT']
+        self.sweep_interval = config['SWEEP_INTERVAL']
+        self._lock = threading.RLock()
+        self._last_used = {}
+        self._evicted = set()
+        self._last_sweep = time.monotonic()
+
+    def ensure_registered(self, db_name):
+        """Register the tenant database if needed and mark it as recently used."""
+        if not db_name or db_name == 'default':
+            return db_name
+        now = time.monotonic()
+        with self._lock:
+            if db_name in settings.DATABASES and db_name in self._last_used:
+                self._last_used[db_name] = now
+                return db_name
+
+            if db_name not in settings.DATABASES:
+                DbLoader().load_dynamic_databases(
+                    db_key = db_name,
+                    engine = settings.DB_CONFIG['ENGINE'],
+                    name = db_name,
+                    user = settings.DB_CONFIG['USER'],
+                    password = settings.DB_CONFIG['PASSWORD'],
+                    host = settings.DB_CONFIG['HOST'],
+                    port = settings.DB_CONFIG['PORT']
+                )
+                logger.info(f"Registered tenant database {db_name}")
+            tenant_replicas.register(db_name)
+            self._evicted.discard(db_name)
+            self._evicted.discard(tenant_replicas.alias(db_name))
+            self._last_used[db_name] = now
+        return db_name
+
+    def register_all_tenants(self):
+        """Register every school database and return their aliases."""
+        db_names = SchoolDbMetadata.objects.values_list('db_name', flat=True)
+        return [self.ensure_registered(db_name) for db_name in db_names]
+
+    def registered_tenants(self):
+        """Return the aliases of the tenant databases currently registered."""
+        with self._lock:
+            return [alias for alias in self._last_used if alias in settings.DATABASES]
+
+    def evict(self, db_name, min_idle=None):
+        """
+        Remove a tenant database and its read replica from settings.DATABASES.
+        With min_idle, a tenant used within the last min_idle seconds is kept
+        and False is returned.
+        """
+        aliases = (db_name, tenant_replicas.alias(db_name))
+        with self._lock:
+            last_used = self._last_used.get(db_name)
+            if min_idle is not None and last_used is not None and time.monotonic() - last_used < min_idle:
+                return False
+            self._last_used.pop(db_name, None)
+            for alias in replace_databases(remove=aliases):
+                self._evicted.add(alias)
+                logger.info(f"Evicted idle tenant database {alias}")
+        self.close_evicted_connections()
+        for alias in aliases:
+            tenant_connection_pool.close_idle(alias)
+        return True
+
+    def evict_idle_tenants(self, force=False):
+        """Evict tenants that have not been used within the idle timeout."""
+        now = time.monotonic()
+        if not force and now - self._last_sweep < self.sweep_interval:
+            return []
+        with self._lock:
+            self._last_sweep = now
+            idle = [
+                alias for alias, last_used in self._last_used.items()
+                if now - last_used > self.idle_timeout
+            ]
+        # A tenant picked up again since the idle list was taken is kept
+        evicted = [alias for alias in idle if self.evict(alias, min_idle=self.sweep_interval)]
+        tenant_connection_pool.prune()
+        return evicted
+
+    def close_evicted_connections(self):
+        """Close the current thread's connections to evicted tenant databases."""
+        if not self._evicted:
+            return
+        # Evicted aliases are no longer in connections.settings, so they are
+        # skipped by connections.all() and have to be looked up directly.
+        thread_connections = connections._connections
+        for alias in list(self._evicted):
+            conn = getattr(thread_connections, alias, None)
+            if conn is None:
+                continue
+            try:
+                conn.close()
+            except Exception as e:
+                logger.warning(f"Error closing connection to evicted database {alias}: {e}")
+            delattr(thread_connections, alias)
+
+
+tenant_registry = TenantRegistry()
@@ -0,0 +1,139 @@
+"""Read replica aliases for the tenant (school) databases."""
+
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.common_modules.db_loader import DbLoader
+
+logger = logging.getLogger(__name__)
+
+_request_context = threading.local()
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def write_tracker(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every connection. Writes to a tenant
+    primary pin the tenant's reads to the primary for the current request
+    and, for STICKY_SECONDS, for the requesting user.
+    """
+    result = execute(sql, params, many, context)
+    alias = context['connection'].alias
+    if alias != 'default' and not tenant_replicas.is_replica(alias) \
+            and (many or sql.lstrip()[:6].upper() in WRITE_STATEMENTS):
+        tenant_replicas.mark_write(alias)
+    return result
+
+
+def install_write_tracker(connection):
+    """Add write_tracker to the connection's execute wrappers once."""
+    if write_tracker not in connection.execute_wrappers:
+        connection.execute_wrappers.append(write_tracker)
+
+
+class TenantReplicas:
+    """
+    Registers a read replica alias next to every tenant database and picks
+    the alias report and listing reads should use.
+
+    The replica of "<db>" is registered as "<db>__replica" and points at
+    REPLICA_HOST/REPLICA_PORT with the database name "<db><NAME_SUFFIX>".
+    Reads go to the replica unless the tenant was written to during the
+    current request or by the same user within the last STICKY_SECONDS,
+    so users always read their own writes despite replication lag.
+    """
+
+    ALIAS_SUFFIX = '__replica'
+
+    def __init__(self):
+        config = settings.DB_REPLICA_CONFIG
+        self.enabled = config['ENABLED']
+        self.host = config['HOST'] or settings.DB_CONFIG['HOST']
+        self.port = config['PORT'] or settings.DB_CONFIG['PORT']
+        self.user = config['USER'] or settings.DB_CONFIG['USER']
+        self.password = config['PASSWORD'] or settings.DB_CONFIG['PASSWORD']
+        self.name_suffix = config['NAME_SUFFIX']
+        self.sticky_seconds = config['STICKY_SECONDS']
+
+    def alias(self, db_name):
+        return f"{db_name}{self.ALIAS_SUFFIX}"
+
+    def is_replica(self, alias):
+        return alias.endswith(self.ALIAS_SUFFIX)
+
+    def primary_alias(self, alias):
+        """Return the tenant primary alias of a replica alias, other aliases unchanged."""
+        if self.is_replica(alias):
+            return alias[:-len(self.ALIAS_SUFFIX)]
+        return alias
+
+    def register(self, db_name):
+        """Add the replica alias of a tenant database to settings.DATABASES."""
+        if not self.enabled or not db_name or db_name == 'default':
+            return None
+        alias = self.alias(db_name)
+        if alias not in settings.DATABASES:
+            DbLoader().load_dynamic_databases(
+                db_key = alias,
+                engine = settings.DB_CONFIG['ENGINE'],
+                name = f"{db_name}{self.name_suffix}",
+                user = self.user,
+                password = self.password,
+                host = self.host,
+                port = self.port
+            )
+            logger.info(f"Registered read replica {alias} for tenant database {db_name}")
+        return alias
+
+    def _pin_key(self, user_key, db_name):
+        return f"db_replica_pin:{user_key}:{db_name}"
+
+    def start_request(self, user_key=None):
+        _request_context.user_key = user_key
+        _request_context.pinned = set()
+
+    def finish_request(self):
+        _request_context.user_key = None
+        _request_context.pinned = None
+
+    def mark_write(self, db_name):
+        """Pin reads of db_name to the primary for this request and the user's sticky window."""
+        pinned = getattr(_request_context, 'pinned', None)
+        if pinned is None or db_name in pinned:
+            return
+        pinned.add(db_name)
+        user_key = getattr(_request_context, 'user_key', None)
+        if user_key is not None and self.enabled:
+            try:
+                cache.set(self._pin_key(user_key, db_name), True, self.sticky_seconds)
+            except Exception as e:
+                logger.error(f"Failed to pin {db_name} to the primary for user {user_key}: {e}")
+
+    def is_pinned(self, db_name):
+        pinned = getattr(_request_context, 'pinned', None)
+        if pinned and db_name in pinned:
+            return True
+        user_key = getattr(_request_context, 'user_key', None)
+        if user_key is None:
+            return False
+        try:
+            return bool(cache.get(self._pin_key(user_key, db_name)))
+        except Exception as e:
+            logger.error(f"Failed to read the replica pin of {db_name} for user {user_key}: {e}")
+            return True
+
+    def read_alias(self, db_name):
+        """Alias to read db_name from: its replica, or the primary when pinned or disabled."""
+        if not self.enabled or not db_name or db_name == 'default' or self.is_pinned(db_name):
+            return db_name
+        alias = self.alias(db_name)
+        if alias not in settings.DATABASES:
+            return db_name
+        return alias
+
+
+tenant_replicas = TenantReplicas()
@@ -0,0 +1,33 @@
+"""PostgreSQL backend that borrows connections from the tenant connection pool."""
+
+from functools import partial
+
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresDatabaseWrapper
+
+from core.common_modules.tenant_connection_pool import tenant_connection_pool
+
+
+class DatabaseWrapper(PostgresDatabaseWrapper):
+    """
+    psycopg2 wrapper whose connections are checked out of the shared pool.
+
+    Django's built in pool needs psycopg 3, so this backend is used for the
+    dynamic school databases instead. Closing the connection (for example
+    in CloseDBConnectionMiddleware) hands it back to the pool rather than
+    closing the socket.
+    """
+
+    def get_new_connection(self, conn_params):
+        return tenant_connection_pool.acquire(
+            self.alias, partial(super().get_new_connection, conn_params)
+        )
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # A connection closed inside an atomic block stays referenced by the
+        # wrapper until the block exits, so it can't be shared with others.
+        with self.wrap_database_errors:
+            tenant_connection_pool.release(
+                self.alias, self.connection, discard=self.in_atomic_block
+            )
@@ -0,0 +1,77 @@
+"""Provider side caching of stable prompt prefixes."""
+
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from google.ai import generativelanguage as glm
+from google.protobuf import duration_pb2
+
+logger = logging.getLogger(__name__)
+
+
+class GeminiContextCache:
+    """
+    Creates Gemini cached contents for system instructions and remembers
+    their names, so repeat requests with the same instruction reference the
+    cache instead of re-sending its tokens.
+
+    Gemini only caches prompts above a minimum token count, so shorter
+    instructions are sent inline. Failures are remembered for
+    FAILURE_TTL seconds to avoid retrying on every request.
+    """
+
+    CACHE_KEY_PREFIX = "gemini_context"
+    UNAVAILABLE = "unavailable"
+
+    def __init__(self):
+        config = settings.LLM_CONTEXT_CACHE_CONFIG
+        self.enabled = config['ENABLED']
+        self.ttl = config['TTL']
+        self.min_chars = config['MIN_CHARS']
+        self.failure_ttl = config['FAILURE_TTL']
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = glm.CacheServiceClient(
+                client_options={"api_key": settings.API_KEYS.get('GEMINI_API_KEY')}
+            )
+        return self._client
+
+    def _cache_key(self, model, system_instruction):
+        digest = hashlib.sha256(f"{model}\n{system_instruction}".encode("utf-8")).hexdigest()
+        return f"{self.CACHE_KEY_PREFIX}:{digest}"
+
+    def get_cached_content(self, model, system_instruction):
+        """Return the name of a cached content holding the instruction, or None."""
+        if not self.enabled or len(system_instruction) < self.min_chars:
+            return None
+
+        key = self._cache_key(model, system_instruction)
+        name = cache.get(key)
+        if name == self.UNAVAILABLE:
+            return None
+        if name:
+            return name
+
+        try:
+            cached_content = self._get_client().create_cached_content(
+                cached_content=glm.CachedContent(
+                    model=model if model.startswith("models/") else f"models/{model}",
+                    system_instruction=glm.Content(parts=[glm.Part(text=system_instruction)]),
+                    ttl=duration_pb2.Duration(seconds=self.ttl),
+                )
+            )
+        except Exception as e:
+            logger.warning(f"Gemini context cache creation failed: {e}")
+            cache.set(key, self.UNAVAILABLE, timeout=self.failure_ttl)
+            return None
+
+        # Expire our reference before Gemini drops the cached content.
+        cache.set(key, cached_content.name, timeout=max(self.ttl - 60, 1))
+        return cached_content.name
+
+
+gemini_context_cache = GeminiContextCache()
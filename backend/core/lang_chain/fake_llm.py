@@ -0,0 +1,73 @@
+"""Offline chat model used in place of Gemini for local runs and tests."""
+
+import json
+import re
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Returns deterministic responses shaped after the prompt it receives:
+    a LessonPlan for lesson plan prompts, a ChapterInfo for topic extraction
+    prompts and a short canned answer for everything else.
+    """
+
+    @property
+    def _llm_type(self):
+        return "fake-chat-model"
+
+    @staticmethod
+    def _find(pattern, text, default):
+        match = re.search(pattern, text)
+        return match.group(1).strip() if match else default
+
+    def lesson_plan_response(self, prompt):
+        chapter_number = self._find(r"Chapter Number:\s*(.+)", prompt, "1")
+        chapter_title = self._find(r"Chapter Title:\s*(.+)", prompt, "Chapter")
+        num_days = int(self._find(r"Total Number of Days:\s*(\d+)", prompt, "1"))
+        return json.dumps({
+            "chapter_number": chapter_number,
+            "chapter_title": chapter_title,
+            "total_days": num_days,
+            "lesson_plan": [
+                {
+                    "day": day,
+                    "topics": [{
+                        "title": f"{chapter_title} - part {day}",
+                        "summary": f"Day {day} of {chapter_title}.",
+                        "time_minutes": 40
+                    }],
+                    "learning_outcomes": f"Understand part {day} of {chapter_title}.",
+                    "real_world_applications": "Everyday examples.",
+                    "taxonomy_alignment": "Understanding"
+                }
+                for day in range(1, num_days + 1)
+            ]
+        })
+
+    def chapter_info_response(self):
+        return json.dumps({
+            "result": [{
+                "chapter_number": "1",
+                "chapter_name": "Chapter 1",
+                "sub_topics": ["Introduction"],
+                "pre_requisites": [{"topic": "Basics", "explanation": "Prior knowledge."}]
+            }]
+        })
+
+    def respond(self, prompt):
+        if "Total Number of Days:" in prompt:
+            return self.lesson_plan_response(prompt)
+        if "pre_requisites" in prompt:
+            return self.chapter_info_response()
+        return "This is a response from the fake chat model."
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = "\n".join(
+            message.content for message in messages if isinstance(message.content, str)
+        )
+        message = AIMessage(content=self.respond(prompt))
+        return ChatResult(generations=[ChatGeneration(message=message)])
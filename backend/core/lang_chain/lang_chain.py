@@ -13,12 +13,14 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
 from langchain.output_parsers import PydanticOutputParser
-from langchain.memory import ConversationSummaryBufferMemory
 
 from core.common_modules.common_functions import CommonFunctions
 from syllabus.models import ChatSession, ChatMessage
 
 from .states import ChapterInfo,LessonPlan
+from .fake_llm import FakeChatModel
+from .lesson_plan_cache import lesson_plan_cache
+from .context_cache import gemini_context_cache
 from .queries import LangchainQueries
 
 logger = logging.getLogger(__name__)
@@ -26,11 +28,17 @@ logger = logging.getLogger(__name__)
 class LangChainService:
     """Service for Langchain operations."""
     def __init__(self,temperature=0):
-        self.llm = ChatGoogleGenerativeAI(
-            model=settings.AI_MODELS.get('GEMINI_MODEL', 'gemini-2.5-flash'),
-            temperature=temperature,
-            api_key=settings.API_KEYS.get('GEMINI_API_KEY'),
-        )
+        self.temperature = temperature
+        if settings.AI_MODELS.get('LLM_BACKEND') == 'fake':
+            self.model_name = 'fake'
+            self.llm = FakeChatModel()
+        else:
+            self.model_name = settings.AI_MODELS.get('GEMINI_MODEL', 'gemini-2.5-flash')
+            self.llm = ChatGoogleGenerativeAI(
+                model=self.model_name,
+                temperature=temperature,
+                api_key=settings.API_KEYS.get('GEMINI_API_KEY'),
+            )
 
     def invoke_llm(self, pdf_text,prompt):
 
@@ -39,7 +47,8 @@ class LangChainService:
 
         return response
 
-    def get_topics_and_prerequisites(self,pdf_file,upload_type_prompt):
+    def get_topics_and_prerequisites(self,pdf_text,upload_type_prompt):
+        """Extract the chapters, sub topics and prerequisites from the text of an ebook."""
         chapter_parser = PydanticOutputParser(pydantic_object=ChapterInfo)
         prompt = PromptTemplate(
             template=LangchainQueries.EXTRACT_TOPICS_PREREQUISITES.value,
@@ -48,16 +57,17 @@ class LangChainService:
                                "additional_instructions": upload_type_prompt}
         )
 
-        pdf_text = CommonFunctions.extract_text_from_pdf(pdf_file=pdf_file)
         if not pdf_text or len(pdf_text) < 2000:
             raise ValueError("Uploaded pdf file is not valid or does not contain enough text.")
         response = self.invoke_llm(pdf_text=pdf_text, prompt=prompt)
         parsed = chapter_parser.parse(response)
 
-        return parsed.model_dump()['result'], pdf_text
+        return parsed.model_dump()['result']
 
     def generate_lesson_plan(self, chapter_number, chapter_title, num_days, time_period,
-                             teacher_instructions, pdf_file_content,subject,subject_instructions):
+                             teacher_instructions, pdf_file_content,subject,subject_instructions,
+                             force_refresh=False):
+        """Generate a lesson plan, reusing a cached one for identical inputs unless force_refresh is set."""
         lesson_plan_parser = PydanticOutputParser(pydantic_object=LessonPlan)
         prompt = PromptTemplate(
             template=LangchainQueries.GENERATE_LESSON_PLAN.value,
@@ -71,6 +81,24 @@ class LangChainService:
         else:
             pdf_text = CommonFunctions.extract_text_from_pdf(pdf_file=pdf_file_content)
 
+        cache_key = lesson_plan_cache.make_key(
+            LangchainQueries.GENERATE_LESSON_PLAN.value,
+            f"{self.model_name}:{self.temperature}",
+            pdf_text,
+            chapter_number=chapter_number,
+            chapter_title=chapter_title,
+            num_days=num_days,
+            time_period=time_period,
+            teacher_instructions=teacher_instructions,
+            subject=subject,
+            subject_instructions=subject_instructions
+        )
+        if not force_refresh:
+            cached = lesson_plan_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Lesson plan cache hit for chapter {chapter_number}")
+                return cached
+
         chain = LLMChain(llm=self.llm, prompt=prompt)
 
         response = chain.run({
@@ -86,40 +114,56 @@ class LangChainService:
         })
         parsed = lesson_plan_parser.parse(response)
 
-        return parsed.model_dump()
-
-    @sync_to_async
-    def get_chain_with_memory(self, school_db_name, session: ChatSession):
-        """Load memory from DB messages + summary, return LLMChain + memory."""
-
-        memory = ConversationSummaryBufferMemory(
-            llm=self.llm,
-            max_token_limit=1000,
-            memory_key="chat_history",
-            input_key="question",
-            return_messages=True
-        )
-
-        chat_messages = ChatMessage.objects.using(school_db_name).filter(
-            session=session
-        ).order_by('-created_at')[:10]
-        chat_messages = reversed(chat_messages)
+        lesson_plan = parsed.model_dump()
+        lesson_plan_cache.set(cache_key, lesson_plan)
+        return lesson_plan
 
-        for msg in chat_messages:
-            if msg.role == "user":
-                memory.chat_memory.add_user_message(msg.content)
-            else:
-                memory.chat_memory.add_ai_message(msg.content)
+    @staticmethod
+    def render_assistant_instruction(lesson_plan):
+        """Render the assistant system instruction for a lesson plan day."""
+        return LangchainQueries.ASSISTANT_CHAT.value.format(lesson_plan=lesson_plan)
 
-        chat_history_messages = memory.load_memory_variables({})["chat_history"]
+    @sync_to_async
+    def get_chain_with_memory(self, school_db_name, session: ChatSession, system_instruction):
+        """Return a chain that prompts with the session's stored summary and the
+        messages that are not summarized yet.
+
+        On Gemini the system instruction is served from a provider side context
+        cache when it is long enough to be cached.
+        """
+        cached_content = None
+        if isinstance(self.llm, ChatGoogleGenerativeAI):
+            cached_content = gemini_context_cache.get_cached_content(self.model_name, system_instruction)
+        llm = self.llm.bind(cached_content=cached_content) if cached_content else self.llm
+
+        summary, summarized_message_id = ChatSession.objects.using(school_db_name).filter(
+            pk=session.pk
+        ).values_list('summary', 'summarized_message_id').get()
+
+        chat_messages = ChatMessage.objects.using(school_db_name).filter(session=session)
+        if summarized_message_id:
+            chat_messages = chat_messages.filter(id__gt=summarized_message_id)
+        max_messages = settings.ASSISTANT_CHAT_CONFIG['RECENT_MESSAGES'] + settings.ASSISTANT_CHAT_CONFIG['SUMMARY_BATCH']
+        chat_messages = reversed(chat_messages.order_by('-id')[:max_messages])
+
+        chat_history_messages = [
+            HumanMessage(content=msg.content) if msg.role == "user" else AIMessage(content=msg.content)
+            for msg in chat_messages
+        ]
 
         def format_messages_for_gemini(inputs):
             formatted_messages = []
 
-            system_instruction = LangchainQueries.ASSISTANT_CHAT.value.format(
-                lesson_plan=inputs['lesson_plan']
-            )
-            formatted_messages.append(SystemMessage(content=system_instruction))
+            summary_text = f"Summary of the earlier conversation:\n{summary}"
+            if cached_content:
+                # The cached content carries the system instruction, and Gemini
+                # rejects a second one, so the summary goes in as a user turn.
+                if summary:
+                    formatted_messages.append(HumanMessage(content=summary_text))
+            else:
+                formatted_messages.append(SystemMessage(content=system_instruction))
+                if summary:
+                    formatted_messages.append(SystemMessage(content=summary_text))
 
             formatted_messages.extend(chat_history_messages)
 
@@ -130,20 +174,61 @@ class LangChainService:
         
         chain = (
             RunnableLambda(format_messages_for_gemini)
-            | self.llm
+            | llm
             | StrOutputParser()
         )
 
         return chain
 
+    async def update_conversation_summary(self, school_db_name, session: ChatSession):
+        """Fold the oldest unsummarized messages into the session's summary.
+
+        Runs once SUMMARY_BATCH messages beyond the RECENT_MESSAGES window have
+        accumulated, so the prompt of every turn stays bounded and the summary
+        call is amortized over several turns.
+        """
+        recent_messages = settings.ASSISTANT_CHAT_CONFIG['RECENT_MESSAGES']
+        summary_batch = settings.ASSISTANT_CHAT_CONFIG['SUMMARY_BATCH']
+
+        @sync_to_async
+        def load_backlog():
+            summary, summarized_message_id = ChatSession.objects.using(school_db_name).filter(
+                pk=session.pk
+            ).values_list('summary', 'summarized_message_id').get()
+            messages = ChatMessage.objects.using(school_db_name).filter(session=session)
+            if summarized_message_id:
+                messages = messages.filter(id__gt=summarized_message_id)
+            return summary, summarized_message_id, list(messages.order_by('id').values('id', 'role', 'content'))
+
+        summary, summarized_message_id, backlog = await load_backlog()
+        if len(backlog) < recent_messages + summary_batch:
+            return
+
+        to_summarize = backlog[:len(backlog) - recent_messages]
+        prompt = LangchainQueries.CHAT_SUMMARY.value.format(
+            summary=summary or "None",
+            messages="\n".join(f"{msg['role']}: {msg['content']}" for msg in to_summarize)
+        )
+        new_summary = await (self.llm | StrOutputParser()).ainvoke(prompt)
+
+        # Only written if no concurrent summary job moved the session on meanwhile
+        updated = await sync_to_async(
+            ChatSession.objects.using(school_db_name).filter(
+                pk=session.pk, summarized_message_id=summarized_message_id
+            ).update
+        )(summary=new_summary.strip(), summarized_message_id=to_summarize[-1]['id'])
+        if not updated:
+            logger.info(f"Chat session {session.pk} was summarized concurrently, discarding this summary")
+            return
+        logger.info(f"Summarized {len(to_summarize)} messages of chat session {session.pk}")
 
     async def process_user_question(self, session,
-                              school_db_name, lesson_plan: str, user_question: str):
-        """Handle user input, run LLM, store messages + updated summary."""
+                              school_db_name, system_instruction: str, user_question: str):
+        """Handle user input and stream the LLM's answer."""
 
-        chain = await self.get_chain_with_memory(school_db_name, session)
+        chain = await self.get_chain_with_memory(school_db_name, session, system_instruction)
 
-        async for chunk in chain.astream({"lesson_plan": lesson_plan, "question": user_question}):
+        async for chunk in chain.astream({"question": user_question}):
             yield {"type": "token", "data": chunk}
 
         yield {"type": "final"}
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""Content addressed cache of generated lesson plans."""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class DiskLessonPlanStore:
+    """
+    Stores one JSON file per lesson plan. Reads refresh the file's mtime and
+    writes evict the least recently used files once the directory grows
+    past max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                value = json.load(file)
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, value):
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(value, file)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(".json"):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+class RedisLessonPlanStore:
+    """
+    Stores lesson plans in Redis. A sorted set keeps the last access time of
+    every entry and a hash its size, so writes can evict the least recently
+    used entries once the total size goes past max_bytes.
+    """
+
+    KEY_PREFIX = "lesson_plan_cache"
+
+    def __init__(self, url, max_bytes):
+        self.client = redis.Redis.from_url(url)
+        self.max_bytes = max_bytes
+        self.lru_key = f"{self.KEY_PREFIX}:lru"
+        self.sizes_key = f"{self.KEY_PREFIX}:sizes"
+        self.total_key = f"{self.KEY_PREFIX}:total"
+
+    def _entry_key(self, key):
+        return f"{self.KEY_PREFIX}:entry:{key}"
+
+    def get(self, key):
+        value = self.client.get(self._entry_key(key))
+        if value is None:
+            return None
+        self.client.zadd(self.lru_key, {key: time.time()})
+        return json.loads(value)
+
+    def set(self, key, value):
+        data = json.dumps(value)
+        size = len(data.encode("utf-8"))
+        previous = self.client.hget(self.sizes_key, key)
+        pipe = self.client.pipeline()
+        pipe.set(self._entry_key(key), data)
+        pipe.zadd(self.lru_key, {key: time.time()})
+        pipe.hset(self.sizes_key, key, size)
+        pipe.incrby(self.total_key, size - int(previous or 0))
+        pipe.execute()
+        self._evict()
+
+    def _evict(self):
+        while int(self.client.get(self.total_key) or 0) > self.max_bytes:
+            oldest = self.client.zpopmin(self.lru_key)
+            if not oldest:
+                break
+            key = oldest[0][0].decode()
+            size = int(self.client.hget(self.sizes_key, key) or 0)
+            pipe = self.client.pipeline()
+            pipe.delete(self._entry_key(key))
+            pipe.hdel(self.sizes_key, key)
+            pipe.decrby(self.total_key, size)
+            pipe.execute()
+
+
+class LessonPlanCache:
+    """
+    Caches parsed LessonPlan outputs keyed by a hash of the prompt template,
+    the chapter text and the normalized generation parameters, so identical
+    requests from any section or school reuse one LLM call.
+
+    Bump PROMPT_VERSION when the prompt or the LessonPlan schema changes in
+    a way that should not reuse older outputs.
+    """
+
+    def __init__(self):
+        config = settings.LESSON_PLAN_CACHE_CONFIG
+        self.enabled = config['ENABLED']
+        self.prompt_version = config['PROMPT_VERSION']
+        self.backend = config['BACKEND']
+        # Relative directories are resolved against BASE_DIR, not the working directory
+        self.directory = os.path.join(settings.BASE_DIR, config['DIRECTORY'])
+        self.redis_url = config['REDIS_URL']
+        self.max_bytes = config['MAX_SIZE_MB'] * 1024 * 1024
+        self._store = None
+        self._lock = threading.Lock()
+
+    def _get_store(self):
+        with self._lock:
+            if self._store is None:
+                if self.backend == 'redis':
+                    self._store = RedisLessonPlanStore(self.redis_url, self.max_bytes)
+                else:
+                    self._store = DiskLessonPlanStore(self.directory, self.max_bytes)
+            return self._store
+
+    @staticmethod
+    def _hash(value):
+        return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _normalize_text(value):
+        return re.sub(r"\s+", " ", str(value or "")).strip()
+
+    def make_key(self, prompt_template, model, chapter_text, **params):
+        """Return the cache key of a lesson plan request."""
+        key_data = {
+            "version": self.prompt_version,
+            "prompt": self._hash(prompt_template),
+            "model": model,
+            "text": self._hash(chapter_text),
+            "params": {
+                name: self._normalize_text(value)
+                for name, value in sorted(params.items())
+            },
+        }
+        return self._hash(json.dumps(key_data, sort_keys=True))
+
+    def get(self, key):
+        """Return the cached lesson plan or None."""
+        if not self.enabled:
+            return None
+        try:
+            return self._get_store().get(key)
+        except Exception as e:
+            logger.warning(f"Lesson plan cache lookup failed: {e}")
+            return None
+
+    def set(self, key, lesson_plan):
+        """Store a generated lesson plan."""
+        if not self.enabled:
+            return
+        try:
+            self._get_store().set(key, lesson_plan)
+        except Exception as e:
+            logger.warning(f"Lesson plan cache update failed: {e}")
+
+
+lesson_plan_cache = LessonPlanCache()
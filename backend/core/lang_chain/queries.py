@@ -217,4 +217,23 @@ class LangchainQueries(Enum):
         {lesson_plan}
 
         ## Final Answer (concise, directly related, in Markdown):
-        """
\ No newline at end of file
+        """
+
+    CHAT_SUMMARY = """
+        You maintain a running summary of a conversation between a teacher or student and a lesson assistant.
+        Update the existing summary with the new messages.
+
+        ## Instructions:
+        1. Keep every question asked and the key points of every answer, including examples the user relied on.
+        2. Drop greetings, repetition and formatting.
+        3. Write plain text, at most 200 words.
+        4. Return only the updated summary.
+
+        ## Existing summary:
+        {summary}
+
+        ## New messages:
+        {messages}
+
+        ## Updated summary:
+        """
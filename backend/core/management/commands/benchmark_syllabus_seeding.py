@@ -0,0 +1,91 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext
+
+from school.models import (
+    Chapter, Prerequisite, SchoolBoard, SchoolBoardMapping, SchoolDbMetadata,
+    SchoolDefaultClasses, SchoolDefaultSubjects, SchoolSyllabusEbooks, SubTopic
+)
+from classes.models import SchoolClass
+from core.common_modules.common_functions import CommonFunctions
+from core.common_modules.tenant_registry import tenant_registry
+from syllabus.services.ebook_service import EbookService
+
+
+class Command(BaseCommand):
+    help = ('Time the syllabus seeding of a new school against the size of the syllabus. '
+            'Synthetic ebooks are created and every write is rolled back')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--db', required=True, help='School database to seed')
+        parser.add_argument('--chapters', default='10,100,500,1000',
+                            help='Comma separated syllabus sizes in chapters')
+        parser.add_argument('--chapters-per-ebook', type=int, default=15)
+        parser.add_argument('--sub-topics', type=int, default=8, help='Sub topics per chapter')
+        parser.add_argument('--prerequisites', type=int, default=4, help='Prerequisites per chapter')
+
+    def handle(self, *args, **options):
+        db_name = tenant_registry.ensure_registered(options['db'])
+        academic_year = CommonFunctions().get_latest_academic_year(db_name)
+        if not academic_year:
+            raise CommandError(f"No academic year found in {db_name}.")
+        default_class = SchoolDefaultClasses.objects.order_by('id').first()
+        subject = SchoolDefaultSubjects.objects.order_by('id').first()
+        if not default_class or not subject:
+            raise CommandError("Default classes and subjects must be loaded.")
+
+        sizes = [int(size) for size in options['chapters'].split(',')]
+        self.stdout.write(f"{'chapters':>9} {'rows':>8} {'queries':>8} {'seconds':>9}")
+        for size in sizes:
+            rows, queries, elapsed = self.run_size(db_name, academic_year, default_class, subject, size, options)
+            self.stdout.write(f"{size:>9} {rows:>8} {queries:>8} {elapsed:>9.3f}")
+
+    def run_size(self, db_name, academic_year, default_class, subject, size, options):
+        with transaction.atomic(), transaction.atomic(using=db_name):
+            board = self.create_syllabus(default_class, subject, size, options)
+            if not SchoolClass.objects.using(db_name).filter(class_number=default_class.id).exists():
+                SchoolClass.objects.using(db_name).create(class_number=default_class.id)
+
+            with CaptureQueriesContext(connections['default']) as default_queries, \
+                    CaptureQueriesContext(connections[db_name]) as school_queries:
+                start = time.perf_counter()
+                copied = EbookService().copy_syllabus_data_to_school_db(
+                    SchoolDbMetadata(db_name=db_name), academic_year.id,
+                    boards=[SchoolBoardMapping(board=board)]
+                )
+                elapsed = time.perf_counter() - start
+            if not copied:
+                raise CommandError(f"Seeding {size} chapters failed, see the logs.")
+
+            transaction.set_rollback(True)
+            transaction.set_rollback(True, using=db_name)
+
+        rows = size * (1 + options['sub_topics'] + options['prerequisites'])
+        return rows, len(default_queries) + len(school_queries), elapsed
+
+    def create_syllabus(self, default_class, subject, size, options):
+        board = SchoolBoard.objects.create(board_name=f"benchmark-{uuid.uuid4().hex}")
+        chapters = []
+        for start in range(0, size, options['chapters_per_ebook']):
+            ebook = SchoolSyllabusEbooks.objects.create(
+                board=board, subject=subject, class_number=default_class, ebook_type='single',
+                ebook_name=f"benchmark-{start}", file_path=f"benchmark/{start}"
+            )
+            # Every ebook shares the class and subject, so chapter numbers continue across ebooks.
+            chapters.extend(
+                Chapter(ebook=ebook, chapter_number=number, chapter_name=f"Chapter {number}")
+                for number in range(start + 1, min(start + options['chapters_per_ebook'], size) + 1)
+            )
+        chapters = Chapter.objects.bulk_create(chapters)
+        SubTopic.objects.bulk_create([
+            SubTopic(chapter=chapter, name=f"Sub topic {index}")
+            for chapter in chapters for index in range(options['sub_topics'])
+        ])
+        Prerequisite.objects.bulk_create([
+            Prerequisite(chapter=chapter, topic=f"Prerequisite {index}", explanation="Benchmark")
+            for chapter in chapters for index in range(options['prerequisites'])
+        ])
+        return board
@@ -1,48 +1,180 @@
+import json
 import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.core.management import call_command
 from django.conf import settings
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.migrations.loader import MigrationLoader
 from django.test.utils import override_settings
 
 from school.models import SchoolDbMetadata
-from core.common_modules.db_loader import DbLoader
+from core.common_modules.tenant_registry import tenant_registry
 
 logger = logging.getLogger(__name__)
 
+SCHOOL_APPS = ['academics', 'classes', 'teacher', 'student', 'syllabus']
+
 
 class Command(BaseCommand):
-    help = 'Apply migrations to all dynamically registered school databases'
+    help = ('Apply migrations to all dynamically registered school databases. Schools are migrated '
+            'in parallel, each in its own process with a timeout, and the outcome of every school is '
+            'written to a JSON report that --resume picks up after a partial failure')
+
+    SUCCEEDED = 'succeeded'
+    SKIPPED = 'skipped'
+    FAILED = 'failed'
+    TIMEOUT = 'timeout'
+    DONE = (SUCCEEDED, SKIPPED)
+
+    def add_arguments(self, parser):
+        config = settings.SCHOOL_MIGRATION_CONFIG
+        parser.add_argument('--db', action='append', help='Only migrate this school database (repeatable)')
+        parser.add_argument('--workers', type=int, default=config['WORKERS'])
+        parser.add_argument('--timeout', type=int, default=config['TIMEOUT'], help='Seconds allowed per school')
+        # Relative report paths are resolved against BASE_DIR, not the working directory
+        parser.add_argument('--report', default=os.path.join(settings.BASE_DIR, config['REPORT_PATH']),
+                            help='Path of the JSON report')
+        parser.add_argument('--resume', action='store_true',
+                            help='Skip the schools the existing report marks as done')
+        parser.add_argument('--single', action='store_true',
+                            help='Migrate the --db school in this process (used by the parallel runner)')
+
+    def handle(self, *args, **options):
+        if options['single']:
+            if not options['db'] or len(options['db']) != 1:
+                raise CommandError("--single needs exactly one --db.")
+            self.migrate_school(options['db'][0])
+            return
 
-    def handle(self, *args, **kwargs):
         logger.info("Starting migration for all school databases...")
+        db_names = options['db'] or list(SchoolDbMetadata.objects.values_list('db_name', flat=True))
+        targets = self.migration_targets()
+        report = self.load_report(options['report']) if options['resume'] else {}
+        previous = report.get('schools', {})
+        if previous and report.get('targets') != targets:
+            # Schools done under older migrations still need the new ones
+            self.stdout.write("The report was written for other migrations, resuming from scratch")
+            previous = {}
+        pending = [db_name for db_name in db_names if previous.get(db_name, {}).get('status') not in self.DONE]
+
+        report = {
+            'started_at': self.now(),
+            'finished_at': None,
+            'workers': options['workers'],
+            'timeout': options['timeout'],
+            'targets': targets,
+            'schools': {db_name: previous[db_name] for db_name in db_names if db_name not in pending},
+        }
+        for db_name in pending:
+            report['schools'][db_name] = {'status': 'pending'}
+        self.write_report(options['report'], report)
+        self.stdout.write(f"Migrating {len(pending)} of {len(db_names)} school databases "
+                          f"with {options['workers']} workers")
+
+        report_lock = threading.Lock()
+        with ThreadPoolExecutor(max_workers=max(1, options['workers']),
+                                thread_name_prefix="school-migrate") as executor:
+            futures = {executor.submit(self.run_school, db_name, options['timeout']): db_name
+                       for db_name in pending}
+            for position, future in enumerate(as_completed(futures), start=1):
+                db_name = futures[future]
+                result = future.result()
+                with report_lock:
+                    report['schools'][db_name] = result
+                    self.write_report(options['report'], report)
+                self.stdout.write(f"[{position}/{len(pending)}] {db_name}: {result['status']} "
+                                  f"in {result['duration']:.1f}s")
+
+        report['finished_at'] = self.now()
+        self.write_report(options['report'], report)
+        failed = [db_name for db_name, result in report['schools'].items() if result['status'] not in self.DONE]
+        if failed:
+            raise CommandError(f"Migrations failed for {len(failed)} school databases: {', '.join(failed)}. "
+                               f"Fix them and rerun with --resume.")
+        self.stdout.write(f"All school databases are migrated, report written to {options['report']}")
+
+    @staticmethod
+    def now():
+        return datetime.now(timezone.utc).isoformat()
+
+    @staticmethod
+    def load_report(path):
+        try:
+            with open(path) as report_file:
+                return json.load(report_file)
+        except FileNotFoundError:
+            return {}
+
+    @staticmethod
+    def write_report(path, report):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def migration_targets():
+        """Return the latest migration of every school app, as recorded in the report."""
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        return sorted(f"{app}.{name}" for app, name in loader.graph.leaf_nodes() if app in SCHOOL_APPS)
 
+    @staticmethod
+    def is_up_to_date(db_name):
+        """Return True when every school app migration is already recorded on the database."""
+        tenant_registry.ensure_registered(db_name)
         try:
-            all_metadata = SchoolDbMetadata.objects.all()
-            db_loader = DbLoader()
-            for school_db in all_metadata:
-                db_key = school_db.db_name
-
-                if db_key not in settings.DATABASES:
-                    db_loader.load_dynamic_databases(
-                        db_key = db_key,
-                        engine = settings.DB_CONFIG['ENGINE'],
-                        name = school_db.db_name,
-                        user = settings.DB_CONFIG['USER'],
-                        password = settings.DB_CONFIG['PASSWORD'],
-                        host = settings.DB_CONFIG['HOST'],
-                        port = settings.DB_CONFIG['PORT']
-                    )
-
-                logger.info(f"Applying migrations for {db_key}...")
-                try:
-                    apps = ['academics','classes','teacher','student','syllabus']
-                    with override_settings(CURRENT_MIGRATION_DB=db_key):
-                        for app in apps:
-                            call_command("migrate",app, database=db_key,verbosity=1)
-                            logger.info(f"Migration successful for {db_key}")
-                except Exception as migrate_error:
-                    logger.exception(f"Migration failed for {db_key}: {migrate_error}")
+            executor = MigrationExecutor(connections[db_name])
+            targets = [key for key in executor.loader.graph.leaf_nodes() if key[0] in SCHOOL_APPS]
+            return not executor.migration_plan(targets)
+        finally:
+            connections[db_name].close()
 
+    def run_school(self, db_name, timeout):
+        """Migrate one school in a child process unless it is up to date."""
+        start = time.monotonic()
+        try:
+            if self.is_up_to_date(db_name):
+                return {'status': self.SKIPPED, 'duration': time.monotonic() - start, 'finished_at': self.now()}
         except Exception as e:
-            logger.exception(f"Error while loading school databases: {e}")
+            return {'status': self.FAILED, 'duration': time.monotonic() - start, 'finished_at': self.now(),
+                    'error': f"Could not read the migration state: {e}"}
+
+        command = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'),
+                   'custome_school_dbs_migrate', '--single', '--db', db_name]
+        try:
+            completed = subprocess.run(command, capture_output=True, text=True, timeout=timeout,
+                                       cwd=settings.BASE_DIR)
+        except subprocess.TimeoutExpired:
+            logger.error(f"Migration timed out for {db_name} after {timeout}s")
+            return {'status': self.TIMEOUT, 'duration': time.monotonic() - start, 'finished_at': self.now(),
+                    'error': f"Timed out after {timeout}s"}
+
+        result = {'duration': time.monotonic() - start, 'finished_at': self.now()}
+        if completed.returncode == 0:
+            result['status'] = self.SUCCEEDED
+        else:
+            logger.error(f"Migration failed for {db_name}")
+            result['status'] = self.FAILED
+            result['error'] = (completed.stderr or completed.stdout)[-2000:]
+        return result
+
+    def migrate_school(self, db_key):
+        tenant_registry.ensure_registered(db_key)
+        logger.info(f"Applying migrations for {db_key}...")
+        try:
+            with override_settings(CURRENT_MIGRATION_DB=db_key):
+                for app in SCHOOL_APPS:
+                    call_command("migrate", app, database=db_key, verbosity=1)
+            logger.info(f"Migration successful for {db_key}")
+        except Exception as migrate_error:
+            logger.exception(f"Migration failed for {db_key}: {migrate_error}")
+            raise CommandError(f"Migration failed for {db_key}: {migrate_error}")
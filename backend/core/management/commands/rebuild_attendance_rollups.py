@@ -0,0 +1,27 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.common_modules.tenant_registry import tenant_registry
+from student.services.attendance_rollup import attendance_rollup
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily and monthly attendance rollups of every school database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--db', help='Only rebuild this school database')
+
+    def handle(self, *args, **options):
+        db_names = [options['db']] if options['db'] else tenant_registry.register_all_tenants()
+        for db_name in db_names:
+            tenant_registry.ensure_registered(db_name)
+            try:
+                with transaction.atomic(using=db_name):
+                    attendance_rollup.rebuild(db_name)
+                self.stdout.write(f"{db_name}: attendance rollups rebuilt")
+            except Exception as e:
+                logger.exception(f"Rebuilding attendance rollups failed for {db_name}: {e}")
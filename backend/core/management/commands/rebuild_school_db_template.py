@@ -0,0 +1,22 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from school.services.school_db_template import school_db_template
+from school.services.school_service import SchoolService
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the school database template if the school migrations changed'
+
+    def handle(self, *args, **options):
+        if not school_db_template.is_available():
+            raise CommandError("The school database template needs a Postgres database and is disabled otherwise.")
+
+        school_service = SchoolService()
+        if not school_db_template.ensure_template(school_service.apply_db_migrations,
+                                                  school_service.get_school_app_labels()):
+            raise CommandError("Failed to rebuild the school database template, see the logs.")
+        self.stdout.write(f"School database template {school_db_template.template_name} is up to date")
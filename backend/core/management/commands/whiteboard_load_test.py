@@ -0,0 +1,105 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+
+import websockets
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Load test the whiteboard fan-out: one teacher draws while a classroom of viewers '
+            'listens on the same session of a running server backed by a local Redis')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='ws://127.0.0.1:8000', help='Base websocket url of the server')
+        parser.add_argument('--session-id', required=True, help='Whiteboard session to draw on')
+        parser.add_argument('--token', required=True, help='JWT access token used by every connection')
+        parser.add_argument('--school-id', required=True)
+        parser.add_argument('--viewers', type=int, default=60)
+        parser.add_argument('--duration', type=float, default=30, help='Seconds of drawing')
+        parser.add_argument('--rate', type=float, default=30, help='Draw messages sent per second')
+        parser.add_argument('--points', type=int, default=20, help='Points per draw message')
+        parser.add_argument('--settle', type=float, default=5, help='Seconds to wait for late frames')
+
+    def handle(self, *args, **options):
+        asyncio.run(self.run(options))
+
+    def _ws_url(self, options):
+        return (f"{options['url'].rstrip('/')}/ws/whiteboard/{options['session_id']}/"
+                f"?token={options['token']}&school_id={options['school_id']}")
+
+    async def run(self, options):
+        url = self._ws_url(options)
+        stop = asyncio.Event()
+        viewer_stats = [{"frames": 0, "messages": 0, "resyncs": 0, "latencies": []}
+                        for _ in range(options['viewers'])]
+
+        viewers = await asyncio.gather(*[websockets.connect(url, max_size=None) for _ in viewer_stats])
+        viewer_tasks = [
+            asyncio.create_task(self.listen(connection, stats, stop))
+            for connection, stats in zip(viewers, viewer_stats)
+        ]
+        self.stdout.write(f"{len(viewers)} viewers connected")
+
+        async with websockets.connect(url, max_size=None) as teacher:
+            sent = await self.draw(teacher, options)
+            self.stdout.write(f"Sent {sent} draw messages, waiting {options['settle']}s for late frames")
+            await asyncio.sleep(options['settle'])
+
+        stop.set()
+        for connection in viewers:
+            await connection.close()
+        await asyncio.gather(*viewer_tasks, return_exceptions=True)
+        self.report(sent, viewer_stats)
+
+    async def draw(self, connection, options):
+        interval = 1 / options['rate']
+        deadline = time.monotonic() + options['duration']
+        sent = 0
+        while time.monotonic() < deadline:
+            now = time.time() * 1000
+            await connection.send(json.dumps({
+                "type": "draw",
+                "data": [
+                    {"x": random.random() * 1000, "y": random.random() * 600, "color": "#000000",
+                     "size": 3, "slide": 0, "timestamp": now, "isStart": index == 0}
+                    for index in range(options['points'])
+                ],
+            }))
+            sent += 1
+            await asyncio.sleep(interval)
+        return sent
+
+    async def listen(self, connection, stats, stop):
+        try:
+            async for frame in connection:
+                received_at = time.time() * 1000
+                payload = json.loads(frame)
+                if payload.get("type") == "whiteboard_state":
+                    stats["resyncs"] += 1
+                if payload.get("type") != "whiteboard_strokes":
+                    continue
+                stats["frames"] += 1
+                for message in payload["data"]:
+                    stats["messages"] += 1
+                    points = message.get("data") or []
+                    if points:
+                        stats["latencies"].append(received_at - points[0]["timestamp"])
+        except websockets.ConnectionClosed:
+            if not stop.is_set():
+                self.stderr.write("A viewer was disconnected before the end of the test")
+
+    def report(self, sent, viewer_stats):
+        latencies = sorted(latency for stats in viewer_stats for latency in stats["latencies"])
+        received = [stats["messages"] for stats in viewer_stats]
+        self.stdout.write(f"Viewers: {len(viewer_stats)}")
+        self.stdout.write(f"Messages per viewer: min {min(received)}, max {max(received)} of {sent} sent")
+        self.stdout.write(f"Mean frames per viewer: {statistics.mean(stats['frames'] for stats in viewer_stats):.1f}")
+        self.stdout.write(f"Resyncs: {sum(stats['resyncs'] for stats in viewer_stats)}")
+        if latencies:
+            def percentile(fraction):
+                return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+            self.stdout.write(f"Latency ms: p50 {percentile(0.5):.1f}, p95 {percentile(0.95):.1f}, "
+                              f"p99 {percentile(0.99):.1f}, max {latencies[-1]:.1f}")
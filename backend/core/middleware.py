@@ -1,6 +1,7 @@
 # core/middleware.py
 import threading
 import logging
+import time
 
 from django.urls import resolve, Resolver404
 from django.shortcuts import redirect
@@ -14,10 +15,9 @@ from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFail
 
 from school.models import School
 
-from core.common_modules.db_loader import DbLoader
-
-# Flag to ensure dynamic DBs are loaded once
-_db_initialized = threading.Event()
+from core.common_modules.tenant_registry import tenant_registry
+from core.common_modules.tenant_replicas import tenant_replicas
+from core.common_modules import query_metrics as query_metrics_module
 
 # Thread-local storage for request-scoped DB name
 _db_context = threading.local()
@@ -30,30 +30,92 @@ def set_current_db(db_name):
 def get_current_db():
     return getattr(_db_context, 'db', None)
 
-class LoadDynamicDatabasesMiddleware:
+class TenantRegistryMiddleware:
+    """
+    Middleware to evict idle school databases from the tenant registry.
+    School databases are registered lazily when a school is resolved, so
+    nothing is loaded up front. Should be placed high in the middleware order.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            tenant_registry.evict_idle_tenants()
+        except Exception as e:
+            logger.error(f"[DB REGISTRY ERROR] Failed to evict idle tenant DBs: {e}")
+
+        return self.get_response(request)
+
+class QueryMetricsMiddleware:
     """
-    Middleware to load all dynamic databases once at server startup.
-    Should be placed high in the middleware order.
+    Middleware to record query count, SQL time per database and wall time
+    of every request, keyed by tenant database and endpoint.
+    Should be placed right before AuthenticationMiddleware.
     """
     def __init__(self, get_response):
         self.get_response = get_response
+        self.enabled = settings.QUERY_METRICS_CONFIG['ENABLED']
+
+    def get_endpoint(self, request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return "unmatched"
+        action = match.kwargs.get('action')
+        if action:
+            return match.route.replace('<str:action>', action)
+        return match.route or match.view_name
+
+    def get_tenant(self, stats):
+        tenants = {tenant_replicas.primary_alias(alias) for alias in stats.queries if alias != 'default'}
+        if not tenants:
+            return "none"
+        if len(tenants) > 1:
+            return "multiple"
+        return tenants.pop()
 
     def __call__(self, request):
-        if not _db_initialized.is_set():
+        if not self.enabled:
+            return self.get_response(request)
+
+        query_metrics_module.start_request()
+        start = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            wall_seconds = time.perf_counter() - start
+            stats = query_metrics_module.finish_request()
             try:
-                DbLoader().load_databases()
-                _db_initialized.set()
+                query_metrics_module.query_metrics.observe(
+                    self.get_tenant(stats), self.get_endpoint(request), wall_seconds, stats
+                )
             except Exception as e:
-                logger.error(f"[DB INIT ERROR] Failed to load dynamic DBs: {e}")
-                return JsonResponse({"error": "Internal server error during DB setup."}, status=500)
+                logger.error(f"[QUERY METRICS ERROR] Failed to record request metrics: {e}")
 
-        return self.get_response(request)
+class ReplicaPinningMiddleware:
+    """
+    Middleware to track the tenant writes of each request, so reads that
+    would go to a read replica stay on the primary after the user wrote.
+    Should be placed after AuthenticationMiddleware.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user = getattr(request, 'user', None)
+        user_id = getattr(user, 'id', None) if getattr(user, 'is_authenticated', False) else None
+        tenant_replicas.start_request(user_id)
+        try:
+            return self.get_response(request)
+        finally:
+            tenant_replicas.finish_request()
 
 class CloseDBConnectionMiddleware(MiddlewareMixin):
     def process_response(self, request, response):
         # Loop through all configured DBs
         for conn in connections.all():
             conn.close_if_unusable_or_obsolete()
+        tenant_registry.close_evicted_connections()
         return response
 
 
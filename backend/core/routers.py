@@ -1,17 +1,28 @@
 """Routers for handling database routing in Django."""
 
 from core.middleware import get_current_db
+from core.common_modules.tenant_replicas import tenant_replicas
 
 class DatabaseRouter:
     """ A router to control all database operations on models for different databases.
+    Objects read from a tenant read replica keep reading related objects from
+    the replica, and are always written back to the tenant primary.
     """
 
     apps_using_default_db = ('core', 'auth', 'contenttypes', 'admin', 'sessions','school','subscriptions')
+    @staticmethod
+    def instance_db(hints):
+        instance = hints.get('instance')
+        return instance._state.db if instance is not None else None
+
     def db_for_read(self, model, **hints):
         from core.middleware import get_current_db
         db = get_current_db()
         if model._meta.app_label in self.apps_using_default_db:
             return 'default'
+        instance_db = self.instance_db(hints)
+        if instance_db and tenant_replicas.is_replica(instance_db):
+            return instance_db
         return db or 'default'
 
     def db_for_write(self, model, **hints):
@@ -19,6 +30,9 @@ class DatabaseRouter:
         db = get_current_db()
         if model._meta.app_label in self.apps_using_default_db:
             return 'default'
+        instance_db = self.instance_db(hints)
+        if instance_db and tenant_replicas.is_replica(instance_db):
+            return tenant_replicas.primary_alias(instance_db)
         return db or 'default'
 
     def allow_relation(self, obj1, obj2, **hints):
@@ -27,6 +41,10 @@ class DatabaseRouter:
         return db_obj1 == db_obj2
 
     def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive their schema from the primary through replication
+        if tenant_replicas.is_replica(db):
+            return False
+
         # Only allow `core` app on default DB
         if app_label in self.apps_using_default_db:
             return db == 'default'
@@ -3,13 +3,15 @@
 import logging
 from urllib import request
 
+from django.db.models import Sum
+from django.utils import timezone
 from rest_framework.response import Response
 
 from school.models import School
 from core.models import User
 
 from classes.models import SchoolSection,ClassAssignment
-from student.models import StudentClassAssignment
+from student.models import StudentClassAssignment, SectionAttendanceDaily
 from teacher.models import Teacher
 
 from core.common_modules.common_functions import CommonFunctions
@@ -62,11 +64,20 @@ class DashboardService:
                 is_active=True
             ).count()
 
+            today_attendance = SectionAttendanceDaily.objects.using(school_db_name).filter(
+                date=timezone.localdate(),
+                is_holiday=False
+            ).aggregate(present=Sum('present_count'), absent=Sum('absent_count'))
+            present = today_attendance['present'] or 0
+            absent = today_attendance['absent'] or 0
+
             return Response({
                 "data":{
                     "total_classes": total_classes,
                     "total_students": total_students,
-                    "total_teachers": total_teachers
+                    "total_teachers": total_teachers,
+                    "today_attendance_percentage": round(present / (present + absent) * 100, 2)
+                                                   if present + absent else None
                 }
             }, status=200)
         
@@ -0,0 +1,63 @@
+"""Metrics Service Module"""
+
+import logging
+
+from django.http import HttpResponse
+
+from core.common_modules.query_metrics import query_metrics, escape_label
+from core.common_modules.school_db_resolver import school_db_resolver
+from core.common_modules.tenant_connection_pool import tenant_connection_pool
+from core.common_modules.tenant_registry import tenant_registry
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsService:
+    """Service class exposing runtime metrics in the Prometheus text format."""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def get_metrics(self, request):
+        """Render request, resolver, registry and connection pool metrics."""
+        try:
+            lines = [query_metrics.render().rstrip("\n")]
+            lines += self.get_resolver_lines()
+            lines += self.get_pool_lines()
+            return HttpResponse("\n".join(lines) + "\n", content_type=self.CONTENT_TYPE)
+        except Exception as e:
+            logger.error(f"Error rendering metrics: {e}")
+            return HttpResponse("Failed to render metrics.\n", status=500,
+                                content_type=self.CONTENT_TYPE)
+
+    def get_resolver_lines(self):
+        stats = school_db_resolver.stats()
+        return [
+            "# HELP school_db_resolver_lookups_total School DB name lookups by result.",
+            "# TYPE school_db_resolver_lookups_total counter",
+            f'school_db_resolver_lookups_total{{result="local_hit"}} {stats["local_hits"]}',
+            f'school_db_resolver_lookups_total{{result="shared_hit"}} {stats["shared_hits"]}',
+            f'school_db_resolver_lookups_total{{result="miss"}} {stats["misses"]}',
+            "# HELP tenant_registry_registered Tenant databases currently registered.",
+            "# TYPE tenant_registry_registered gauge",
+            f"tenant_registry_registered {len(tenant_registry.registered_tenants())}",
+        ]
+
+    def get_pool_lines(self):
+        stats = tenant_connection_pool.stats()
+        lines = [
+            "# HELP tenant_db_pool_open Open pooled connections.",
+            "# TYPE tenant_db_pool_open gauge",
+            f"tenant_db_pool_open {stats['total_open']}",
+        ]
+        for metric, key, metric_type in (
+            ("tenant_db_pool_in_use", "in_use", "gauge"),
+            ("tenant_db_pool_idle", "idle", "gauge"),
+            ("tenant_db_pool_waiting", "waiting", "gauge"),
+            ("tenant_db_pool_waits_total", "waits", "counter"),
+            ("tenant_db_pool_wait_seconds_total", "wait_seconds", "counter"),
+            ("tenant_db_pool_timeouts_total", "timeouts", "counter"),
+        ):
+            lines.append(f"# TYPE {metric} {metric_type}")
+            for tenant, tenant_stats in sorted(stats["tenants"].items()):
+                lines.append(f'{metric}{{tenant="{escape_label(tenant)}"}} {tenant_stats[key]}')
+        return lines
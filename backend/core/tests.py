@@ -1,3 +1,89 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+
+from core.common_modules.llm_job_queue import LlmJobQueue, llm_job_queue
+from core.lang_chain.lang_chain import LangChainService
+from core.lang_chain.lesson_plan_cache import lesson_plan_cache
+from syllabus.services.syllabus_service import LESSON_PLAN_JOB
+
+FAKE_AI_MODELS = {'GEMINI_MODEL': 'fake', 'LLM_BACKEND': 'fake'}
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def generate_lesson_plan(chapter_title, num_days):
+    return LangChainService().generate_lesson_plan(
+        chapter_number=1, chapter_title=chapter_title, num_days=num_days, time_period=40,
+        teacher_instructions="", pdf_file_content="Chapter text.", subject="Science",
+        subject_instructions="", force_refresh=True
+    )
+
+
+@override_settings(AI_MODELS=FAKE_AI_MODELS, CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS, CACHES=LOCAL_CACHES)
+class LlmJobQueueTests(SimpleTestCase):
+
+    def setUp(self):
+        # Cached lesson plans would skip the fake model and leave files behind
+        patcher = mock.patch.object(lesson_plan_cache, 'enabled', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.queue = LlmJobQueue()
+        self.queue.register_handler(LESSON_PLAN_JOB, generate_lesson_plan)
+
+    def wait_for(self, job_id, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = self.queue.get_job(job_id)
+            if job["status"] not in self.queue.ACTIVE:
+                return job
+            time.sleep(0.05)
+        self.fail(f"Job {job_id} did not finish within {timeout}s")
+
+    def test_lesson_plan_job_runs_on_fake_backend(self):
+        job = self.queue.submit(LESSON_PLAN_JOB, {"chapter_title": "Plants", "num_days": 3}, user_id=1)
+        self.assertIn(job["status"], self.queue.ACTIVE)
+
+        job = self.wait_for(job["job_id"])
+        self.assertEqual(job["status"], self.queue.SUCCEEDED)
+        self.assertEqual(job["attempts"], 1)
+        self.assertEqual(job["result"]["chapter_title"], "Plants")
+        self.assertEqual(len(job["result"]["lesson_plan"]), 3)
+
+    def test_stale_job_is_marked_failed_on_lookup(self):
+        # A job left retrying by a process that restarted during its backoff
+        self.queue._update_job({"job_id": "stale", "job_type": LESSON_PLAN_JOB, "user_id": 1,
+                                "status": self.queue.RETRYING, "attempts": 1, "result": None,
+                                "error": "Timeout", "created_at": time.time()})
+        self.assertEqual(self.queue.get_job("stale")["status"], self.queue.RETRYING)
+
+        self.queue.stale_after = 0
+        time.sleep(0.01)
+        job = self.queue.get_job("stale")
+        self.assertEqual(job["status"], self.queue.FAILED)
+        self.assertEqual(self.queue.get_job("stale")["status"], self.queue.FAILED)
+
+    def test_stale_job_is_not_revived_by_its_worker(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_handler():
+            started.set()
+            release.wait(10)
+            return "done"
+
+        self.queue.register_handler("slow", slow_handler)
+        job = self.queue.submit("slow", {})
+        self.assertTrue(started.wait(10))
+
+        self.queue.stale_after = 0
+        time.sleep(0.01)
+        self.assertEqual(self.queue.get_job(job["job_id"])["status"], self.queue.FAILED)
+
+        release.set()
+        self.queue._executor.shutdown(wait=True)
+        self.assertEqual(self.queue.get_job(job["job_id"])["status"], self.queue.FAILED)
+
+    def test_lesson_plan_handler_is_registered_when_apps_load(self):
+        self.assertIn(LESSON_PLAN_JOB, llm_job_queue._handlers)
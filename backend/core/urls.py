@@ -1,11 +1,12 @@
 """urls.py"""
 
 from django.urls import path
-from core.views import PasswordManagerView,UserProfileView,DashboardView,SupportView
+from core.views import PasswordManagerView,UserProfileView,DashboardView,SupportView,MetricsView
 
 urlpatterns = [
     path('password_manager/<str:action>', PasswordManagerView.as_view(), name='passsword_manager'),
     path('user_profile/<str:action>', UserProfileView.as_view(), name='user_profile'),
     path('dashboard/<str:action>', DashboardView.as_view(), name='dashboard'),
     path('support/<str:action>', SupportView.as_view(), name='support'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
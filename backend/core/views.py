@@ -19,6 +19,8 @@ from core.services.password_manager_service import PasswordManagerService
 from core.services.user_profile_service import UserProfileService
 from core.services.dashboard_service import DashboardService
 from core.services.support_service import SupportService
+from core.services.metrics_service import MetricsService
+from core.permissions import IsSuperAdmin
 
 logger = logging.getLogger(__name__)
 
@@ -122,6 +124,19 @@ class DashboardView(APIView):
             return DashboardService().get_dashboard_data(request)
         return Response({"error": "Invalid GET action"}, status=status.HTTP_400_BAD_REQUEST)
 
+class MetricsView(APIView):
+    """
+    View to expose request and database metrics for scraping.
+    """
+
+    permission_classes = [IsAuthenticated, IsSuperAdmin]
+
+    def get(self, request):
+        """
+        Get the metrics in the Prometheus text format.
+        """
+        return MetricsService().get_metrics(request)
+
 class SupportView(APIView):
     """
     View to handle support ticket actions.
@@ -0,0 +1,201 @@
+"""Attendance report service"""
+
+import logging
+from datetime import datetime
+
+from django.http import JsonResponse
+from django.db.models import Sum
+
+from core.models import User
+from classes.models import SchoolSection
+from student.models import (
+    SectionAttendanceDaily,
+    SectionAttendanceMonthly,
+    Student,
+    StudentAttendanceMonthly
+)
+from core.common_modules.common_functions import CommonFunctions
+
+logger = logging.getLogger(__name__)
+
+
+class AttendanceReportService:
+    """Service for attendance reports, served from the attendance rollups"""
+
+    def __init__(self, request):
+        """Initialize with request"""
+        self.request = request
+
+    @staticmethod
+    def get_percentage(present, absent):
+        """Return the present percentage of the marked sessions"""
+        total = present + absent
+        return round((present / total) * 100, 2) if total > 0 else 0.0
+
+    def _get_month_range(self):
+        """Parse the optional from_month/to_month (YYYY-MM) query parameters"""
+        from_month = self.request.GET.get('from_month')
+        to_month = self.request.GET.get('to_month')
+        month_filter = {}
+        if from_month:
+            month_filter['month__gte'] = datetime.strptime(from_month, "%Y-%m").date()
+        if to_month:
+            month_filter['month__lte'] = datetime.strptime(to_month, "%Y-%m").date()
+        return month_filter
+
+    def _get_section_names(self, school_db_name, section_ids):
+        return {
+            s['id']: f"{s['class_instance__class_number']}-{s['section']}"
+            for s in SchoolSection.objects.using(school_db_name)
+            .filter(id__in=section_ids)
+            .values('id', 'section', 'class_instance__class_number')
+        }
+
+    def get_attendance_by_class(self):
+        """Attendance percentage of every class section over a range of months"""
+        try:
+            school_id = self.request.GET.get('school_id') or getattr(self.request.user, 'school_id', None)
+            school_db_name = CommonFunctions.get_school_db_name(school_id)
+            if not school_db_name:
+                return JsonResponse({"error": "Invalid school ID"}, status=400)
+
+            academic_year_id = self.request.GET.get('academic_year_id')
+            if not academic_year_id:
+                latest_academic_year = CommonFunctions().get_latest_academic_year(school_db_name)
+                academic_year_id = getattr(latest_academic_year, 'id', None)
+
+            section_totals = (
+                SectionAttendanceMonthly.objects.using(school_db_name)
+                .filter(academic_year_id=academic_year_id, **self._get_month_range())
+                .values('class_section_id')
+                .annotate(
+                    sessions_taken=Sum('sessions_taken'),
+                    holiday_sessions=Sum('holiday_sessions'),
+                    present=Sum('present_count'),
+                    absent=Sum('absent_count')
+                )
+            )
+            section_totals = list(section_totals)
+            section_names = self._get_section_names(
+                school_db_name, [row['class_section_id'] for row in section_totals]
+            )
+
+            report_data = [
+                {
+                    "class_section_id": row['class_section_id'],
+                    "class_name": section_names.get(row['class_section_id'], "Unknown"),
+                    "sessions_taken": row['sessions_taken'],
+                    "holiday_sessions": row['holiday_sessions'],
+                    "present_count": row['present'],
+                    "absent_count": row['absent'],
+                    "attendance_percentage": self.get_percentage(row['present'], row['absent']),
+                }
+                for row in section_totals
+            ]
+            report_data.sort(key=lambda row: row['class_name'])
+            return JsonResponse({"data": report_data}, status=200)
+
+        except ValueError:
+            return JsonResponse({"error": "Invalid month. Use YYYY-MM."}, status=400)
+        except Exception as e:
+            logger.error("Error generating attendance report by class: %s", e)
+            return JsonResponse({"error": "Failed to generate attendance report"}, status=500)
+
+    def get_attendance_by_student(self):
+        """Attendance percentage of every student of a class section over a range of months"""
+        try:
+            school_id = self.request.GET.get('school_id') or getattr(self.request.user, 'school_id', None)
+            class_section_id = self.request.GET.get('class_section_id')
+            if not (school_id and class_section_id):
+                return JsonResponse({"error": "Missing school_id or class_section_id"}, status=400)
+
+            school_db_name = CommonFunctions.get_school_db_name(school_id)
+            if not school_db_name:
+                return JsonResponse({"error": "Invalid school ID"}, status=400)
+
+            academic_year_id = self.request.GET.get('academic_year_id')
+            if not academic_year_id:
+                latest_academic_year = CommonFunctions().get_latest_academic_year(school_db_name)
+                academic_year_id = getattr(latest_academic_year, 'id', None)
+
+            student_totals = list(
+                StudentAttendanceMonthly.objects.using(school_db_name)
+                .filter(
+                    class_section_id=class_section_id,
+                    academic_year_id=academic_year_id,
+                    **self._get_month_range()
+                )
+                .values('student_id')
+                .annotate(present=Sum('present_count'), absent=Sum('absent_count'))
+            )
+            student_ids = [row['student_id'] for row in student_totals]
+
+            user_map = {
+                u['id']: f"{u['first_name']} {u['last_name']}"
+                for u in User.objects.filter(id__in=student_ids).values('id', 'first_name', 'last_name')
+            }
+            student_roll_map = dict(
+                Student.objects.using(school_db_name).filter(student_id__in=student_ids)
+                .values_list('student_id', 'roll_number')
+            )
+
+            report_data = [
+                {
+                    "student_id": row['student_id'],
+                    "roll_number": student_roll_map.get(row['student_id']),
+                    "student_name": user_map.get(row['student_id'], "Unknown"),
+                    "present_count": row['present'],
+                    "absent_count": row['absent'],
+                    "attendance_percentage": self.get_percentage(row['present'], row['absent']),
+                }
+                for row in student_totals
+            ]
+            return JsonResponse({"data": report_data}, status=200)
+
+        except ValueError:
+            return JsonResponse({"error": "Invalid month. Use YYYY-MM."}, status=400)
+        except Exception as e:
+            logger.error("Error generating attendance report by student: %s", e)
+            return JsonResponse({"error": "Failed to generate attendance report"}, status=500)
+
+    def get_daily_attendance(self):
+        """Attendance of every class section on one date"""
+        try:
+            school_id = self.request.GET.get('school_id') or getattr(self.request.user, 'school_id', None)
+            date = self.request.GET.get('date')
+            if not (school_id and date):
+                return JsonResponse({"error": "Missing school_id or date"}, status=400)
+            date = datetime.strptime(date, "%Y-%m-%d").date()
+
+            school_db_name = CommonFunctions.get_school_db_name(school_id)
+            if not school_db_name:
+                return JsonResponse({"error": "Invalid school ID"}, status=400)
+
+            daily_rows = list(
+                SectionAttendanceDaily.objects.using(school_db_name)
+                .filter(date=date)
+                .values('class_section_id', 'session', 'is_holiday', 'present_count', 'absent_count')
+            )
+            section_names = self._get_section_names(
+                school_db_name, {row['class_section_id'] for row in daily_rows}
+            )
+
+            report_data = [
+                {
+                    "class_section_id": row['class_section_id'],
+                    "class_name": section_names.get(row['class_section_id'], "Unknown"),
+                    "session": row['session'],
+                    "is_holiday": row['is_holiday'],
+                    "present_count": row['present_count'],
+                    "absent_count": row['absent_count'],
+                    "attendance_percentage": self.get_percentage(row['present_count'], row['absent_count']),
+                }
+                for row in daily_rows
+            ]
+            return JsonResponse({"data": report_data}, status=200)
+
+        except ValueError:
+            return JsonResponse({"error": "Invalid date. Use YYYY-MM-DD."}, status=400)
+        except Exception as e:
+            logger.error("Error generating daily attendance report: %s", e)
+            return JsonResponse({"error": "Failed to generate attendance report"}, status=500)
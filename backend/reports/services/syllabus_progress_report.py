@@ -3,12 +3,13 @@
 import logging
 from collections import defaultdict
 from django.http import JsonResponse
-from django.db.models import Count, Q, F, Max, Prefetch
+from django.db.models import Count, F, Prefetch
 
 from core.models import User
 from teacher.models import TeacherSubjectAssignment
-from syllabus.models import SchoolLessonPlanDay, SchoolChapter, SchoolSection, Topic
+from syllabus.models import SchoolLessonPlanDay, SchoolChapter, SchoolChapterProgress, SchoolSection, Topic
 from core.common_modules.common_functions import CommonFunctions
+from core.common_modules.tenant_replicas import tenant_replicas
 
 logger = logging.getLogger(__name__)
 
@@ -19,12 +20,17 @@ class SyllabusProgressReportService:
         """Initialize with request"""
         self.request = request
 
+    @staticmethod
+    def get_report_db_name(school_id):
+        """Database alias the report reads from, the school's read replica when available"""
+        return tenant_replicas.read_alias(CommonFunctions.get_school_db_name(school_id))
+
     
     def get_report_by_class(self):
         """Generate syllabus progress report by class (uses class_section_id correctly)"""
         try:
             school_id = self.request.GET.get('school_id')
-            school_db_name = CommonFunctions.get_school_db_name(school_id)
+            school_db_name = self.get_report_db_name(school_id)
             if not school_db_name:
                 return JsonResponse({"error": "Invalid school ID"}, status=400)
 
@@ -62,28 +68,23 @@ class SyllabusProgressReportService:
                 for c in classes_with_subjects
             }
 
-            # 2) Aggregate lesson plans per chapter + class_section to determine chapter completion per section
+            # 2) Completed chapters per class_section + subject from the chapter progress rollup
             chapter_completion_qs = (
-                SchoolLessonPlanDay.objects.using(school_db_name)
+                SchoolChapterProgress.objects.using(school_db_name)
                 .filter(
                     class_section_id__in=class_section_ids,
-                    chapter__academic_year=latest_academic_year
-                )
-                .values('chapter_id', 'chapter__subject_id', 'class_section_id')
-                .annotate(
-                    total_lessons=Count('id'),
-                    completed_lessons=Count('id', filter=Q(status='completed'))
+                    chapter__academic_year=latest_academic_year,
+                    is_completed=True
                 )
+                .values('class_section_id', 'subject_id')
+                .annotate(completed_chapters=Count('id'))
             )
 
             # completed_chapters_map: (class_section_id, subject_id) -> number_of_completed_chapters
-            completed_chapters_map = {}
-            for r in chapter_completion_qs:
-                total = r['total_lessons']
-                comp = r['completed_lessons']
-                if total > 0 and total == comp:
-                    key = (r['class_section_id'], r['chapter__subject_id'])
-                    completed_chapters_map[key] = completed_chapters_map.get(key, 0) + 1
+            completed_chapters_map = {
+                (r['class_section_id'], r['subject_id']): r['completed_chapters']
+                for r in chapter_completion_qs
+            }
 
             # 3) Get total chapters per (class_number_id, school_board_id, subject_id)
             total_chapters_qs = (
@@ -145,7 +146,7 @@ class SyllabusProgressReportService:
             if not (school_id and class_section_id):
                 return JsonResponse({"error": "Missing school_id or class_section_id"}, status=400)
 
-            school_db_name = CommonFunctions.get_school_db_name(school_id)
+            school_db_name = self.get_report_db_name(school_id)
             if not school_db_name:
                 return JsonResponse({"error": "Invalid school ID"}, status=400)
 
@@ -205,27 +206,20 @@ class SyllabusProgressReportService:
 
             # 4) Get completed chapters (where all lesson plan days for that chapter are completed)
             chapter_completion_qs = (
-                SchoolLessonPlanDay.objects.using(school_db_name)
+                SchoolChapterProgress.objects.using(school_db_name)
                 .filter(
                     class_section_id=class_section_id,
                     chapter__academic_year=latest_academic_year,
-                    chapter__subject_id__in=subject_ids
-                )
-                .values('chapter_id', 'chapter__subject_id')
-                .annotate(
-                    total_lessons=Count('id'),
-                    completed_lessons=Count('id', filter=Q(status='completed'))
+                    subject_id__in=subject_ids,
+                    is_completed=True
                 )
+                .values('subject_id')
+                .annotate(completed_chapters=Count('id'))
             )
 
-            # determine which chapters are fully completed
-            completed_chapters_map = {}
-            for r in chapter_completion_qs:
-                total = r['total_lessons']
-                comp = r['completed_lessons']
-                if total > 0 and total == comp:
-                    subj_id = r['chapter__subject_id']
-                    completed_chapters_map[subj_id] = completed_chapters_map.get(subj_id, 0) + 1
+            completed_chapters_map = {
+                r['subject_id']: r['completed_chapters'] for r in chapter_completion_qs
+            }
 
             # 5) Build final response
             subject_progress_data = []
@@ -261,7 +255,7 @@ class SyllabusProgressReportService:
             if not (school_id and class_section_id and subject_id):
                 return JsonResponse({"error": "Missing school_id, class_section_id, or subject_id"}, status=400)
 
-            school_db_name = CommonFunctions.get_school_db_name(school_id)
+            school_db_name = self.get_report_db_name(school_id)
             if not school_db_name:
                 return JsonResponse({"error": "Invalid school ID"}, status=400)
 
@@ -298,18 +292,18 @@ class SyllabusProgressReportService:
 
             chapter_ids = [c['id'] for c in chapters_qs]
 
-            # 3) Get lesson plan days per chapter for this class_section
+            # 3) Get lesson plan day counts per chapter for this class_section
             lessonplans_qs = (
-                SchoolLessonPlanDay.objects.using(school_db_name)
+                SchoolChapterProgress.objects.using(school_db_name)
                 .filter(
                     class_section_id=class_section_id,
                     chapter_id__in=chapter_ids
                 )
-                .values('chapter_id')
-                .annotate(
-                    total_lessons=Count('id'),
-                    completed_lessons=Count('id', filter=Q(status='completed')),
-                    last_completed_date=Max('updated_at', filter=Q(status='completed'))
+                .values(
+                    'chapter_id',
+                    total_lessons=F('total_days'),
+                    completed_lessons=F('completed_days'),
+                    last_completed_date=F('last_completed_at')
                 )
             )
 
@@ -374,7 +368,7 @@ class SyllabusProgressReportService:
             if not school_id:
                 return JsonResponse({"error": "Missing school_id"}, status=400)
 
-            school_db_name = CommonFunctions.get_school_db_name(school_id)
+            school_db_name = self.get_report_db_name(school_id)
             if not school_db_name:
                 return JsonResponse({"error": "Invalid school ID"}, status=400)
 
@@ -427,7 +421,7 @@ class SyllabusProgressReportService:
             if not school_id:
                 return JsonResponse({"error": "Missing school_id"}, status=400)
 
-            school_db_name = CommonFunctions.get_school_db_name(school_id)
+            school_db_name = self.get_report_db_name(school_id)
             if not school_db_name:
                 return JsonResponse({"error": "Invalid school ID"}, status=400)
 
@@ -485,17 +479,15 @@ class SyllabusProgressReportService:
 
             # 3️⃣ Get completed chapters per class-section + subject
             chapter_progress_qs = (
-                SchoolLessonPlanDay.objects.using(school_db_name)
+                SchoolChapterProgress.objects.using(school_db_name)
                 .filter(
                     chapter__academic_year=latest_academic_year,
                     class_section_id__in=section_ids,
-                    chapter__subject_id__in=[a['subject__id'] for a in assignments],
-                )
-                .values('chapter_id', 'chapter__subject_id', 'class_section_id')
-                .annotate(
-                    total_lessons=Count('id'),
-                    completed_lessons=Count('id', filter=Q(status='completed'))
+                    subject_id__in=[a['subject__id'] for a in assignments],
+                    is_completed=True
                 )
+                .values('subject_id', 'class_section_id')
+                .annotate(completed_chapters=Count('id'))
             )
 
 
@@ -507,20 +499,10 @@ class SyllabusProgressReportService:
             }
 
             # Map: (subject_id, class_section_id) -> completed chapters count
-            completed_map = {}
-            for cp in chapter_progress_qs:
-                section_id = cp['class_section_id']
-                subject_id = cp['chapter__subject_id']
-                total = cp['total_lessons']
-                completed = cp['completed_lessons']
-
-                # Chapter is considered completed if all its lessons are completed
-                chapter_completed = 1 if total > 0 and completed == total else 0
-
-                if (subject_id, section_id) in completed_map:
-                    completed_map[(subject_id, section_id)] += chapter_completed
-                else:
-                    completed_map[(subject_id, section_id)] = chapter_completed
+            completed_map = {
+                (cp['subject_id'], cp['class_section_id']): cp['completed_chapters']
+                for cp in chapter_progress_qs
+            }
 
             # 4️⃣ Aggregate per teacher + subject + board
             data_map = {}
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import SyllabusProgressReportView
+from .views import SyllabusProgressReportView, AttendanceReportView
 
 urlpatterns = [
     path('syllabus_reports/<str:action>', SyllabusProgressReportView.as_view(), name='school_action'),
+    path('attendance_reports/<str:action>', AttendanceReportView.as_view(), name='attendance_report_action'),
 ]
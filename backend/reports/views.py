@@ -3,6 +3,7 @@
 from rest_framework.views import APIView
 from django.http import JsonResponse
 from reports.services.syllabus_progress_report import SyllabusProgressReportService
+from reports.services.attendance_report import AttendanceReportService
 
 
 
@@ -25,4 +26,21 @@ class SyllabusProgressReportView(APIView):
         elif action == 'getSyllabusProgressByTeacher':
             return service.get_teacher_subject_progress()
         else:
-            return JsonResponse({"error": "Invalid action"}, status=400)
\ No newline at end of file
+            return JsonResponse({"error": "Invalid action"}, status=400)
+
+
+class AttendanceReportView(APIView):
+    """View for handling attendance reports"""
+
+    def get(self, request, action=None):
+        """Handle GET requests"""
+        service = AttendanceReportService(request)
+
+        if action == 'getAttendanceByClass':
+            return service.get_attendance_by_class()
+        elif action == 'getAttendanceByStudent':
+            return service.get_attendance_by_student()
+        elif action == 'getDailyAttendance':
+            return service.get_daily_attendance()
+        else:
+            return JsonResponse({"error": "Invalid action"}, status=400)
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0006_populate_subjects'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EbookContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('extracted_text', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'school_ebook_content',
+            },
+        ),
+        migrations.AddField(
+            model_name='schoolsyllabusebooks',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+        migrations.CreateModel(
+            name='EbookChapterExtraction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prompt_hash', models.CharField(max_length=64)),
+                ('chapters', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chapter_extractions', to='school.ebookcontent')),
+            ],
+            options={
+                'db_table': 'school_ebook_chapter_extraction',
+                'unique_together': {('content', 'prompt_hash')},
+            },
+        ),
+    ]
@@ -96,11 +96,56 @@ class SchoolSyllabusEbooks(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    content_hash = models.CharField(max_length=64, null=True, blank=True, db_index=True)
 
     class Meta:
         db_table = 'school_syllabus_ebooks'
         unique_together = ('board', 'subject', 'class_number', 'ebook_name', 'created_at')
 
+class EbookContent(models.Model):
+    content_hash = models.CharField(max_length=64, unique=True)
+    extracted_text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'school_ebook_content'
+
+class EbookChapterExtraction(models.Model):
+    content = models.ForeignKey(EbookContent, on_delete=models.CASCADE, related_name='chapter_extractions')
+    prompt_hash = models.CharField(max_length=64)
+    chapters = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'school_ebook_chapter_extraction'
+        unique_together = ('content', 'prompt_hash')
+
+class EbookDistribution(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    SKIPPED = 'skipped'
+    FAILED = 'failed'
+
+    ebook = models.ForeignKey(SchoolSyllabusEbooks, on_delete=models.CASCADE, related_name='distributions')
+    db_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, default=PENDING, choices=[
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (SKIPPED, 'Skipped'),
+        (FAILED, 'Failed'),
+    ])
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+    chapters_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'school_ebook_distribution'
+        unique_together = ('ebook', 'db_name')
+
 class AcademicYear(AbstractAcademicYear):
     class Meta:
         db_table = 'school_academic_year'
@@ -0,0 +1,168 @@
+"""Pre-migrated Postgres template for new school databases."""
+
+import hashlib
+import logging
+
+import psycopg2
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.migrations.loader import MigrationLoader
+
+from core.common_modules.tenant_registry import tenant_registry
+
+logger = logging.getLogger(__name__)
+
+
+class SchoolDbTemplate:
+    """
+    Provisions school databases with CREATE DATABASE ... TEMPLATE from a
+    database that already has every school migration applied, instead of
+    replaying the migration history for each new school.
+
+    The template is tagged with a fingerprint of the migrations on disk
+    (stored as the database comment) and rebuilt from scratch when the
+    fingerprint changes, i.e. after new migrations land. Rebuilds and
+    clones hold a Postgres advisory lock so they never overlap. Any failure
+    returns False and the caller falls back to creating the database and
+    running the migrations.
+    """
+
+    POSTGRES_ENGINES = ('django.db.backends.postgresql', 'core.db_backends.pooled_postgresql')
+
+    def __init__(self):
+        config = settings.SCHOOL_DB_TEMPLATE_CONFIG
+        self.enabled = config['ENABLED']
+        self.template_name = config['NAME'] or f"{settings.DB_CONFIG['NAME']}_school_template"
+        self.lock_id = config['LOCK_ID']
+
+    @property
+    def build_name(self):
+        return f"{self.template_name}_build"
+
+    def is_available(self):
+        return self.enabled and settings.DB_CONFIG['ENGINE'] in self.POSTGRES_ENGINES
+
+    @staticmethod
+    def _connect():
+        conn = psycopg2.connect(
+            dbname=settings.DB_CONFIG['NAME'],
+            user=settings.DB_CONFIG['USER'],
+            password=settings.DB_CONFIG['PASSWORD'],
+            host=settings.DB_CONFIG['HOST'],
+            port=settings.DB_CONFIG['PORT']
+        )
+        conn.autocommit = True
+        return conn
+
+    def migration_fingerprint(self, app_labels):
+        """Hash of the migrations on disk of the school apps."""
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        keys = sorted(f"{app_label}.{name}" for app_label, name in loader.disk_migrations if app_label in app_labels)
+        return hashlib.sha256("\n".join(keys).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _template_fingerprint(cursor, db_name):
+        cursor.execute(
+            "SELECT shobj_description(oid, 'pg_database') FROM pg_database WHERE datname = %s",
+            [db_name]
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return row[0] or ""
+
+    @staticmethod
+    def _terminate_connections(cursor, db_name):
+        cursor.execute(
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+            "WHERE datname = %s AND pid <> pg_backend_pid()",
+            [db_name]
+        )
+
+    def _drop(self, cursor, db_name):
+        cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", [db_name])
+        if cursor.fetchone() is None:
+            return
+        cursor.execute(f'ALTER DATABASE "{db_name}" WITH IS_TEMPLATE false ALLOW_CONNECTIONS true')
+        self._terminate_connections(cursor, db_name)
+        cursor.execute(f'DROP DATABASE "{db_name}"')
+
+    @staticmethod
+    def _is_fully_migrated(db_name, app_labels):
+        executor = MigrationExecutor(connections[db_name])
+        targets = [key for key in executor.loader.graph.leaf_nodes() if key[0] in app_labels]
+        return not executor.migration_plan(targets)
+
+    def _rebuild(self, cursor, fingerprint, migrate, app_labels):
+        logger.info(f"Rebuilding school database template {self.template_name}")
+        self._drop(cursor, self.build_name)
+        cursor.execute(f'CREATE DATABASE "{self.build_name}"')
+        try:
+            tenant_registry.ensure_registered(self.build_name)
+            migrate(self.build_name)
+            if not self._is_fully_migrated(self.build_name, app_labels):
+                raise RuntimeError("School migrations failed on the template database.")
+        finally:
+            tenant_registry.evict(self.build_name)
+
+        self._drop(cursor, self.template_name)
+        self._terminate_connections(cursor, self.build_name)
+        cursor.execute(f'ALTER DATABASE "{self.build_name}" RENAME TO "{self.template_name}"')
+        cursor.execute(f'COMMENT ON DATABASE "{self.template_name}" IS %s', [fingerprint])
+        cursor.execute(f'ALTER DATABASE "{self.template_name}" WITH IS_TEMPLATE true ALLOW_CONNECTIONS false')
+        logger.info(f"School database template {self.template_name} is up to date")
+
+    def _ensure_current(self, cursor, migrate, app_labels):
+        fingerprint = self.migration_fingerprint(app_labels)
+        if self._template_fingerprint(cursor, self.template_name) != fingerprint:
+            self._rebuild(cursor, fingerprint, migrate, app_labels)
+
+    def _locked(self, action):
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [self.lock_id])
+            try:
+                return action(cursor)
+            finally:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [self.lock_id])
+        finally:
+            cursor.close()
+            conn.close()
+
+    def ensure_template(self, migrate, app_labels):
+        """Rebuild the template if its migrations are out of date. Returns False on failure."""
+        if not self.is_available():
+            return False
+        try:
+            self._locked(lambda cursor: self._ensure_current(cursor, migrate, app_labels))
+            return True
+        except Exception as e:
+            logger.error(f"Failed to rebuild school database template {self.template_name}: {e}")
+            return False
+
+    def create_database(self, db_name, migrate, app_labels):
+        """
+        Create db_name as a copy of the template, rebuilding the template first
+        when needed. migrate(db_name) applies the school migrations to a database.
+        Returns False when the database could not be created from the template.
+        """
+        if not self.is_available():
+            return False
+
+        def clone(cursor):
+            self._ensure_current(cursor, migrate, app_labels)
+            cursor.execute(f'CREATE DATABASE "{db_name}" TEMPLATE "{self.template_name}"')
+
+        try:
+            self._locked(clone)
+            logger.info(f"Created database {db_name} from template {self.template_name}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to create database {db_name} from template {self.template_name}: {e}")
+            return False
+
+
+school_db_template = SchoolDbTemplate()
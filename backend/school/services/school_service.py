@@ -4,7 +4,6 @@ import psycopg2
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 
-import redis
 from django.db import transaction,IntegrityError,connections
 from django.conf import settings
 from django.test.utils import override_settings
@@ -15,10 +14,12 @@ from rest_framework.response import Response
 from rest_framework import status
 
 from core.models import User,Role
-from core.common_modules.db_loader import DbLoader
 from core.common_modules.send_email import EmailService
 from core.common_modules.password_validator import is_valid_password
 from core.common_modules.common_functions import CommonFunctions
+from core.common_modules.school_db_resolver import school_db_resolver
+from core.common_modules.tenant_registry import tenant_registry
+from school.services.school_db_template import school_db_template
 
 from teacher.models import Teacher
 from student.models import Student
@@ -37,6 +38,8 @@ logger = logging.getLogger(__name__)
 class SchoolService:
     """Service to create a school"""
 
+    SCHOOL_DB_EXCLUDED_APPS = ('core', 'auth', 'admin', 'contenttypes', 'sessions', 'school')
+
     def __init__(self):
         pass
 
@@ -149,6 +152,7 @@ class SchoolService:
                     db_port = settings.DB_CONFIG['PORT']
                 )
 
+                transaction.on_commit(lambda: school_db_resolver.invalidate(school.pk))
                 success = self.create_school_database(school_db_metadata)
 
                 if not success:
@@ -171,8 +175,6 @@ class SchoolService:
                     password=data.get('password'),
                     login_url=CommonFunctions().get_login_uri(request)
                 )
-                r = redis.Redis(host='localhost', port=6379, db=0)
-                r.publish('new_db_created', school_db_metadata.db_name)
                 copy_status = EbookService().copy_syllabus_data_to_school_db(school_db_metadata,
                                                                          academic_year.id)
                 if not copy_status:
@@ -237,6 +239,7 @@ class SchoolService:
                 board_ids = data.get('board_ids', [])
                 if board_ids is not None:
                     school_metadata = SchoolDbMetadata.objects.get(school=school)
+                    tenant_registry.ensure_registered(school_metadata.db_name)
                     academic_year = CommonFunctions().get_latest_academic_year(school_metadata.db_name)
 
                     boards = SchoolBoard.objects.filter(id__in=board_ids)
@@ -292,6 +295,7 @@ class SchoolService:
                 school = School.objects.get(pk=school_id)
                 school.is_active = False
                 school.save()
+                transaction.on_commit(lambda: school_db_resolver.invalidate(school.pk))
 
                 return Response({"message": "School deleted successfully."}, status=status.HTTP_200_OK)
         except School.DoesNotExist:
@@ -316,6 +320,7 @@ class SchoolService:
                 school = School.objects.get(pk=school_id)
                 school.is_active = True
                 school.save()
+                transaction.on_commit(lambda: school_db_resolver.invalidate(school.pk))
 
                 return Response({"message": "School reactivated successfully."}, status=status.HTTP_200_OK)
         except School.DoesNotExist:
@@ -342,7 +347,7 @@ class SchoolService:
                 if not school.metadata:
                     continue
 
-                school_db_name = school.metadata.db_name
+                school_db_name = tenant_registry.ensure_registered(school.metadata.db_name)
 
                 teacher_count = Teacher.objects.using(school_db_name).filter(is_active=True).count()
                 student_count = Student.objects.using(school_db_name).filter(is_active=True).count()
@@ -449,32 +454,27 @@ class SchoolService:
         try:
             logger.info(f"Creating database for school: {school_db_metadata.db_name}")
 
-            conn = psycopg2.connect(
-                dbname=settings.DB_CONFIG['NAME'],
-                user=settings.DB_CONFIG['USER'],
-                password=settings.DB_CONFIG['PASSWORD'],
-                host=settings.DB_CONFIG['HOST'],
-                port=settings.DB_CONFIG['PORT']
-            )
-            conn.autocommit = True
-            cursor = conn.cursor()
+            if school_db_template.create_database(school_db_metadata.db_name, self.apply_db_migrations,
+                                                  self.get_school_app_labels()):
+                tenant_registry.ensure_registered(school_db_metadata.db_name)
+            else:
+                conn = psycopg2.connect(
+                    dbname=settings.DB_CONFIG['NAME'],
+                    user=settings.DB_CONFIG['USER'],
+                    password=settings.DB_CONFIG['PASSWORD'],
+                    host=settings.DB_CONFIG['HOST'],
+                    port=settings.DB_CONFIG['PORT']
+                )
+                conn.autocommit = True
+                cursor = conn.cursor()
 
-            cursor.execute(f'CREATE DATABASE "{school_db_metadata.db_name}"')
+                cursor.execute(f'CREATE DATABASE "{school_db_metadata.db_name}"')
 
-            cursor.close()
-            conn.close()
+                cursor.close()
+                conn.close()
 
-            db_loader = DbLoader()
-            db_loader.load_dynamic_databases(
-                db_key = school_db_metadata.db_name,
-                engine = settings.DB_CONFIG['ENGINE'],
-                name = school_db_metadata.db_name,
-                user = settings.DB_CONFIG['USER'],
-                password = settings.DB_CONFIG['PASSWORD'],
-                host = settings.DB_CONFIG['HOST'],
-                port = settings.DB_CONFIG['PORT']
-            )
-            self.apply_db_migrations(school_db_metadata.db_name)
+                tenant_registry.ensure_registered(school_db_metadata.db_name)
+                self.apply_db_migrations(school_db_metadata.db_name)
 
             logger.info(f"Database {school_db_metadata.db_name} created successfully.")
             return True
@@ -482,9 +482,12 @@ class SchoolService:
             logger.error(f"Failed to create database for school {school_db_metadata.db_name}: {str(e)}")
             return False
     
+    def get_school_app_labels(self, exclude_apps=SCHOOL_DB_EXCLUDED_APPS):
+        """Return the labels of the apps migrated on school databases."""
+        return [app.label for app in apps.get_app_configs() if app.label not in exclude_apps]
+
     def apply_db_migrations(self,db_name,
-                            exclude_apps=('core', 'auth',
-                'admin', 'contenttypes', 'sessions','school')
+                            exclude_apps=SCHOOL_DB_EXCLUDED_APPS
     ):
         """
         Apply migrations to the specified database, excluding certain apps.
@@ -493,7 +496,7 @@ class SchoolService:
             exclude_apps (tuple): A tuple of app labels to exclude from migrations.
         """
         # Get all app labels except excluded ones
-        app_labels = [app.label for app in apps.get_app_configs() if app.label not in exclude_apps]
+        app_labels = self.get_school_app_labels(exclude_apps)
 
         for app_label in app_labels:
             try:
@@ -516,6 +519,7 @@ class SchoolService:
 
             if db_name in connections:
                 connections[db_name].close()
+            tenant_registry.evict(db_name)
 
             conn = psycopg2.connect(
                 dbname=settings.DB_CONFIG['NAME'],
@@ -53,8 +53,10 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'core.middleware.LoadDynamicDatabasesMiddleware',
+    'core.middleware.TenantRegistryMiddleware',
+    'core.middleware.QueryMetricsMiddleware',
     'core.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'core.middleware.CloseDBConnectionMiddleware',
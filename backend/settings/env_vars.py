@@ -44,5 +44,119 @@ API_KEYS = {
 }
 
 AI_MODELS = {
-    'GEMINI_MODEL': os.getenv('GEMINI_MODEL', 'gemini-2.5-flash')
-}
\ No newline at end of file
+    'GEMINI_MODEL': os.getenv('GEMINI_MODEL', 'gemini-2.5-flash'),
+    'LLM_BACKEND': os.getenv('LLM_BACKEND', 'gemini'),
+}
+SCHOOL_DB_RESOLVER_CONFIG = {
+    'LOCAL_MAX_SIZE': int(os.getenv('SCHOOL_DB_RESOLVER_LOCAL_MAX_SIZE', 1024)),
+    'LOCAL_TTL': int(os.getenv('SCHOOL_DB_RESOLVER_LOCAL_TTL', 60)),
+    'SHARED_TTL': int(os.getenv('SCHOOL_DB_RESOLVER_SHARED_TTL', 3600)),
+}
+
+TENANT_REGISTRY_CONFIG = {
+    'IDLE_TIMEOUT': int(os.getenv('TENANT_DB_IDLE_TIMEOUT', 1800)),
+    'SWEEP_INTERVAL': int(os.getenv('TENANT_DB_SWEEP_INTERVAL', 60)),
+}
+
+TENANT_DB_POOL_CONFIG = {
+    'ENABLED': os.getenv('TENANT_DB_POOL_ENABLED', 'False') == 'True',
+    'MAX_SIZE_PER_TENANT': int(os.getenv('TENANT_DB_POOL_MAX_SIZE_PER_TENANT', 5)),
+    'MAX_TOTAL': int(os.getenv('TENANT_DB_POOL_MAX_TOTAL', 50)),
+    'IDLE_TIMEOUT': int(os.getenv('TENANT_DB_POOL_IDLE_TIMEOUT', 300)),
+    'ACQUIRE_TIMEOUT': int(os.getenv('TENANT_DB_POOL_ACQUIRE_TIMEOUT', 10)),
+    'CONN_MAX_AGE': int(os.getenv('TENANT_DB_CONN_MAX_AGE', 300)),
+}
+
+CHAPTER_PROGRESS_CACHE_CONFIG = {
+    'ENABLED': os.getenv('CHAPTER_PROGRESS_CACHE_ENABLED', 'True') == 'True',
+    'TTL': int(os.getenv('CHAPTER_PROGRESS_CACHE_TTL', 600)),
+}
+
+QUERY_METRICS_CONFIG = {
+    'ENABLED': os.getenv('QUERY_METRICS_ENABLED', 'True') == 'True',
+    'QUERY_BUDGET': int(os.getenv('QUERY_METRICS_QUERY_BUDGET', 50)),
+    'TIME_BUDGET_MS': int(os.getenv('QUERY_METRICS_TIME_BUDGET_MS', 1000)),
+    'LOG_OVER_BUDGET': os.getenv('QUERY_METRICS_LOG_OVER_BUDGET', 'True') == 'True',
+    'MAX_SERIES': int(os.getenv('QUERY_METRICS_MAX_SERIES', 2000)),
+}
+
+LLM_JOB_QUEUE_CONFIG = {
+    'MAX_WORKERS': int(os.getenv('LLM_JOB_MAX_WORKERS', 4)),
+    'MAX_PENDING': int(os.getenv('LLM_JOB_MAX_PENDING', 100)),
+    'MAX_RETRIES': int(os.getenv('LLM_JOB_MAX_RETRIES', 3)),
+    'BACKOFF_BASE': float(os.getenv('LLM_JOB_BACKOFF_BASE', 2)),
+    'BACKOFF_MAX': float(os.getenv('LLM_JOB_BACKOFF_MAX', 60)),
+    'RESULT_TTL': int(os.getenv('LLM_JOB_RESULT_TTL', 3600)),
+    'STALE_AFTER': int(os.getenv('LLM_JOB_STALE_AFTER', 900)),
+}
+
+LESSON_PLAN_CACHE_CONFIG = {
+    'ENABLED': os.getenv('LESSON_PLAN_CACHE_ENABLED', 'True') == 'True',
+    'BACKEND': os.getenv('LESSON_PLAN_CACHE_BACKEND', 'disk'),
+    'DIRECTORY': os.getenv('LESSON_PLAN_CACHE_DIR', 'lesson_plan_cache'),
+    'REDIS_URL': os.getenv('LESSON_PLAN_CACHE_REDIS_URL', 'redis://127.0.0.1:6379/2'),
+    'MAX_SIZE_MB': int(os.getenv('LESSON_PLAN_CACHE_MAX_SIZE_MB', 256)),
+    'PROMPT_VERSION': os.getenv('LESSON_PLAN_CACHE_PROMPT_VERSION', '1'),
+}
+
+PDF_EXTRACTION_CONFIG = {
+    'MAX_WORKERS': int(os.getenv('PDF_EXTRACTION_MAX_WORKERS', os.cpu_count() or 1)),
+    'PAGES_PER_TASK': int(os.getenv('PDF_EXTRACTION_PAGES_PER_TASK', 25)),
+    'MIN_PAGES_FOR_POOL': int(os.getenv('PDF_EXTRACTION_MIN_PAGES_FOR_POOL', 50)),
+    'START_METHOD': os.getenv('PDF_EXTRACTION_START_METHOD', 'spawn'),
+}
+
+ASSISTANT_CHAT_CONFIG = {
+    'RECENT_MESSAGES': int(os.getenv('ASSISTANT_CHAT_RECENT_MESSAGES', 6)),
+    'SUMMARY_BATCH': int(os.getenv('ASSISTANT_CHAT_SUMMARY_BATCH', 4)),
+}
+
+ASSISTANT_CONTEXT_CACHE_CONFIG = {
+    'ENABLED': os.getenv('ASSISTANT_CONTEXT_CACHE_ENABLED', 'True') == 'True',
+    'TTL': int(os.getenv('ASSISTANT_CONTEXT_CACHE_TTL', 3600)),
+}
+
+LLM_CONTEXT_CACHE_CONFIG = {
+    'ENABLED': os.getenv('LLM_CONTEXT_CACHE_ENABLED', 'True') == 'True',
+    'TTL': int(os.getenv('LLM_CONTEXT_CACHE_TTL', 3600)),
+    'MIN_CHARS': int(os.getenv('LLM_CONTEXT_CACHE_MIN_CHARS', 4096)),
+    'FAILURE_TTL': int(os.getenv('LLM_CONTEXT_CACHE_FAILURE_TTL', 600)),
+}
+
+WHITEBOARD_CONFIG = {
+    'REDIS_URL': os.getenv('WHITEBOARD_REDIS_URL', 'redis://127.0.0.1:6379/0'),
+    'FLUSH_INTERVAL': int(os.getenv('WHITEBOARD_FLUSH_INTERVAL', 10)),
+    'FLUSH_BATCH': int(os.getenv('WHITEBOARD_FLUSH_BATCH', 500)),
+    'MAX_CHUNK_SIZE_BYTES': int(os.getenv('WHITEBOARD_MAX_CHUNK_SIZE_BYTES', 5 * 1024 * 1024)),
+    'LOCK_TIMEOUT': int(os.getenv('WHITEBOARD_FLUSH_LOCK_TIMEOUT', 60)),
+    'BROADCAST_INTERVAL_MS': int(os.getenv('WHITEBOARD_BROADCAST_INTERVAL_MS', 50)),
+    'MAX_PENDING_FRAMES': int(os.getenv('WHITEBOARD_MAX_PENDING_FRAMES', 100)),
+    'MAX_PENDING_BYTES': int(os.getenv('WHITEBOARD_MAX_PENDING_BYTES', 1024 * 1024)),
+}
+
+SYLLABUS_DISTRIBUTION_CONFIG = {
+    'MAX_WORKERS': int(os.getenv('SYLLABUS_DISTRIBUTION_MAX_WORKERS', 8)),
+    'BATCH_SIZE': int(os.getenv('SYLLABUS_DISTRIBUTION_BATCH_SIZE', 1000)),
+}
+
+SCHOOL_DB_TEMPLATE_CONFIG = {
+    'ENABLED': os.getenv('SCHOOL_DB_TEMPLATE_ENABLED', 'True') == 'True',
+    'NAME': os.getenv('SCHOOL_DB_TEMPLATE_NAME', ''),
+    'LOCK_ID': int(os.getenv('SCHOOL_DB_TEMPLATE_LOCK_ID', 72317)),
+}
+
+SCHOOL_MIGRATION_CONFIG = {
+    'WORKERS': int(os.getenv('SCHOOL_MIGRATION_WORKERS', 4)),
+    'TIMEOUT': int(os.getenv('SCHOOL_MIGRATION_TIMEOUT', 900)),
+    'REPORT_PATH': os.getenv('SCHOOL_MIGRATION_REPORT_PATH', 'school_migration_report.json'),
+}
+
+DB_REPLICA_CONFIG = {
+    'ENABLED': os.getenv('DB_REPLICA_ENABLED', 'False') == 'True',
+    'HOST': os.getenv('DB_REPLICA_HOST', ''),
+    'PORT': os.getenv('DB_REPLICA_PORT', ''),
+    'USER': os.getenv('DB_REPLICA_USER', ''),
+    'PASSWORD': os.getenv('DB_REPLICA_PASSWORD', ''),
+    'NAME_SUFFIX': os.getenv('DB_REPLICA_NAME_SUFFIX', ''),
+    'STICKY_SECONDS': int(os.getenv('DB_REPLICA_STICKY_SECONDS', 5)),
+}
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0001_initial'),
+        ('classes', '0004_remove_schoolsection_unique_class_instance_section_and_more'),
+        ('student', '0005_remove_student_unique_student_id_roll_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SectionAttendanceDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('session', models.CharField(choices=[('M', 'Morning'), ('A', 'Afternoon')], max_length=1)),
+                ('is_holiday', models.BooleanField(default=False)),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('absent_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='academics.schoolacademicyear')),
+                ('class_section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='classes.schoolsection')),
+            ],
+            options={
+                'db_table': 'section_attendance_daily',
+                'indexes': [models.Index(fields=['academic_year', 'date'], name='section_att_academi_fc3a24_idx')],
+                'constraints': [models.UniqueConstraint(fields=('class_section', 'date', 'session'), name='unique_section_attendance_daily')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SectionAttendanceMonthly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('sessions_taken', models.PositiveIntegerField(default=0)),
+                ('holiday_sessions', models.PositiveIntegerField(default=0)),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('absent_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='academics.schoolacademicyear')),
+                ('class_section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='classes.schoolsection')),
+            ],
+            options={
+                'db_table': 'section_attendance_monthly',
+                'indexes': [models.Index(fields=['academic_year', 'month'], name='section_att_academi_cb1bcc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('class_section', 'academic_year', 'month'), name='unique_section_attendance_monthly')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentAttendanceMonthly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('absent_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='academics.schoolacademicyear')),
+                ('class_section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='classes.schoolsection')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_attendance', to='student.student')),
+            ],
+            options={
+                'db_table': 'student_attendance_monthly',
+                'indexes': [models.Index(fields=['class_section', 'academic_year', 'month'], name='student_att_class_s_7de941_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'class_section', 'academic_year', 'month'), name='unique_student_attendance_monthly')],
+            },
+        ),
+    ]
@@ -0,0 +1,93 @@
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_attendance_rollups(apps, schema_editor):
+    # A frozen copy of AttendanceRollup.rebuild as of this migration
+    alias = schema_editor.connection.alias
+    SectionAttendanceDaily = apps.get_model('student', 'SectionAttendanceDaily')
+    SectionAttendanceMonthly = apps.get_model('student', 'SectionAttendanceMonthly')
+    StudentAttendance = apps.get_model('student', 'StudentAttendance')
+    StudentAttendanceData = apps.get_model('student', 'StudentAttendanceData')
+    StudentAttendanceMonthly = apps.get_model('student', 'StudentAttendanceMonthly')
+
+    SectionAttendanceDaily.objects.using(alias).all().delete()
+    SectionAttendanceMonthly.objects.using(alias).all().delete()
+    StudentAttendanceMonthly.objects.using(alias).all().delete()
+
+    sheets = StudentAttendance.objects.using(alias).filter(
+        class_section_id__isnull=False
+    ).values(
+        'class_section_id', 'academic_year_id', 'date', 'session', 'is_holiday'
+    ).annotate(
+        present=Count('attendance_data', filter=Q(attendance_data__is_present=True)),
+        absent=Count('attendance_data', filter=Q(attendance_data__is_present=False))
+    )
+    SectionAttendanceDaily.objects.using(alias).bulk_create([
+        SectionAttendanceDaily(
+            class_section_id=sheet['class_section_id'],
+            academic_year_id=sheet['academic_year_id'],
+            date=sheet['date'],
+            session=sheet['session'],
+            is_holiday=sheet['is_holiday'],
+            present_count=0 if sheet['is_holiday'] else sheet['present'],
+            absent_count=0 if sheet['is_holiday'] else sheet['absent']
+        )
+        for sheet in sheets
+    ], batch_size=1000)
+
+    section_months = SectionAttendanceDaily.objects.using(alias).annotate(
+        month=TruncMonth('date')
+    ).values('class_section_id', 'academic_year_id', 'month').annotate(
+        sessions_taken=Count('id', filter=Q(is_holiday=False)),
+        holiday_sessions=Count('id', filter=Q(is_holiday=True)),
+        present=Sum('present_count'),
+        absent=Sum('absent_count')
+    )
+    SectionAttendanceMonthly.objects.using(alias).bulk_create([
+        SectionAttendanceMonthly(
+            class_section_id=row['class_section_id'],
+            academic_year_id=row['academic_year_id'],
+            month=row['month'],
+            sessions_taken=row['sessions_taken'],
+            holiday_sessions=row['holiday_sessions'],
+            present_count=row['present'] or 0,
+            absent_count=row['absent'] or 0
+        )
+        for row in section_months
+    ], batch_size=1000)
+
+    student_months = StudentAttendanceData.objects.using(alias).filter(
+        attendance__class_section_id__isnull=False,
+        attendance__is_holiday=False
+    ).annotate(
+        month=TruncMonth('attendance__date')
+    ).values(
+        'student_id', 'attendance__class_section_id', 'attendance__academic_year_id', 'month'
+    ).annotate(
+        present=Count('id', filter=Q(is_present=True)),
+        absent=Count('id', filter=Q(is_present=False))
+    )
+    StudentAttendanceMonthly.objects.using(alias).bulk_create([
+        StudentAttendanceMonthly(
+            student_id=row['student_id'],
+            class_section_id=row['attendance__class_section_id'],
+            academic_year_id=row['attendance__academic_year_id'],
+            month=row['month'],
+            present_count=row['present'],
+            absent_count=row['absent']
+        )
+        for row in student_months
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0006_attendance_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_attendance_rollups, migrations.RunPython.noop),
+    ]
@@ -81,4 +81,75 @@ class StudentAttendanceData(models.Model):
             models.Index(fields=['attendance', 'student']),
         ]
 
-        db_table = 'student_attendance_data'
\ No newline at end of file
+        db_table = 'student_attendance_data'
+
+class SectionAttendanceDaily(models.Model):
+    """Attendance totals of a class section for one date and session."""
+    class_section = models.ForeignKey('classes.SchoolSection', on_delete=models.CASCADE)
+    academic_year = models.ForeignKey('academics.SchoolAcademicYear', on_delete=models.CASCADE,
+                                      null=True, blank=True)
+    date = models.DateField()
+    session = models.CharField(max_length=1, choices=StudentAttendance.SESSION_CHOICES)
+    is_holiday = models.BooleanField(default=False)
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['class_section', 'date', 'session'],
+                                    name='unique_section_attendance_daily')
+        ]
+        indexes = [
+            models.Index(fields=['academic_year', 'date']),
+        ]
+
+        db_table = 'section_attendance_daily'
+
+
+class SectionAttendanceMonthly(models.Model):
+    """Attendance totals of a class section for one month."""
+    class_section = models.ForeignKey('classes.SchoolSection', on_delete=models.CASCADE)
+    academic_year = models.ForeignKey('academics.SchoolAcademicYear', on_delete=models.CASCADE,
+                                      null=True, blank=True)
+    month = models.DateField()
+    sessions_taken = models.PositiveIntegerField(default=0)
+    holiday_sessions = models.PositiveIntegerField(default=0)
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['class_section', 'academic_year', 'month'],
+                                    name='unique_section_attendance_monthly')
+        ]
+        indexes = [
+            models.Index(fields=['academic_year', 'month']),
+        ]
+
+        db_table = 'section_attendance_monthly'
+
+
+class StudentAttendanceMonthly(models.Model):
+    """Attendance totals of a student in a class section for one month."""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE,
+                                related_name="monthly_attendance")
+    class_section = models.ForeignKey('classes.SchoolSection', on_delete=models.CASCADE)
+    academic_year = models.ForeignKey('academics.SchoolAcademicYear', on_delete=models.CASCADE,
+                                      null=True, blank=True)
+    month = models.DateField()
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'class_section', 'academic_year', 'month'],
+                                    name='unique_student_attendance_monthly')
+        ]
+        indexes = [
+            models.Index(fields=['class_section', 'academic_year', 'month']),
+        ]
+
+        db_table = 'student_attendance_monthly'
@@ -0,0 +1,215 @@
+"""Maintenance of the attendance rollup tables."""
+
+import logging
+from datetime import date as date_type, datetime
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from classes.models import SchoolSection
+from student.models import (
+    SectionAttendanceDaily,
+    SectionAttendanceMonthly,
+    StudentAttendance,
+    StudentAttendanceData,
+    StudentAttendanceMonthly
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AttendanceRollup:
+    """
+    Keeps the daily and monthly attendance rollups in sync with the
+    attendance sheets.
+
+    refresh() recomputes the rows affected by one section/date/session: the
+    daily row from the sheet itself, then the section and student monthly
+    rows from that month's data only. Callers run it in the same
+    transaction as the attendance write. The section row is locked for the
+    rest of that transaction, so concurrent saves for one section recompute
+    one after the other and each sees the other's committed attendance.
+    """
+
+    @staticmethod
+    def _month_bounds(day):
+        month = day.replace(day=1)
+        if month.month == 12:
+            next_month = month.replace(year=month.year + 1, month=1)
+        else:
+            next_month = month.replace(month=month.month + 1)
+        return month, next_month
+
+    def refresh(self, school_db_name, class_section_id, academic_year_id, date, session):
+        """Recompute the rollups touched by one section, date and session."""
+        if not isinstance(date, date_type):
+            date = datetime.strptime(date, "%Y-%m-%d").date()
+
+        with transaction.atomic(using=school_db_name):
+            # The monthly rows may not exist yet, so the section is the row to lock
+            list(SchoolSection.objects.using(school_db_name).select_for_update().filter(
+                pk=class_section_id
+            ).values_list('pk', flat=True))
+            self._refresh_daily(school_db_name, class_section_id, date, session)
+            month, next_month = self._month_bounds(date)
+            self._refresh_section_month(school_db_name, class_section_id, academic_year_id, month, next_month)
+            self._refresh_student_month(school_db_name, class_section_id, academic_year_id, month, next_month)
+
+    def _refresh_daily(self, school_db_name, class_section_id, date, session):
+        attendance = StudentAttendance.objects.using(school_db_name).filter(
+            class_section_id=class_section_id,
+            date=date,
+            session=session
+        ).annotate(
+            present=Count('attendance_data', filter=Q(attendance_data__is_present=True)),
+            absent=Count('attendance_data', filter=Q(attendance_data__is_present=False))
+        ).values('academic_year_id', 'is_holiday', 'present', 'absent').first()
+
+        if attendance is None:
+            SectionAttendanceDaily.objects.using(school_db_name).filter(
+                class_section_id=class_section_id,
+                date=date,
+                session=session
+            ).delete()
+            return
+
+        is_holiday = attendance['is_holiday']
+        SectionAttendanceDaily.objects.using(school_db_name).update_or_create(
+            class_section_id=class_section_id,
+            date=date,
+            session=session,
+            defaults={
+                "academic_year_id": attendance['academic_year_id'],
+                "is_holiday": is_holiday,
+                "present_count": 0 if is_holiday else attendance['present'],
+                "absent_count": 0 if is_holiday else attendance['absent'],
+            }
+        )
+
+    def _refresh_section_month(self, school_db_name, class_section_id, academic_year_id, month, next_month):
+        totals = SectionAttendanceDaily.objects.using(school_db_name).filter(
+            class_section_id=class_section_id,
+            academic_year_id=academic_year_id,
+            date__gte=month,
+            date__lt=next_month
+        ).aggregate(
+            sessions_taken=Count('id', filter=Q(is_holiday=False)),
+            holiday_sessions=Count('id', filter=Q(is_holiday=True)),
+            present_count=Sum('present_count'),
+            absent_count=Sum('absent_count')
+        )
+        SectionAttendanceMonthly.objects.using(school_db_name).update_or_create(
+            class_section_id=class_section_id,
+            academic_year_id=academic_year_id,
+            month=month,
+            defaults={
+                "sessions_taken": totals['sessions_taken'],
+                "holiday_sessions": totals['holiday_sessions'],
+                "present_count": totals['present_count'] or 0,
+                "absent_count": totals['absent_count'] or 0,
+            }
+        )
+
+    def _refresh_student_month(self, school_db_name, class_section_id, academic_year_id, month, next_month):
+        rows = StudentAttendanceData.objects.using(school_db_name).filter(
+            attendance__class_section_id=class_section_id,
+            attendance__academic_year_id=academic_year_id,
+            attendance__date__gte=month,
+            attendance__date__lt=next_month,
+            attendance__is_holiday=False
+        ).values('student_id').annotate(
+            present=Count('id', filter=Q(is_present=True)),
+            absent=Count('id', filter=Q(is_present=False))
+        )
+        StudentAttendanceMonthly.objects.using(school_db_name).filter(
+            class_section_id=class_section_id,
+            academic_year_id=academic_year_id,
+            month=month
+        ).delete()
+        StudentAttendanceMonthly.objects.using(school_db_name).bulk_create([
+            StudentAttendanceMonthly(
+                student_id=row['student_id'],
+                class_section_id=class_section_id,
+                academic_year_id=academic_year_id,
+                month=month,
+                present_count=row['present'],
+                absent_count=row['absent']
+            )
+            for row in rows
+        ])
+
+    def rebuild(self, school_db_name):
+        """Recompute every attendance rollup of a tenant database."""
+        SectionAttendanceDaily.objects.using(school_db_name).all().delete()
+        SectionAttendanceMonthly.objects.using(school_db_name).all().delete()
+        StudentAttendanceMonthly.objects.using(school_db_name).all().delete()
+
+        sheets = StudentAttendance.objects.using(school_db_name).filter(
+            class_section_id__isnull=False
+        ).values(
+            'class_section_id', 'academic_year_id', 'date', 'session', 'is_holiday'
+        ).annotate(
+            present=Count('attendance_data', filter=Q(attendance_data__is_present=True)),
+            absent=Count('attendance_data', filter=Q(attendance_data__is_present=False))
+        )
+        SectionAttendanceDaily.objects.using(school_db_name).bulk_create([
+            SectionAttendanceDaily(
+                class_section_id=sheet['class_section_id'],
+                academic_year_id=sheet['academic_year_id'],
+                date=sheet['date'],
+                session=sheet['session'],
+                is_holiday=sheet['is_holiday'],
+                present_count=0 if sheet['is_holiday'] else sheet['present'],
+                absent_count=0 if sheet['is_holiday'] else sheet['absent']
+            )
+            for sheet in sheets
+        ], batch_size=1000)
+
+        section_months = SectionAttendanceDaily.objects.using(school_db_name).annotate(
+            month=TruncMonth('date')
+        ).values('class_section_id', 'academic_year_id', 'month').annotate(
+            sessions_taken=Count('id', filter=Q(is_holiday=False)),
+            holiday_sessions=Count('id', filter=Q(is_holiday=True)),
+            present=Sum('present_count'),
+            absent=Sum('absent_count')
+        )
+        SectionAttendanceMonthly.objects.using(school_db_name).bulk_create([
+            SectionAttendanceMonthly(
+                class_section_id=row['class_section_id'],
+                academic_year_id=row['academic_year_id'],
+                month=row['month'],
+                sessions_taken=row['sessions_taken'],
+                holiday_sessions=row['holiday_sessions'],
+                present_count=row['present'] or 0,
+                absent_count=row['absent'] or 0
+            )
+            for row in section_months
+        ], batch_size=1000)
+
+        student_months = StudentAttendanceData.objects.using(school_db_name).filter(
+            attendance__class_section_id__isnull=False,
+            attendance__is_holiday=False
+        ).annotate(
+            month=TruncMonth('attendance__date')
+        ).values(
+            'student_id', 'attendance__class_section_id', 'attendance__academic_year_id', 'month'
+        ).annotate(
+            present=Count('id', filter=Q(is_present=True)),
+            absent=Count('id', filter=Q(is_present=False))
+        )
+        StudentAttendanceMonthly.objects.using(school_db_name).bulk_create([
+            StudentAttendanceMonthly(
+                student_id=row['student_id'],
+                class_section_id=row['attendance__class_section_id'],
+                academic_year_id=row['attendance__academic_year_id'],
+                month=row['month'],
+                present_count=row['present'],
+                absent_count=row['absent']
+            )
+            for row in student_months
+        ], batch_size=1000)
+        logger.info(f"Rebuilt attendance rollups in {school_db_name}")
+
+
+attendance_rollup = AttendanceRollup()
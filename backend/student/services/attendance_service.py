@@ -8,10 +8,12 @@ from rest_framework.response import Response
 from rest_framework import status
 
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Prefetch
 from core.common_modules.common_functions import CommonFunctions
 from core.models import User
 from student.models import StudentAttendance,StudentClassAssignment,StudentAttendanceData,Student
+from student.services.attendance_rollup import attendance_rollup
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +21,9 @@ logger = logging.getLogger(__name__)
 class AttendanceService:
     """Service for handling attendance-related operations."""
 
+    SESSIONS = ['M', 'A']
+    MAX_HISTORY_DAYS = 366
+
     def __init__(self):
         pass
 
@@ -51,42 +56,16 @@ class AttendanceService:
                 return Response({"error": "Invalid session. Must be 'M' or 'A'."},
                                 status=status.HTTP_400_BAD_REQUEST)
 
-            obj, created = StudentAttendance.objects.using(school_db_name).update_or_create(
-                    date=attendance_date,
-                    session=session,
-                    academic_year_id=academic_year_id,
-                    class_section_id=class_section_id,
-                    defaults={
-                        "updated_by_user_id": user_id
-                    }
+            with transaction.atomic(using=school_db_name):
+                attendance_obj = self.save_section_attendance(
+                    school_db_name, class_section_id, attendance_date, session,
+                    academic_year_id, attendance_data, user_id
                 )
-
-            if created:
-                obj.taken_by_user_id = user_id
-            obj.save(using=school_db_name)
-
-            if obj.is_holiday:
+            if attendance_obj is None:
                 logger.error("Attendance cannot be marked on a holiday.")
                 return Response({"error": "Attendance cannot be marked on a holiday."},
                                 status=status.HTTP_400_BAD_REQUEST)
 
-            for data in attendance_data:
-                student_id = data.get('student_id')
-                is_present = data.get('is_present')
-                remarks = data.get('remarks', None)
-
-                if not student_id:
-                    logger.error("Missing student_id in attendance data.")
-                    continue
-
-                StudentAttendanceData.objects.using(school_db_name).update_or_create(
-                    attendance=obj,
-                    student_id=student_id,
-                    defaults={
-                        "is_present": is_present,
-                        "remarks": remarks
-                    }
-                )
             return Response({"message": "Attendance marked/updated successfully."},
                             status=status.HTTP_200_OK)
 
@@ -95,6 +74,114 @@ class AttendanceService:
             return Response({"error": "Failed to mark attendance"},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def mark_bulk_attendance(self, request):
+        """Mark or update attendance for several class sections and sessions at once."""
+        try:
+            school_id = request.data.get('school_id') or getattr(request.user, 'school_id', None)
+            entries = request.data.get('sections', [])
+            default_date = request.data.get('date')
+            default_session = request.data.get('session', 'M')
+            academic_year_id = request.data.get('academic_year_id', 1)
+            user_id = getattr(request.user, 'id', None)
+
+            if not school_id or not entries:
+                logger.error("Missing required fields in bulk attendance data.")
+                return Response({"error": "Missing required fields."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            school_db_name = CommonFunctions.get_school_db_name(school_id)
+
+            validated = []
+            for index, entry in enumerate(entries):
+                class_section_id = entry.get('class_section_id')
+                date_str = entry.get('date', default_date)
+                session = entry.get('session', default_session)
+                attendance_data = entry.get('attendance_data', [])
+                if not all([class_section_id, date_str, session, attendance_data]):
+                    return Response({"error": f"Missing required fields in entry {index}."},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                if session not in ['M', 'A']:
+                    return Response({"error": f"Invalid session in entry {index}. Must be 'M' or 'A'."},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                try:
+                    attendance_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+                except ValueError:
+                    return Response({"error": f"Invalid date in entry {index}. Use YYYY-MM-DD."},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                validated.append((class_section_id, attendance_date, session, attendance_data))
+
+            results = []
+            with transaction.atomic(using=school_db_name):
+                for class_section_id, attendance_date, session, attendance_data in validated:
+                    attendance_obj = self.save_section_attendance(
+                        school_db_name, class_section_id, attendance_date, session,
+                        academic_year_id, attendance_data, user_id
+                    )
+                    results.append({
+                        "class_section_id": class_section_id,
+                        "date": attendance_date.isoformat(),
+                        "session": session,
+                        "status": "holiday" if attendance_obj is None else "saved"
+                    })
+
+            return Response({"message": "Attendance marked/updated successfully.",
+                             "data": results},
+                            status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.error("Error marking bulk attendance: %s", e)
+            return Response({"error": "Failed to mark attendance"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def save_section_attendance(self, school_db_name, class_section_id, attendance_date, session,
+                                academic_year_id, attendance_data, user_id):
+        """
+        Upsert one section/session attendance sheet. Must run inside a
+        transaction on the school database. Returns None for holidays.
+        """
+        attendance_obj, created = StudentAttendance.objects.using(school_db_name).update_or_create(
+            date=attendance_date,
+            session=session,
+            academic_year_id=academic_year_id,
+            class_section_id=class_section_id,
+            defaults={
+                "updated_by_user_id": user_id
+            }
+        )
+
+        if created:
+            attendance_obj.taken_by_user_id = user_id
+            attendance_obj.save(using=school_db_name)
+
+        if attendance_obj.is_holiday:
+            return None
+
+        # Postgres rejects an upsert that touches the same row twice, so
+        # only the last entry per student is kept.
+        records = {}
+        for data in attendance_data:
+            student_id = data.get('student_id')
+            if not student_id:
+                logger.error("Missing student_id in attendance data.")
+                continue
+            records[student_id] = StudentAttendanceData(
+                attendance=attendance_obj,
+                student_id=student_id,
+                is_present=data.get('is_present'),
+                remarks=data.get('remarks', None)
+            )
+
+        StudentAttendanceData.objects.using(school_db_name).bulk_create(
+            records.values(),
+            update_conflicts=True,
+            unique_fields=['attendance', 'student'],
+            update_fields=['is_present', 'remarks', 'updated_at']
+        )
+        attendance_rollup.refresh(
+            school_db_name, class_section_id, academic_year_id, attendance_date, session
+        )
+        return attendance_obj
+
     def get_attendance_by_class_section(self, request):
         """Retrieve attendance records for a class section."""
         try:
@@ -263,6 +350,128 @@ class AttendanceService:
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+    def get_attendance_history(self, request):
+        """
+        Return a section's attendance over a date range as one compact string
+        per student and session. Each character is a day of the range:
+        P present, A absent, H holiday, - not taken. With encoding=rle the
+        strings are run-length encoded, e.g. "5P1A2H". The section level
+        strings mark days on which attendance was taken with T.
+        """
+        try:
+            class_section_id = request.GET.get('class_section_id')
+            start_date = request.GET.get('start_date')
+            end_date = request.GET.get('end_date')
+            academic_year_id = request.GET.get('academic_year_id', 1)
+            encoding = request.GET.get('encoding', 'rle')
+            school_id = request.GET.get('school_id') or getattr(request.user, 'school_id', None)
+
+            if not all([class_section_id, start_date, end_date, academic_year_id, school_id]):
+                logger.error("Missing required parameters.")
+                return Response({"error": "Missing required parameters."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if encoding not in ['rle', 'raw']:
+                return Response({"error": "Invalid encoding. Must be 'rle' or 'raw'."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                start = datetime.strptime(start_date, "%Y-%m-%d").date()
+                end = datetime.strptime(end_date, "%Y-%m-%d").date()
+            except ValueError:
+                return Response({"error": "Invalid date. Use YYYY-MM-DD."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            num_days = (end - start).days + 1
+            if num_days < 1 or num_days > self.MAX_HISTORY_DAYS:
+                return Response({"error": f"Date range must cover 1 to {self.MAX_HISTORY_DAYS} days."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            school_db_name = CommonFunctions.get_school_db_name(school_id)
+
+            student_ids = list(StudentClassAssignment.objects.using(school_db_name).filter(
+                class_instance_id=class_section_id,
+                academic_year_id=academic_year_id
+            ).values_list("student_id", flat=True))
+
+            users = User.objects.filter(id__in=student_ids).values("id", "first_name", "last_name")
+            user_map = {u["id"]: f'{u["first_name"]} {u["last_name"]}' for u in users}
+
+            student_roll_map = dict(
+                Student.objects.using(school_db_name).filter(student_id__in=student_ids)
+                .values_list('student_id', 'roll_number')
+            )
+
+            sessions = self.SESSIONS
+            section_days = {session: ['-'] * num_days for session in sessions}
+            student_days = {
+                student_id: {session: ['-'] * num_days for session in sessions}
+                for student_id in student_ids
+            }
+
+            attendance_qs = StudentAttendance.objects.using(school_db_name).filter(
+                class_section_id=class_section_id,
+                academic_year_id=academic_year_id,
+                date__range=(start, end)
+            )
+            taken_ids = []
+            for attendance in attendance_qs.values('id', 'date', 'session', 'is_holiday'):
+                offset = (attendance['date'] - start).days
+                if attendance['is_holiday']:
+                    section_days[attendance['session']][offset] = 'H'
+                    for days in student_days.values():
+                        days[attendance['session']][offset] = 'H'
+                else:
+                    section_days[attendance['session']][offset] = 'T'
+                    taken_ids.append(attendance['id'])
+
+            records = StudentAttendanceData.objects.using(school_db_name).filter(
+                attendance_id__in=taken_ids,
+                student_id__in=student_ids
+            ).values_list('attendance__date', 'attendance__session', 'student_id', 'is_present')
+            for date, session, student_id, is_present in records.iterator(chunk_size=2000):
+                student_days[student_id][session][(date - start).days] = 'P' if is_present else 'A'
+
+            encode = self._run_length_encode if encoding == 'rle' else ''.join
+            students = []
+            for student_id in student_ids:
+                days = student_days[student_id]
+                student_record = {
+                    "student_id": student_id,
+                    "roll_number": student_roll_map.get(student_id),
+                    "student_name": user_map.get(student_id, "Unknown"),
+                    "present": sum(days[session].count('P') for session in sessions),
+                    "absent": sum(days[session].count('A') for session in sessions),
+                }
+                for session in sessions:
+                    student_record[session] = encode(days[session])
+                students.append(student_record)
+
+            output = {
+                "class_section_id": class_section_id,
+                "academic_year_id": academic_year_id,
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+                "encoding": encoding,
+                "sessions": {session: encode(section_days[session]) for session in sessions},
+                "attendance_data": students,
+            }
+            return Response({"data": output}, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.error("Error retrieving attendance history: %s", e)
+            return Response({"error": "Failed to retrieve attendance history"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @staticmethod
+    def _run_length_encode(days):
+        """Encode a list of day codes as "<count><code>" runs."""
+        runs = []
+        for code in days:
+            if runs and runs[-1][1] == code:
+                runs[-1][0] += 1
+            else:
+                runs.append([1, code])
+        return ''.join(f"{count}{code}" for count, code in runs)
+
     def mark_holiday(self, request):
         """Mark a specific date as a holiday."""
         try:
@@ -299,15 +508,19 @@ class AttendanceService:
                 if holiday_exists:
                     already_marked.append(sess)
                 else:
-                    attendance_obj, _ = StudentAttendance.objects.using(school_db_name).get_or_create(
-                        date=date,
-                        class_section_id=class_section_id,
-                        academic_year_id=academic_year_id,
-                        session=sess,
-                    )
-                    attendance_obj.is_holiday = True
-                    attendance_obj.updated_by_user_id = request.user.id
-                    attendance_obj.save(using=school_db_name)
+                    with transaction.atomic(using=school_db_name):
+                        attendance_obj, _ = StudentAttendance.objects.using(school_db_name).get_or_create(
+                            date=date,
+                            class_section_id=class_section_id,
+                            academic_year_id=academic_year_id,
+                            session=sess,
+                        )
+                        attendance_obj.is_holiday = True
+                        attendance_obj.updated_by_user_id = request.user.id
+                        attendance_obj.save(using=school_db_name)
+                        attendance_rollup.refresh(
+                            school_db_name, class_section_id, academic_year_id, date, sess
+                        )
                     newly_marked.append(sess)
             session_mapping = {
                 "M": "Morning",
@@ -363,7 +576,11 @@ class AttendanceService:
                 )
 
                 if holiday_qs.exists():
-                    holiday_qs.update(is_holiday=False)
+                    with transaction.atomic(using=school_db_name):
+                        holiday_qs.update(is_holiday=False)
+                        attendance_rollup.refresh(
+                            school_db_name, class_section_id, academic_year_id, date, sess
+                        )
                     newly_unmarked.append(sess)
                 else:
                     already_unmarked.append(sess)
@@ -16,6 +16,7 @@ from academics.models import SchoolAcademicYear
 
 from core.common_modules.send_email import EmailService
 from core.common_modules.common_functions import CommonFunctions
+from core.common_modules.tenant_replicas import tenant_replicas
 from core.models import User,Role
 
 
@@ -348,6 +349,7 @@ class StudentService:
             if not self.school_db_name:
                 return JsonResponse({"error": "School not found or school is inactive."},
                                     status=status.HTTP_404_NOT_FOUND)
+            self.school_db_name = tenant_replicas.read_alias(self.school_db_name)
 
             students = Student.objects.using(self.school_db_name).filter(is_active=is_active)
 
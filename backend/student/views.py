@@ -81,6 +81,8 @@ class AttendanceView(APIView):
             return AttendanceService().get_attendance_by_class_section(request)
         elif action == "getPastAttendance":
             return AttendanceService().get_past_attendance(request)
+        elif action == "getAttendanceHistory":
+            return AttendanceService().get_attendance_history(request)
         return Response({"error": "Invalid GET action"}, status=status.HTTP_400_BAD_REQUEST)
 
     def post(self, request, action=None):
@@ -90,6 +92,8 @@ class AttendanceView(APIView):
 
         if action == "markAttendance":
             return AttendanceService().mark_attendance(request)
+        elif action == "markBulkAttendance":
+            return AttendanceService().mark_bulk_attendance(request)
         elif action == "markHoliday":
             return AttendanceService().mark_holiday(request)
         elif action == "unmarkHoliday":
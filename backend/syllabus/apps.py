@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class SyllabusConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'syllabus'
+
+    def ready(self):
+        from core.common_modules.llm_job_queue import llm_job_queue
+        from syllabus.services.ai_assistant_service import CHAT_SUMMARY_JOB, AiAssistantService
+        from syllabus.services.syllabus_service import LESSON_PLAN_JOB, SyllabusService
+        llm_job_queue.register_handler(LESSON_PLAN_JOB, SyllabusService().run_lesson_plan_job)
+        llm_job_queue.register_handler(CHAT_SUMMARY_JOB, AiAssistantService.run_chat_summary_job)
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def backfill_chapter_progress(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    SchoolLessonPlanDay = apps.get_model('syllabus', 'SchoolLessonPlanDay')
+    SchoolChapterProgress = apps.get_model('syllabus', 'SchoolChapterProgress')
+
+    rows = (
+        SchoolLessonPlanDay.objects.using(db_alias)
+        .values('chapter_id', 'chapter__subject_id', 'class_section_id')
+        .annotate(
+            total_days=Count('id'),
+            completed_days=Count('id', filter=Q(status='completed')),
+            last_completed_at=Max('updated_at', filter=Q(status='completed'))
+        )
+    )
+    SchoolChapterProgress.objects.using(db_alias).bulk_create([
+        SchoolChapterProgress(
+            chapter_id=row['chapter_id'],
+            class_section_id=row['class_section_id'],
+            subject_id=row['chapter__subject_id'],
+            total_days=row['total_days'],
+            completed_days=row['completed_days'],
+            is_completed=row['total_days'] > 0 and row['total_days'] == row['completed_days'],
+            last_completed_at=row['last_completed_at'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classes', '0004_remove_schoolsection_unique_class_instance_section_and_more'),
+        ('syllabus', '0007_alter_schoollessonplanday_taxonomy_alignment'),
+        ('teacher', '0007_teacherdiary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchoolChapterProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_days', models.PositiveIntegerField(default=0)),
+                ('completed_days', models.PositiveIntegerField(default=0)),
+                ('is_completed', models.BooleanField(default=False)),
+                ('last_completed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('chapter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='section_progress', to='syllabus.schoolchapter')),
+                ('class_section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chapter_progress', to='classes.schoolsection')),
+                ('subject', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='teacher.subject')),
+            ],
+            options={
+                'db_table': 'school_chapter_progress',
+                'indexes': [models.Index(fields=['class_section', 'subject'], name='school_chap_class_s_c40a2d_idx')],
+                'unique_together': {('chapter', 'class_section')},
+            },
+        ),
+        migrations.RunPython(backfill_chapter_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('syllabus', '0009_chatsession_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='whiteboarddatachunk',
+            name='page',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='whiteboarddatachunk',
+            constraint=models.UniqueConstraint(fields=('session', 'page'), name='unique_session_page'),
+        ),
+    ]
@@ -85,6 +85,33 @@ class SchoolLessonPlanDay(models.Model):
         db_table = 'school_lesson_plan_day'
 
 
+class SchoolChapterProgress(models.Model):
+    """Lesson plan day rollup per chapter and class section."""
+    chapter = models.ForeignKey(
+        SchoolChapter,
+        related_name='section_progress',
+        on_delete=models.CASCADE
+    )
+    class_section = models.ForeignKey(
+        SchoolSection,
+        related_name='chapter_progress',
+        on_delete=models.CASCADE
+    )
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, null=True, blank=True)
+    total_days = models.PositiveIntegerField(default=0)
+    completed_days = models.PositiveIntegerField(default=0)
+    is_completed = models.BooleanField(default=False)
+    last_completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'school_chapter_progress'
+        unique_together = ('chapter', 'class_section')
+        indexes = [
+            models.Index(fields=['class_section', 'subject']),
+        ]
+
+
 class Topic(models.Model):
     lesson_plan_day = models.ForeignKey(
         SchoolLessonPlanDay,
@@ -113,6 +140,8 @@ class ChatSession(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    summary = models.TextField(blank=True, default="")
+    summarized_message_id = models.IntegerField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
 
     class Meta:
@@ -168,6 +197,7 @@ class WhiteboardDataChunk(models.Model):
     )
     data = models.JSONField(default=list)  # list of strokes
     chunk_index = models.PositiveIntegerField()  # order of chunks
+    page = models.CharField(max_length=64, null=True, blank=True)  # page of a scene snapshot chunk
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -178,6 +208,10 @@ class WhiteboardDataChunk(models.Model):
                 fields=['session', 'chunk_index'],
                 name='unique_session_chunk_index'
             ),
+            models.UniqueConstraint(
+                fields=['session', 'page'],
+                name='unique_session_page'
+            ),
         ]
         ordering = ["chunk_index"]
         indexes = [
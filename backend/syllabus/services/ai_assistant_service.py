@@ -4,23 +4,29 @@
 import logging
 import json
 from asgiref.sync import sync_to_async,async_to_sync
-import asyncio
 
 from django.http import JsonResponse, StreamingHttpResponse
+from django.db import IntegrityError
 from django.db.models import Count
-from django.db import transaction
 from core.common_modules.common_functions import CommonFunctions
+from core.common_modules.llm_job_queue import llm_job_queue, PermanentJobError
+from core.common_modules.tenant_registry import tenant_registry
 
 from syllabus.models import ChatSession, ChatMessage, SchoolLessonPlanDay, Topic
 from core.lang_chain.lang_chain import LangChainService
+from syllabus.services.assistant_context_cache import assistant_context_cache
 logger = logging.getLogger(__name__)
 
+CHAT_SUMMARY_JOB = "chat_summary"
 
 class AiAssistantService:
     """Ai Assistant Service"""
 
-    def __init__(self, request):
+    def __init__(self, request=None, school_db_name=None):
         self.request = request
+        if request is None:
+            self.school_db_name = school_db_name
+            return
         self.school_id = request.data.get("school_id") or request.GET.get("school_id") or getattr(request.user, 'school_id', None)
         self.school_db_name = CommonFunctions.get_school_db_name(self.school_id)
 
@@ -92,92 +98,178 @@ class AiAssistantService:
                          lesson_plan_day_id, e)
             return JsonResponse({"error": "Unable to retrieve chat"}, status=500)
 
+    def get_lesson_plan_context(self, lesson_plan_day_id):
+        """Return the lesson plan day and the lesson plan the assistant answers about,
+        or (lesson_plan_day, None) when the day has no topics."""
+        lesson_plan_day = (
+            SchoolLessonPlanDay.objects.using(self.school_db_name)
+            .select_related(
+                "chapter__class_number",
+            )
+            .annotate(
+                total_days=Count("chapter__school_chapter_lesson_plan_days")
+            )
+            .get(id=lesson_plan_day_id)
+        )
+        topics = Topic.objects.using(self.school_db_name).filter(
+            lesson_plan_day=lesson_plan_day
+        ).order_by("created_at")
+        if not topics:
+            return lesson_plan_day, None
+
+        topics_data = [
+            {
+                "title": topic.title,
+                "summary": topic.summary,
+                "time_minutes": topic.time_minutes,
+            }
+            for topic in topics
+        ]
+
+        lesson_plan = {
+            "class_number": lesson_plan_day.chapter.class_number.id if lesson_plan_day.chapter.class_number else None,
+            "chapter_number": lesson_plan_day.chapter.chapter_number,
+            "chapter_name": lesson_plan_day.chapter.chapter_name,
+            "total_days": lesson_plan_day.total_days,
+            "lession_plan": {"day": lesson_plan_day.day,"topics": topics_data},
+            "learning_outcomes": lesson_plan_day.learning_outcomes,
+            "real_world_applications": lesson_plan_day.real_world_applications,
+            "taxonomy_alignment": lesson_plan_day.taxonomy_alignment,
+        }
+        return lesson_plan_day, lesson_plan
+
+    def prepare_chat(self, user, lesson_plan_day_id, user_message):
+        """Validate a chat request and return (session, system_instruction) or (None, error JsonResponse).
+
+        The rendered system instruction is cached per lesson plan day, so repeat
+        turns skip the lesson plan queries.
+        """
+        if not user_message or not lesson_plan_day_id or not user:
+            return None, JsonResponse({"error": "Required fields are missing"}, status=400)
+
+        system_instruction = assistant_context_cache.get(self.school_db_name, lesson_plan_day_id)
+        if system_instruction is None:
+            try:
+                lesson_plan_day, lesson_plan = self.get_lesson_plan_context(lesson_plan_day_id)
+            except SchoolLessonPlanDay.DoesNotExist:
+                return None, JsonResponse({"status": "error", "message": "Lesson plan day not found"},
+                                          status=404)
+            if lesson_plan is None:
+                return None, JsonResponse({"error": "No topics found for this lesson plan day"}, status=404)
+            system_instruction = LangChainService.render_assistant_instruction(lesson_plan)
+            assistant_context_cache.set(self.school_db_name, lesson_plan_day_id, system_instruction)
+
+        try:
+            session, created = ChatSession.objects.using(self.school_db_name).get_or_create(
+                        user_id=user.id, lesson_plan_day_id=lesson_plan_day_id, is_active=True
+                    )
+        except IntegrityError:
+            # The lesson plan day was deleted after its context was cached.
+            assistant_context_cache.invalidate(self.school_db_name, lesson_plan_day_id)
+            return None, JsonResponse({"status": "error", "message": "Lesson plan day not found"},
+                                      status=404)
+        return session, system_instruction
+
+    async def stream_answer(self, session, system_instruction, user_message):
+        """Yield the assistant's answer token by token and save the exchange once it is complete.
+
+        The conversation summary is updated by a background job queued after
+        the exchange is saved, so it never delays the answer; if the job is
+        rejected or fails, the next turn catches up on the backlog.
+        """
+        response_parts = []
+        lang_chain_service = LangChainService(temperature=0.1)
+        streaming_response = lang_chain_service.process_user_question(
+                session, self.school_db_name, system_instruction, user_message)
+        async for event in streaming_response:
+            if event["type"] == "token":
+                response_parts.append(event["data"])
+                yield event
+
+        await self.save_chat_messages(session, user_message, "".join(response_parts))
+        await sync_to_async(self.queue_summary_update)(session)
+        yield {"type": "final"}
+
+    def queue_summary_update(self, session):
+        """Queue the conversation summary update of a chat session on the LLM job queue."""
+        try:
+            job = llm_job_queue.submit(
+                CHAT_SUMMARY_JOB,
+                {"school_db_name": self.school_db_name, "session_id": session.pk}
+            )
+            if job is None:
+                logger.warning("LLM job queue is full, skipping the summary update of session %s", session.pk)
+        except Exception as e:
+            logger.error("Error queueing the summary update of session %s: %s", session.pk, e)
+
+    @staticmethod
+    def run_chat_summary_job(school_db_name, session_id):
+        """Job handler of the LLM job queue for conversation summary updates."""
+        tenant_registry.ensure_registered(school_db_name)
+        session = ChatSession.objects.using(school_db_name).filter(pk=session_id).first()
+        if session is None:
+            raise PermanentJobError("Chat session not found.")
+        async_to_sync(LangChainService(temperature=0.1).update_conversation_summary)(school_db_name, session)
+
     def chat_with_assistant(self):
         """Chat with the AI assistant"""
         try:
             user_message = self.request.data.get("message")
             lesson_plan_day_id = self.request.data.get("lesson_plan_day_id")
-            user = self.request.user
 
-            if not user_message or not lesson_plan_day_id or not user:
-                return JsonResponse({"error": "Required fields are missing"}, status=400)
+            session, system_instruction = self.prepare_chat(self.request.user, lesson_plan_day_id, user_message)
+            if session is None:
+                return system_instruction
 
             try:
-                lesson_plan_day = (
-                    SchoolLessonPlanDay.objects.using(self.school_db_name)
-                    .select_related(
-                        "chapter__class_number",
-                    )
-                    .annotate(
-                        total_days=Count("chapter__school_chapter_lesson_plan_days")
-                    )
-                    .get(id=lesson_plan_day_id)
-                )
-                topics = Topic.objects.using(self.school_db_name).filter(
-                    lesson_plan_day=lesson_plan_day
-                ).order_by("created_at")
-                if not topics:
-                    return JsonResponse({"error": "No topics found for this lesson plan day"}, status=404)
-                
-                topics_data = [
-                    {
-                        "title": topic.title,
-                        "summary": topic.summary,
-                        "time_minutes": topic.time_minutes,
-                    }
-                    for topic in topics
-                ]
-
-                lesson_plan = {
-                    "class_number": lesson_plan_day.chapter.class_number.id if lesson_plan_day.chapter.class_number else None,
-                    "chapter_number": lesson_plan_day.chapter.chapter_number,
-                    "chapter_name": lesson_plan_day.chapter.chapter_name,
-                    "total_days": lesson_plan_day.total_days,
-                    "lession_plan": {"day": lesson_plan_day.day,"topics": topics_data},
-                    "learning_outcomes": lesson_plan_day.learning_outcomes,
-                    "real_world_applications": lesson_plan_day.real_world_applications,
-                    "taxonomy_alignment": lesson_plan_day.taxonomy_alignment,
-                }
-                with transaction.atomic(using=self.school_db_name):
-                    session, created = ChatSession.objects.using(self.school_db_name).get_or_create(
-                                user_id=user.id, lesson_plan_day=lesson_plan_day, is_active=True
-                            )
-                    
-                    response = ""
-                    async def streaming_chat():
-                        nonlocal response
-                        streaming_response = LangChainService(temperature=0.1).process_user_question(
-                                session, self.school_db_name, lesson_plan, user_message)
-                        async for event in streaming_response:
-                            if event["type"] == "token":
-                                response += event["data"]
-                                yield json.dumps({"data": event["data"], "status": "streaming"}) + "\n"
-
-                        await self.save_chat_messages(session, user_message, response)
-
-                        yield json.dumps({"status": "success"}) + "\n"
-
-                    async def _consume():
-                        async for chunk in streaming_chat():
-                            pass
-
-                    async_to_sync(_consume)()
-
-                return JsonResponse({"data": response }, status=200)
-                # return StreamingHttpResponse(streaming_chat(), content_type='text/event-stream')
+                response = []
+
+                async def _consume():
+                    async for event in self.stream_answer(session, system_instruction, user_message):
+                        if event["type"] == "token":
+                            response.append(event["data"])
+
+                async_to_sync(_consume)()
+
+                return JsonResponse({"data": "".join(response)}, status=200)
             except Exception as e:
                 logger.error("Error processing user message: %s", e)
                 return JsonResponse({"error": "Unable to process your request at the moment"}, status=500)
-        except ChatSession.DoesNotExist:
-            return JsonResponse({"status": "error", "message": "Chat session not found"},
-                                status=404)
-        except SchoolLessonPlanDay.DoesNotExist:
-            return JsonResponse({"status": "error", "message": "Lesson plan day not found"},
-                                status=404)
         except Exception as e:
             logger.error("Error in chat_with_assistant: %s", e)
             return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
+    def stream_chat_with_assistant(self):
+        """Chat with the AI assistant, streaming the answer as server-sent events"""
+        try:
+            user_message = self.request.data.get("message")
+            lesson_plan_day_id = self.request.data.get("lesson_plan_day_id")
+
+            session, system_instruction = self.prepare_chat(self.request.user, lesson_plan_day_id, user_message)
+            if session is None:
+                return system_instruction
+
+            async def event_stream():
+                try:
+                    async for event in self.stream_answer(session, system_instruction, user_message):
+                        if event["type"] == "token":
+                            payload = {"data": event["data"], "status": "streaming"}
+                        else:
+                            payload = {"status": "success"}
+                        yield f"data: {json.dumps(payload)}\n\n"
+                except Exception as e:
+                    logger.error("Error streaming assistant response: %s", e)
+                    payload = {"status": "error", "message": "Unable to process your request at the moment"}
+                    yield f"data: {json.dumps(payload)}\n\n"
+
+            response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'
+            return response
+        except Exception as e:
+            logger.error("Error in stream_chat_with_assistant: %s", e)
+            return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
     @sync_to_async
     def save_chat_messages(self, session, user_message, ai_response):
         """Save chat response"""
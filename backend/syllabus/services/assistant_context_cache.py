@@ -0,0 +1,60 @@
+"""Cached assistant system context per lesson plan day."""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class AssistantContextCache:
+    """
+    Stores the rendered assistant system instruction of a lesson plan day so
+    chat turns skip the lesson plan queries. Entries are invalidated when the
+    day or its topics are edited, or when the lesson plan is saved again.
+    """
+
+    CACHE_KEY_PREFIX = "assistant_context"
+
+    def __init__(self):
+        config = settings.ASSISTANT_CONTEXT_CACHE_CONFIG
+        self.enabled = config['ENABLED']
+        self.ttl = config['TTL']
+
+    def _cache_key(self, school_db_name, lesson_plan_day_id):
+        return f"{self.CACHE_KEY_PREFIX}:{school_db_name}:{lesson_plan_day_id}"
+
+    def get(self, school_db_name, lesson_plan_day_id):
+        """Return the cached system instruction or None."""
+        if not self.enabled:
+            return None
+        try:
+            return cache.get(self._cache_key(school_db_name, lesson_plan_day_id))
+        except Exception as e:
+            logger.warning(f"Assistant context cache lookup failed: {e}")
+            return None
+
+    def set(self, school_db_name, lesson_plan_day_id, system_instruction):
+        """Store the system instruction of the lesson plan day."""
+        if not self.enabled:
+            return
+        try:
+            cache.set(self._cache_key(school_db_name, lesson_plan_day_id), system_instruction, timeout=self.ttl)
+        except Exception as e:
+            logger.warning(f"Assistant context cache update failed: {e}")
+
+    def invalidate(self, school_db_name, *lesson_plan_day_ids):
+        """Drop the cached context of the lesson plan days."""
+        if not self.enabled or not lesson_plan_day_ids:
+            return
+        try:
+            cache.delete_many([
+                self._cache_key(school_db_name, lesson_plan_day_id)
+                for lesson_plan_day_id in lesson_plan_day_ids
+            ])
+        except Exception as e:
+            logger.warning(f"Assistant context cache invalidation failed: {e}")
+
+
+assistant_context_cache = AssistantContextCache()
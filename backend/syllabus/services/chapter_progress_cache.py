@@ -0,0 +1,78 @@
+"""Cached chapter progress summaries per class section and subject."""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class ChapterProgressCache:
+    """
+    Stores the chapter progress list served by get_chapters_by_subject.
+
+    Entries are keyed by tenant database, section and subject. A single
+    entry holds the summaries for every board/academic year combination
+    requested for that pair, so one delete invalidates all of them when a
+    lesson plan day of the section and subject changes.
+    """
+
+    CACHE_KEY_PREFIX = "chapter_progress"
+
+    def __init__(self):
+        config = settings.CHAPTER_PROGRESS_CACHE_CONFIG
+        self.enabled = config['ENABLED']
+        self.ttl = config['TTL']
+
+    def _cache_key(self, school_db_name, section_id, subject_id):
+        return f"{self.CACHE_KEY_PREFIX}:{school_db_name}:{section_id}:{subject_id}"
+
+    def _variant(self, school_board_id, academic_year_id):
+        return f"{school_board_id}:{academic_year_id}"
+
+    def get(self, school_db_name, section_id, subject_id, school_board_id, academic_year_id):
+        """Return the cached chapter list or None."""
+        if not self.enabled:
+            return None
+        try:
+            entry = cache.get(self._cache_key(school_db_name, section_id, subject_id)) or {}
+        except Exception as e:
+            logger.warning(f"Chapter progress cache lookup failed: {e}")
+            return None
+        return entry.get(self._variant(school_board_id, academic_year_id))
+
+    def set(self, school_db_name, section_id, subject_id, school_board_id, academic_year_id, chapters):
+        """Store the chapter list for the section and subject."""
+        if not self.enabled:
+            return
+        key = self._cache_key(school_db_name, section_id, subject_id)
+        try:
+            entry = cache.get(key) or {}
+            entry[self._variant(school_board_id, academic_year_id)] = chapters
+            cache.set(key, entry, timeout=self.ttl)
+        except Exception as e:
+            logger.warning(f"Chapter progress cache update failed: {e}")
+
+    def invalidate(self, school_db_name, section_id, subject_id):
+        """Drop the cached summaries for the section and subject."""
+        if not self.enabled:
+            return
+        try:
+            cache.delete(self._cache_key(school_db_name, section_id, subject_id))
+        except Exception as e:
+            logger.warning(f"Chapter progress cache invalidation failed: {e}")
+
+    def invalidate_sections(self, school_db_name, section_ids, subject_id):
+        """Drop the cached summaries of a subject for several sections, e.g. when its chapters are replaced."""
+        if not self.enabled or not section_ids:
+            return
+        try:
+            cache.delete_many([
+                self._cache_key(school_db_name, section_id, subject_id) for section_id in section_ids
+            ])
+        except Exception as e:
+            logger.warning(f"Chapter progress cache invalidation failed: {e}")
+
+
+chapter_progress_cache = ChapterProgressCache()
@@ -0,0 +1,93 @@
+"""Maintenance of the per section chapter progress rollup."""
+
+import logging
+
+from django.db import transaction
+from django.db.models import Count, Max, Q
+
+from syllabus.models import SchoolChapter, SchoolChapterProgress, SchoolLessonPlanDay
+
+logger = logging.getLogger(__name__)
+
+
+class ChapterProgressRollup:
+    """
+    Keeps SchoolChapterProgress in sync with SchoolLessonPlanDay.
+
+    Callers refresh the (chapter, class section) pairs they touched inside
+    the same transaction as the lesson plan day write, so readers never see
+    the rollup disagree with the underlying days. The chapter row is locked
+    before counting, so concurrent status changes recompute one after the
+    other instead of committing stale counts.
+    """
+
+    @staticmethod
+    def _day_counts(days):
+        return days.aggregate(
+            total_days=Count('id'),
+            completed_days=Count('id', filter=Q(status='completed')),
+            last_completed_at=Max('updated_at', filter=Q(status='completed'))
+        )
+
+    def refresh(self, school_db_name, chapter_id, class_section_id):
+        """Recompute the rollup row for one chapter and class section."""
+        with transaction.atomic(using=school_db_name):
+            subject_id = SchoolChapter.objects.using(school_db_name).select_for_update().filter(
+                id=chapter_id
+            ).values_list('subject_id', flat=True).first()
+            counts = self._day_counts(
+                SchoolLessonPlanDay.objects.using(school_db_name).filter(
+                    chapter_id=chapter_id,
+                    class_section_id=class_section_id
+                )
+            )
+            if counts['total_days'] == 0:
+                SchoolChapterProgress.objects.using(school_db_name).filter(
+                    chapter_id=chapter_id,
+                    class_section_id=class_section_id
+                ).delete()
+                return None
+
+            progress, _ = SchoolChapterProgress.objects.using(school_db_name).update_or_create(
+                chapter_id=chapter_id,
+                class_section_id=class_section_id,
+                defaults={
+                    "subject_id": subject_id,
+                    "total_days": counts['total_days'],
+                    "completed_days": counts['completed_days'],
+                    "is_completed": counts['total_days'] == counts['completed_days'],
+                    "last_completed_at": counts['last_completed_at'],
+                }
+            )
+        return progress
+
+    def rebuild(self, school_db_name):
+        """Recompute the whole rollup of a tenant database."""
+        rows = (
+            SchoolLessonPlanDay.objects.using(school_db_name)
+            .values('chapter_id', 'chapter__subject_id', 'class_section_id')
+            .annotate(
+                total_days=Count('id'),
+                completed_days=Count('id', filter=Q(status='completed')),
+                last_completed_at=Max('updated_at', filter=Q(status='completed'))
+            )
+        )
+        progress_rows = [
+            SchoolChapterProgress(
+                chapter_id=row['chapter_id'],
+                class_section_id=row['class_section_id'],
+                subject_id=row['chapter__subject_id'],
+                total_days=row['total_days'],
+                completed_days=row['completed_days'],
+                is_completed=row['total_days'] == row['completed_days'],
+                last_completed_at=row['last_completed_at'],
+            )
+            for row in rows
+        ]
+        SchoolChapterProgress.objects.using(school_db_name).all().delete()
+        SchoolChapterProgress.objects.using(school_db_name).bulk_create(progress_rows, batch_size=1000)
+        logger.info(f"Rebuilt {len(progress_rows)} chapter progress rows in {school_db_name}")
+        return len(progress_rows)
+
+
+chapter_progress_rollup = ChapterProgressRollup()
@@ -0,0 +1,138 @@
+"""Chapter to text span index of ebook text files."""
+
+import json
+import logging
+import re
+from io import BytesIO
+
+from core import s3_client
+
+logger = logging.getLogger(__name__)
+
+
+class ChapterSpanIndex:
+    """
+    Maps the chapters of an ebook to character spans of its extracted text
+    so lesson plan prompts can carry a single chapter instead of the book.
+
+    The index is stored next to the text file as {file_path}.index.json.
+    A chapter starts at its first "Chapter <number> <title>" heading after
+    the previous chapter's start, falling back to the first mention of the
+    number or title. Positions closely followed by the next chapter are
+    table of contents entries and are skipped. Chapters that can't be
+    located are left out, and prompts for them use the whole book.
+    """
+
+    VERSION = 1
+    MAX_CANDIDATES = 100
+    HEADING_GAP = 100
+    MIN_CHAPTER_CHARS = 500
+
+    @staticmethod
+    def _s3_key(file_path):
+        return f"{file_path}.index.json"
+
+    @staticmethod
+    def _chapter_key(chapter_number):
+        return str(int(chapter_number))
+
+    def _candidates(self, text, chapter_number, chapter_name):
+        """Return the positions of headings and of title mentions of a chapter."""
+        number_pattern = rf"\bchapter\s+{int(chapter_number)}\b"
+        words = re.findall(r"\w+", chapter_name or "")
+        title_pattern = r"\b" + r"\W+".join(re.escape(word) for word in words) + r"\b" if words else None
+
+        headings = []
+        if title_pattern:
+            heading_pattern = rf"{number_pattern}\W{{0,{self.HEADING_GAP}}}{title_pattern}"
+            headings = [
+                match.start() for match in re.finditer(heading_pattern, text, re.IGNORECASE)
+            ][:self.MAX_CANDIDATES]
+
+        mentions = set()
+        for pattern in filter(None, [number_pattern, title_pattern]):
+            for match in re.finditer(pattern, text, re.IGNORECASE):
+                mentions.add(match.start())
+                if len(mentions) >= self.MAX_CANDIDATES:
+                    break
+        return headings, sorted(mentions)
+
+    def _drop_toc_entries(self, candidates, next_candidates):
+        """Drop positions directly followed by the next chapter, i.e. table of contents entries."""
+        return [
+            start for start in candidates
+            if not any(start < next_start < start + self.MIN_CHAPTER_CHARS for next_start in next_candidates)
+        ]
+
+    def build(self, text, chapters):
+        """Return the span index of the chapters extracted from the text."""
+        chapters = sorted(
+            (chapter for chapter in chapters if str(chapter.get('chapter_number', '')).isdigit()),
+            key=lambda chapter: int(chapter['chapter_number'])
+        )
+        index = {"version": self.VERSION, "text_length": len(text), "chapters": {}}
+        if len(chapters) == 1:
+            chapter = chapters[0]
+            index["chapters"][self._chapter_key(chapter['chapter_number'])] = {
+                "chapter_name": chapter.get('chapter_name'), "start": 0, "end": len(text)
+            }
+            return index
+
+        candidates = [
+            self._candidates(text, chapter['chapter_number'], chapter.get('chapter_name'))
+            for chapter in chapters
+        ]
+        located = []
+        previous_start = -1
+        for position, chapter in enumerate(chapters):
+            headings, mentions = candidates[position]
+            if position + 1 < len(chapters):
+                next_headings, next_mentions = candidates[position + 1]
+                next_starts = next_headings + next_mentions
+                headings = self._drop_toc_entries(headings, next_starts)
+                mentions = self._drop_toc_entries(mentions, next_starts)
+            start = next((start for start in headings if start > previous_start), None)
+            if start is None:
+                start = next((start for start in mentions if start > previous_start), None)
+            if start is None:
+                continue
+            located.append((chapter, start))
+            previous_start = start
+
+        for position, (chapter, start) in enumerate(located):
+            end = located[position + 1][1] if position + 1 < len(located) else len(text)
+            index["chapters"][self._chapter_key(chapter['chapter_number'])] = {
+                "chapter_name": chapter.get('chapter_name'), "start": start, "end": end
+            }
+        return index
+
+    def upload(self, file_path, index):
+        """Store the index next to the ebook text file."""
+        index_file = BytesIO(json.dumps(index).encode("utf-8"))
+        if not s3_client.upload_file(index_file, self._s3_key(file_path), file_type='application/json'):
+            logger.error("Failed to upload chapter span index to S3.")
+            return False
+        return True
+
+    def load(self, file_path):
+        """Return the stored index or None."""
+        index_file = BytesIO()
+        if not s3_client.download_file(self._s3_key(file_path), index_file):
+            return None
+        try:
+            return json.loads(index_file.read().decode("utf-8"))
+        except ValueError as e:
+            logger.error(f"Invalid chapter span index for {file_path}: {e}")
+            return None
+
+    def slice(self, index, text, chapter_number):
+        """Return the chapter's text or None when the index can't be used for it."""
+        if not index or index.get("version") != self.VERSION or index.get("text_length") != len(text):
+            return None
+        span = index["chapters"].get(self._chapter_key(chapter_number))
+        if not span or span["end"] - span["start"] < self.MIN_CHAPTER_CHARS:
+            return None
+        return text[span["start"]:span["end"]]
+
+
+chapter_span_index = ChapterSpanIndex()
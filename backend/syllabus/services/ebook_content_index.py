@@ -0,0 +1,88 @@
+"""Content hash index of processed ebook PDFs."""
+
+import hashlib
+import logging
+from io import BytesIO
+
+from django.db import IntegrityError, transaction
+
+from school.models import EbookChapterExtraction, EbookContent
+from core.common_modules.common_functions import CommonFunctions
+from core.lang_chain.lang_chain import LangChainService
+from core.lang_chain.queries import LangchainQueries
+
+logger = logging.getLogger(__name__)
+
+
+class EbookContentIndex:
+    """
+    Maps the sha256 of an uploaded PDF to its extracted text and to the
+    chapters the LLM extracted from it, so re-uploads of the same file and
+    lesson plan fallbacks skip both PDF parsing and the LLM call.
+
+    Chapter extractions are also keyed by a hash of the prompt and model,
+    since the same book uploaded as a different chapter or class produces
+    a different prompt.
+    """
+
+    @staticmethod
+    def hash_bytes(data):
+        return hashlib.sha256(data).hexdigest()
+
+    def get_text(self, content_hash):
+        """Return the extracted text of an indexed PDF or None."""
+        return EbookContent.objects.filter(
+            content_hash=content_hash
+        ).values_list('extracted_text', flat=True).first()
+
+    def get_or_extract_text(self, file_bytes):
+        """Return (content_hash, text) of a PDF, parsing it only on the first sighting."""
+        content_hash = self.hash_bytes(file_bytes)
+        pdf_text = self.get_text(content_hash)
+        if pdf_text is not None:
+            logger.info(f"Ebook content index hit for {content_hash}")
+            return content_hash, pdf_text
+
+        pdf_text = CommonFunctions.extract_text_from_pdf(pdf_file=BytesIO(file_bytes))
+        try:
+            with transaction.atomic():
+                EbookContent.objects.create(content_hash=content_hash, extracted_text=pdf_text)
+        except IntegrityError:
+            # Another upload of the same file indexed it first.
+            pass
+        return content_hash, pdf_text
+
+    def _prompt_hash(self, lang_chain_service, upload_type_prompt):
+        prompt_data = "\n".join([
+            lang_chain_service.model_name,
+            LangchainQueries.EXTRACT_TOPICS_PREREQUISITES.value,
+            upload_type_prompt or "",
+        ])
+        return hashlib.sha256(prompt_data.encode("utf-8")).hexdigest()
+
+    def get_or_extract_chapters(self, content_hash, pdf_text, upload_type_prompt):
+        """Return the chapters of an indexed PDF, calling the LLM only on a miss."""
+        lang_chain_service = LangChainService()
+        prompt_hash = self._prompt_hash(lang_chain_service, upload_type_prompt)
+        content = EbookContent.objects.filter(content_hash=content_hash).first()
+        if content:
+            extraction = EbookChapterExtraction.objects.filter(
+                content=content, prompt_hash=prompt_hash
+            ).values_list('chapters', flat=True).first()
+            if extraction is not None:
+                logger.info(f"Chapter extraction index hit for {content_hash}")
+                return extraction
+
+        chapters = lang_chain_service.get_topics_and_prerequisites(pdf_text, upload_type_prompt)
+        if content:
+            try:
+                with transaction.atomic():
+                    EbookChapterExtraction.objects.create(
+                        content=content, prompt_hash=prompt_hash, chapters=chapters
+                    )
+            except IntegrityError:
+                pass
+        return chapters
+
+
+ebook_content_index = EbookContentIndex()
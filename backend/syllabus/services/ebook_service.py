@@ -5,6 +5,7 @@ from io import BytesIO
 from datetime import datetime
 
 from django.db import transaction
+from django.db.models import Prefetch
 from collections import OrderedDict
 from django.utils import timezone
 from django.conf import settings
@@ -20,14 +21,19 @@ from school.models import (
     SchoolBoard,
     SchoolDefaultSubjects,
     SchoolSyllabusEbooks,
-    SchoolBoardMapping
+    SchoolBoardMapping,
+    EbookDistribution
 )
-from syllabus.models import SchoolChapter, SchoolClassPrerequisite, SchoolClassSubTopic, SchoolSubTopic, SchoolPrerequisite
+from syllabus.models import SchoolChapter, SchoolSubTopic, SchoolPrerequisite
 from classes.models import SchoolClass, SchoolSection
 from core import s3_client
 from core.lang_chain.lang_chain import LangChainService
 from core.lang_chain.queries import LangchainQueries
-from core.common_modules.common_functions import CommonFunctions
+from core.common_modules.tenant_registry import tenant_registry
+from syllabus.services.ebook_content_index import ebook_content_index
+from syllabus.services.chapter_span_index import chapter_span_index
+from syllabus.services.syllabus_distribution import syllabus_distribution
+from syllabus.services.chapter_progress_cache import chapter_progress_cache
 
 logger = logging.getLogger(__name__)
 
@@ -107,6 +113,7 @@ class EbookService:
 
             file_type = 'application/pdf'
             file_bytes = file.read()
+            content_hash, pdf_text = ebook_content_index.get_or_extract_text(file_bytes)
             upload_success = s3_client.upload_file(BytesIO(file_bytes), f"{s3_key}.pdf", file_type=file_type)
             if upload_success:
                 with transaction.atomic():
@@ -133,7 +140,8 @@ class EbookService:
                         ebook_type=upload_type,
                         ebook_name=file_name,
                         file_path=s3_key,
-                        syllabus_year=syllabus_year
+                        syllabus_year=syllabus_year,
+                        content_hash=content_hash
                     )
                     upload_type_prompt = LangchainQueries.SINGLE_WISE_PROMPT.value
                     upload_type_prompt = upload_type_prompt.format(subject=subject_obj.name, class_num=class_obj.class_number)
@@ -144,13 +152,14 @@ class EbookService:
                         upload_type_prompt = LangchainQueries.CHAPTER_WISE_PROMPT.value
                         upload_type_prompt = upload_type_prompt.format(chapter_num=chapter_number, subject=subject_obj.name, class_num=class_obj.class_number)
                     extract_status, pdf_text = self.extract_topics_and_prerequisites(
-                        BytesIO(file_bytes), ebook,
+                        pdf_text, ebook,
                         previously_uploaded_ebook_id,
                         board_id=board_id, class_id=class_id,
                         subject_id=subject_id, chapter_number=chapter_number,
                         upload_type=upload_type,
                         apply_to_all_schools=apply_to_all_schools,
-                        upload_type_prompt=upload_type_prompt
+                        upload_type_prompt=upload_type_prompt,
+                        content_hash=content_hash
                     )
                     pdf_text_file = BytesIO()
                     pdf_text_file.write(pdf_text.encode("utf-8"))
@@ -302,14 +311,20 @@ class EbookService:
                 ebook.save()
 
                 if delete_in_school_db:
-                    for database in settings.DATABASES:
-                        if database != 'default':
-                            try:
-                                SchoolChapter.objects.using(database).filter(ebook_id=ebook.id).delete()
-                                logger.info(f"Deleted syllabus data for ebook ID {ebook.id} from school DB {database}.")
-                            except Exception as e:
-                                logger.exception(f"Error deleting syllabus data from school DB {database}: {str(e)}")
-                                continue
+                    for database in tenant_registry.register_all_tenants():
+                        try:
+                            SchoolChapter.objects.using(database).filter(ebook_id=ebook.id).delete()
+                            chapter_progress_cache.invalidate_sections(
+                                database,
+                                list(SchoolSection.objects.using(database).filter(
+                                    class_instance__class_number=ebook.class_number_id
+                                ).values_list('id', flat=True)),
+                                ebook.subject_id
+                            )
+                            logger.info(f"Deleted syllabus data for ebook ID {ebook.id} from school DB {database}.")
+                        except Exception as e:
+                            logger.exception(f"Error deleting syllabus data from school DB {database}: {str(e)}")
+                            continue
 
             logger.info("eBook with ID %s deleted successfully.",ebook_id)
             return Response({"message": "eBook deleted successfully."}, status=status.HTTP_200_OK)
@@ -320,144 +335,174 @@ class EbookService:
             return Response({"error": "An error occurred while deleting the eBook."},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def extract_topics_and_prerequisites(self, pdf_file, ebook, previously_uploaded_ebook_id,
+    def get_ebook_distribution(self, request):
+        """Get the distribution status of an eBook in every school database."""
+        try:
+            ebook_id = request.query_params.get("ebook_id")
+            if not ebook_id:
+                return Response({"error": "eBook ID is required."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            ebook = SchoolSyllabusEbooks.objects.get(id=ebook_id)
+            distributions = EbookDistribution.objects.filter(ebook=ebook).order_by('db_name').values(
+                'db_name', 'status', 'attempts', 'error', 'chapters_count', 'updated_at'
+            )
+            return Response({'data': list(distributions)}, status=status.HTTP_200_OK)
+        except SchoolSyllabusEbooks.DoesNotExist:
+            return Response({"error": "eBook not found."}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            logger.exception(f"Error retrieving eBook distribution: {e}")
+            return Response({"error": "An error occurred while retrieving the eBook distribution."},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def retry_ebook_distribution(self, request):
+        """Copy an eBook's chapters again to the school databases where it failed."""
+        try:
+            ebook_id = request.data.get("ebook_id")
+            if not ebook_id:
+                return Response({"error": "eBook ID is required."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            ebook = SchoolSyllabusEbooks.objects.get(id=ebook_id, is_active=True)
+            summary = syllabus_distribution.retry_failed(ebook)
+            logger.info("Retried distribution of eBook %s: %s", ebook_id, summary)
+            return Response({"message": "eBook distribution retried.", "data": summary},
+                            status=status.HTTP_200_OK)
+        except SchoolSyllabusEbooks.DoesNotExist:
+            return Response({"error": "eBook not found."}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            logger.exception(f"Error retrying eBook distribution: {e}")
+            return Response({"error": "An error occurred while retrying the eBook distribution."},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def extract_topics_and_prerequisites(self, pdf_text, ebook, previously_uploaded_ebook_id,
             board_id=None, class_id=None, subject_id=None,
             chapter_number=None, upload_type=None,
-            apply_to_all_schools=False,upload_type_prompt=None):
-        """Extract topics and prerequisites from the provided PDF file."""
-
-        lang_chain_service = LangChainService()
+            apply_to_all_schools=False,upload_type_prompt=None,
+            content_hash=None):
+        """Extract topics and prerequisites from the text of the uploaded PDF file."""
 
-        chapters_obj,pdf_text = lang_chain_service.get_topics_and_prerequisites(pdf_file,upload_type_prompt)
+        if content_hash:
+            chapters_obj = ebook_content_index.get_or_extract_chapters(content_hash, pdf_text, upload_type_prompt)
+        else:
+            chapters_obj = LangChainService().get_topics_and_prerequisites(pdf_text, upload_type_prompt)
+        chapter_span_index.upload(ebook.file_path, chapter_span_index.build(pdf_text, chapters_obj))
 
+        chapters = syllabus_distribution.normalize_chapters(chapters_obj)
         with transaction.atomic():
             Chapter.objects.filter(ebook_id=previously_uploaded_ebook_id).delete()
-            for chapter_item in chapters_obj:
-                chapter = Chapter.objects.create(
+            chapter_objs = Chapter.objects.bulk_create([
+                Chapter(
                     chapter_number=chapter_item['chapter_number'],
                     ebook=ebook,
                     chapter_name=chapter_item['chapter_name']
                 )
-
-                for sub_topic in set(chapter_item['sub_topics']):
-                    sub_topic_obj = SubTopic.objects.create(
-                        chapter=chapter,
-                        name=sub_topic
-                    )
-                    
-                for prerequisite in chapter_item['pre_requisites']:
-                    prerequisite_obj = Prerequisite.objects.create(
-                        chapter=chapter,
-                        topic=prerequisite['topic'],
-                        explanation=prerequisite['explanation']
-                    )
+                for chapter_item in chapters
+            ])
+            SubTopic.objects.bulk_create([
+                SubTopic(chapter=chapter, name=sub_topic)
+                for chapter, chapter_item in zip(chapter_objs, chapters)
+                for sub_topic in chapter_item['sub_topics']
+            ])
+            Prerequisite.objects.bulk_create([
+                Prerequisite(
+                    chapter=chapter,
+                    topic=prerequisite['topic'],
+                    explanation=prerequisite['explanation']
+                )
+                for chapter, chapter_item in zip(chapter_objs, chapters)
+                for prerequisite in chapter_item['pre_requisites']
+            ])
             if apply_to_all_schools:
-                for database in settings.DATABASES:
-                    if database != 'default':
-                        try:
-                            academic_year = CommonFunctions().get_latest_academic_year(database)
-                            if academic_year:
-                                filters = {
-                                    'academic_year': academic_year,
-                                    'school_board_id':board_id,
-                                    'class_number_id':class_id,
-                                    'subject_id':subject_id,
-                                }
-                                if upload_type == 'chapter_wise':
-                                    filters['chapter_number'] = int(chapter_number)
-                                SchoolChapter.objects.using(database).filter(
-                                    **filters
-                                ).delete()
-
-                                for chapter_item in chapters_obj:
-                                    school_class_obj = SchoolClass.objects.using(database).get(
-                                        class_number=ebook.class_number_id
-                                    )
-                                    school_section_objs = SchoolSection.objects.using(database).filter(
-                                        class_instance=school_class_obj,
-                                    )
-                                    school_chapter_obj = SchoolChapter.objects.using(database).create(
-                                        school_board_id=board_id,
-                                        academic_year=academic_year,
-                                        class_number=school_class_obj,
-                                        subject_id=subject_id,
-                                        chapter_number=chapter_item['chapter_number'],
-                                        chapter_name=chapter_item['chapter_name'],
-                                        ebook_id=ebook.id
-                                    )
-                                    for sub_topic in chapter_item['sub_topics']:
-                                        SchoolSubTopic.objects.using(database).create(
-                                            chapter=school_chapter_obj,
-                                            name=sub_topic
-                                        )
-                                        for school_section in school_section_objs:
-                                            SchoolClassSubTopic.objects.using(database).create(
-                                                chapter=school_chapter_obj,
-                                                name=sub_topic,
-                                                class_section=school_section
-                                            )
-                                    for prerequisite in chapter_item['pre_requisites']:
-                                        SchoolPrerequisite.objects.using(database).create(
-                                            chapter=school_chapter_obj,
-                                            topic=prerequisite['topic'],
-                                            explanation=prerequisite['explanation']
-                                        )
-                                        for school_section in school_section_objs:
-                                            SchoolClassPrerequisite.objects.using(database).create(
-                                                chapter=school_chapter_obj,
-                                                topic=prerequisite['topic'],
-                                                explanation=prerequisite['explanation'],
-                                                class_section=school_section
-                                            )
-                                logger.info(f"Syllabus data for ebook ID {ebook.id} copied to school DB {database} successfully.")
-                        except Exception as e:
-                            logger.exception(f"Error copying syllabus data to school DB {database}: {str(e)}")
-                            continue
-        
+                # School databases are written once the ebook is committed, so a
+                # failed upload never leaves chapters behind in the schools.
+                transaction.on_commit(lambda: self.distribute_to_schools(ebook, chapters))
+
         return True, pdf_text
+
+    @staticmethod
+    def distribute_to_schools(ebook, chapters):
+        """Distribute the committed chapters of an ebook; failures are logged, not raised."""
+        try:
+            syllabus_distribution.distribute(ebook, chapters)
+        except Exception as e:
+            # The ebook and its chapters are committed, so the upload itself succeeded
+            logger.error(f"Error distributing ebook ID {ebook.id} to school databases: {e}")
     
     def copy_syllabus_data_to_school_db(self,school_db_metadata,academic_year_id,boards = None):
+        """Seed a school database with the chapters of the active eBooks of its boards.
+
+        The syllabus is read with a handful of prefetch queries and written with
+        one bulk insert per table.
+        """
         try:
             school_db_name = school_db_metadata.db_name
-            
+            batch_size = settings.SYLLABUS_DISTRIBUTION_CONFIG['BATCH_SIZE']
+
             with transaction.atomic(using=school_db_name):
                 if not boards:
                     boards = SchoolBoardMapping.objects.filter(
                         school_id=school_db_metadata.school_id
                     )
-                for board in boards:
-                    ebooks = SchoolSyllabusEbooks.objects.filter(
-                        board_id=board.board_id, is_active=True
-                    ).select_related('class_number', 'subject')
-                    for ebook in ebooks:
-                        chapters = Chapter.objects.filter(ebook=ebook)
-                        for chapter in chapters:
-                            school_class_obj = SchoolClass.objects.using(school_db_name).get(
-                                class_number=ebook.class_number_id
+                board_ids = [board.board_id for board in boards]
+                ebooks = SchoolSyllabusEbooks.objects.filter(
+                    board_id__in=board_ids, is_active=True
+                ).prefetch_related(
+                    Prefetch('chapter_set', queryset=Chapter.objects.prefetch_related('sub_topics', 'prerequisites'))
+                ).order_by('id')
+                ebooks_by_board = {board_id: [] for board_id in board_ids}
+                for ebook in ebooks:
+                    ebooks_by_board[ebook.board_id].append(ebook)
+
+                school_classes = {
+                    school_class.class_number: school_class
+                    for school_class in SchoolClass.objects.using(school_db_name).filter(
+                        class_number__in={ebook.class_number_id for ebook in ebooks}
+                    )
+                }
+
+                school_chapters = []
+                chapters = []
+                for board_id in board_ids:
+                    for ebook in ebooks_by_board[board_id]:
+                        ebook_chapters = list(ebook.chapter_set.all())
+                        if not ebook_chapters:
+                            continue
+                        school_class_obj = school_classes.get(ebook.class_number_id)
+                        if school_class_obj is None:
+                            raise SchoolClass.DoesNotExist(
+                                f"SchoolClass {ebook.class_number_id} does not exist in {school_db_name}."
                             )
-                            school_chapter_obj = SchoolChapter.objects.using(school_db_name).create(
-                                school_board_id=board.board_id,
+                        for chapter in ebook_chapters:
+                            school_chapters.append(SchoolChapter(
+                                school_board_id=board_id,
                                 academic_year_id=academic_year_id,
                                 class_number=school_class_obj,
                                 subject_id=ebook.subject_id,
                                 chapter_number=chapter.chapter_number,
                                 chapter_name=chapter.chapter_name,
                                 ebook_id=ebook.id
-                            )
-                            sub_topics = SubTopic.objects.filter(chapter=chapter)
-                            for sub_topic in sub_topics:
-                                SchoolSubTopic.objects.using(school_db_name).create(
-                                    chapter=school_chapter_obj,
-                                    name=sub_topic.name
-                                )
-                            prerequisites = Prerequisite.objects.filter(chapter=chapter)
-                            for prerequisite in prerequisites:
-                                SchoolPrerequisite.objects.using(school_db_name).create(
-                                    chapter=school_chapter_obj,
-                                    topic=prerequisite.topic,
-                                    explanation=prerequisite.explanation
-                                )
-                    logger.info(f"Syllabus data for board {board.board_id} copied to school DB {school_db_name} successfully.")
+                            ))
+                            chapters.append(chapter)
+                    logger.info(f"Syllabus data for board {board_id} prepared for school DB {school_db_name}.")
+
+                school_chapters = SchoolChapter.objects.using(school_db_name).bulk_create(
+                    school_chapters, batch_size=batch_size
+                )
+                SchoolSubTopic.objects.using(school_db_name).bulk_create([
+                    SchoolSubTopic(chapter=school_chapter_obj, name=sub_topic.name)
+                    for school_chapter_obj, chapter in zip(school_chapters, chapters)
+                    for sub_topic in chapter.sub_topics.all()
+                ], batch_size=batch_size)
+                SchoolPrerequisite.objects.using(school_db_name).bulk_create([
+                    SchoolPrerequisite(
+                        chapter=school_chapter_obj,
+                        topic=prerequisite.topic,
+                        explanation=prerequisite.explanation
+                    )
+                    for school_chapter_obj, chapter in zip(school_chapters, chapters)
+                    for prerequisite in chapter.prerequisites.all()
+                ], batch_size=batch_size)
             logger.info(f"Syllabus data copied to school DB {school_db_name} successfully.")
             return True
         except Exception as e:
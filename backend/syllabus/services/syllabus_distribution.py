@@ -0,0 +1,224 @@
+"""Distribution of extracted ebook chapters to the school databases."""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Prefetch
+
+from school.models import Chapter, EbookDistribution, Prerequisite, SubTopic
+from syllabus.models import (
+    SchoolChapter, SchoolClassPrerequisite, SchoolClassSubTopic, SchoolPrerequisite, SchoolSubTopic
+)
+from classes.models import SchoolClass, SchoolSection
+from core.common_modules.common_functions import CommonFunctions
+from core.common_modules.tenant_registry import tenant_registry
+from syllabus.services.chapter_progress_cache import chapter_progress_cache
+
+logger = logging.getLogger(__name__)
+
+
+class SyllabusDistribution:
+    """
+    Copies the chapters of an ebook into every school database.
+
+    The chapters are normalized once, then each school is written with
+    bulk inserts in its own transaction by a pool of MAX_WORKERS threads, so
+    a slow or broken school neither delays nor rolls back the others. The
+    outcome of every school is kept in EbookDistribution, and failed schools
+    can be retried from the chapters stored in the default database without
+    calling the LLM again.
+    """
+
+    def __init__(self):
+        config = settings.SYLLABUS_DISTRIBUTION_CONFIG
+        self.max_workers = config['MAX_WORKERS']
+        self.batch_size = config['BATCH_SIZE']
+
+    @staticmethod
+    def normalize_chapters(chapters_obj):
+        """Return the LLM chapters with unique sub topics and prerequisite topics.
+
+        Sub topics and prerequisites are unique per chapter in every database,
+        so a repeated prerequisite topic keeps the explanation given first
+        instead of failing the whole upload on the constraint.
+        """
+        chapters = []
+        for chapter_item in chapters_obj:
+            prerequisites = {}
+            for prerequisite in chapter_item['pre_requisites']:
+                prerequisites.setdefault(prerequisite['topic'], prerequisite['explanation'])
+            chapters.append({
+                'chapter_number': chapter_item['chapter_number'],
+                'chapter_name': chapter_item['chapter_name'],
+                'sub_topics': list(dict.fromkeys(chapter_item['sub_topics'])),
+                'pre_requisites': [
+                    {'topic': topic, 'explanation': explanation}
+                    for topic, explanation in prerequisites.items()
+                ],
+            })
+        return chapters
+
+    @staticmethod
+    def stored_chapters(ebook):
+        """Return the chapters of the ebook stored in the default database."""
+        chapters = Chapter.objects.filter(ebook=ebook).prefetch_related(
+            Prefetch('sub_topics', queryset=SubTopic.objects.order_by('id')),
+            Prefetch('prerequisites', queryset=Prerequisite.objects.order_by('id')),
+        ).order_by('chapter_number')
+        return [
+            {
+                'chapter_number': chapter.chapter_number,
+                'chapter_name': chapter.chapter_name,
+                'sub_topics': [sub_topic.name for sub_topic in chapter.sub_topics.all()],
+                'pre_requisites': [
+                    {'topic': prerequisite.topic, 'explanation': prerequisite.explanation}
+                    for prerequisite in chapter.prerequisites.all()
+                ],
+            }
+            for chapter in chapters
+        ]
+
+    def distribute(self, ebook, chapters, databases=None):
+        """Write the normalized chapters of the ebook to the databases, all schools by default.
+
+        Returns the number of schools per final status.
+        """
+        if databases is None:
+            databases = tenant_registry.register_all_tenants()
+        if not databases:
+            return {}
+
+        existing = set(EbookDistribution.objects.filter(
+            ebook=ebook, db_name__in=databases
+        ).values_list('db_name', flat=True))
+        EbookDistribution.objects.bulk_create([
+            EbookDistribution(ebook=ebook, db_name=database)
+            for database in databases if database not in existing
+        ])
+        EbookDistribution.objects.filter(ebook=ebook, db_name__in=databases).update(
+            status=EbookDistribution.PENDING, error=None
+        )
+
+        summary = {}
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(databases)), thread_name_prefix="syllabus-distribution"
+        ) as executor:
+            futures = [executor.submit(self._run, ebook, chapters, database) for database in databases]
+            for future in as_completed(futures):
+                outcome = future.result()
+                summary[outcome] = summary.get(outcome, 0) + 1
+        logger.info(f"Distributed ebook {ebook.id} to {len(databases)} school DBs: {summary}")
+        return summary
+
+    def retry_failed(self, ebook):
+        """Distribute the ebook again to the schools where it failed."""
+        databases = list(EbookDistribution.objects.filter(
+            ebook=ebook, status=EbookDistribution.FAILED
+        ).values_list('db_name', flat=True))
+        if not databases:
+            return {}
+        for database in databases:
+            tenant_registry.ensure_registered(database)
+        return self.distribute(ebook, self.stored_chapters(ebook), databases)
+
+    def _update(self, ebook, database, **fields):
+        EbookDistribution.objects.filter(ebook=ebook, db_name=database).update(**fields)
+
+    def _run(self, ebook, chapters, database):
+        self._update(ebook, database, status=EbookDistribution.RUNNING, attempts=F('attempts') + 1)
+        try:
+            written = self._write_school(ebook, chapters, database)
+        except Exception as e:
+            logger.exception(f"Error copying syllabus data to school DB {database}: {str(e)}")
+            self._update(ebook, database, status=EbookDistribution.FAILED, error=str(e))
+            return EbookDistribution.FAILED
+        else:
+            if written is None:
+                self._update(ebook, database, status=EbookDistribution.SKIPPED,
+                             error="No academic year found.")
+                return EbookDistribution.SKIPPED
+            self._update(ebook, database, status=EbookDistribution.SUCCEEDED, chapters_count=written)
+            logger.info(f"Syllabus data for ebook ID {ebook.id} copied to school DB {database} successfully.")
+            return EbookDistribution.SUCCEEDED
+        finally:
+            connections.close_all()
+
+    def _write_school(self, ebook, chapters, database):
+        """Replace the ebook's chapters in one school database. Returns the chapter count or None when skipped."""
+        academic_year = CommonFunctions().get_latest_academic_year(database)
+        if not academic_year:
+            return None
+
+        filters = {
+            'academic_year': academic_year,
+            'school_board_id': ebook.board_id,
+            'class_number__class_number': ebook.class_number_id,
+            'subject_id': ebook.subject_id,
+        }
+        if ebook.ebook_type == 'chapter_wise':
+            filters['chapter_number'] = int(ebook.chapter_number)
+
+        with transaction.atomic(using=database):
+            SchoolChapter.objects.using(database).filter(**filters).delete()
+            school_sections = list(SchoolSection.objects.using(database).filter(
+                class_instance__class_number=ebook.class_number_id
+            ))
+            transaction.on_commit(lambda: chapter_progress_cache.invalidate_sections(
+                database, [school_section.id for school_section in school_sections], ebook.subject_id
+            ), using=database)
+            if not chapters:
+                return 0
+
+            school_class_obj = SchoolClass.objects.using(database).get(class_number=ebook.class_number_id)
+            school_chapters = SchoolChapter.objects.using(database).bulk_create([
+                SchoolChapter(
+                    school_board_id=ebook.board_id,
+                    academic_year=academic_year,
+                    class_number=school_class_obj,
+                    subject_id=ebook.subject_id,
+                    chapter_number=chapter_item['chapter_number'],
+                    chapter_name=chapter_item['chapter_name'],
+                    ebook_id=ebook.id
+                )
+                for chapter_item in chapters
+            ])
+
+            sub_topics = []
+            class_sub_topics = []
+            prerequisites = []
+            class_prerequisites = []
+            for school_chapter, chapter_item in zip(school_chapters, chapters):
+                for sub_topic in chapter_item['sub_topics']:
+                    sub_topics.append(SchoolSubTopic(chapter=school_chapter, name=sub_topic))
+                    class_sub_topics.extend(
+                        SchoolClassSubTopic(chapter=school_chapter, name=sub_topic, class_section=school_section)
+                        for school_section in school_sections
+                    )
+                for prerequisite in chapter_item['pre_requisites']:
+                    prerequisites.append(SchoolPrerequisite(
+                        chapter=school_chapter,
+                        topic=prerequisite['topic'],
+                        explanation=prerequisite['explanation']
+                    ))
+                    class_prerequisites.extend(
+                        SchoolClassPrerequisite(
+                            chapter=school_chapter,
+                            topic=prerequisite['topic'],
+                            explanation=prerequisite['explanation'],
+                            class_section=school_section
+                        )
+                        for school_section in school_sections
+                    )
+
+            SchoolSubTopic.objects.using(database).bulk_create(sub_topics, batch_size=self.batch_size)
+            SchoolClassSubTopic.objects.using(database).bulk_create(class_sub_topics, batch_size=self.batch_size)
+            SchoolPrerequisite.objects.using(database).bulk_create(prerequisites, batch_size=self.batch_size)
+            SchoolClassPrerequisite.objects.using(database).bulk_create(
+                class_prerequisites, batch_size=self.batch_size
+            )
+        return len(school_chapters)
+
+
+syllabus_distribution = SyllabusDistribution()
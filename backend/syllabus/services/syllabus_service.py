@@ -3,13 +3,15 @@
 import logging
 from io import BytesIO
 
-from django.db.models import Prefetch, Q, Count
+from django.db import transaction
+from django.db.models import Prefetch, Q, Count, FilteredRelation
 
 from rest_framework.response import Response
 from rest_framework import status
 
 from syllabus.models import (
     SchoolChapter,
+    SchoolChapterProgress,
     SchoolClassPrerequisite,
     SchoolClassSubTopic,
     SchoolLessonPlanDay,
@@ -18,6 +20,12 @@ from syllabus.models import (
 )
 
 from core.common_modules.common_functions import CommonFunctions
+from core.common_modules.llm_job_queue import llm_job_queue, PermanentJobError
+from syllabus.services.chapter_progress_cache import chapter_progress_cache
+from syllabus.services.chapter_progress_rollup import chapter_progress_rollup
+from syllabus.services.ebook_content_index import ebook_content_index
+from syllabus.services.chapter_span_index import chapter_span_index
+from syllabus.services.assistant_context_cache import assistant_context_cache
 from core import s3_client
 from core.lang_chain.lang_chain import LangChainService
 from core.lang_chain.queries import LangchainQueries
@@ -26,10 +34,12 @@ from teacher.models import TeacherSubjectAssignment
 
 from classes.models import SchoolSection
 
-from school.models import SchoolSyllabusEbooks, SchoolBoard
+from school.models import SchoolSyllabusEbooks, SchoolBoard, Chapter
 
 logger = logging.getLogger(__name__)
 
+LESSON_PLAN_JOB = "lesson_plan"
+
 class SyllabusService:
     """Service class for handling syllabus-related operations."""
 
@@ -53,22 +63,18 @@ class SyllabusService:
                 id=class_number_id
             )
 
-            chapters = SchoolChapter.objects.using(school_db_name).filter(
-                subject_id=subject_id,
-                school_board_id=school_board_id,
-                academic_year_id=academic_year_id,
-                class_number_id=school_section_obj.class_instance_id
-            ).order_by('chapter_number')
-            chapters_list = []
-
-            if chapters.exists():
-                for chapter in chapters:
-                    chapters_list.append({
-                        "chapter_id": chapter.id,
-                        "chapter_name": chapter.chapter_name,
-                        "chapter_number": chapter.chapter_number,
-                        "progress": self.get_chapter_progress(school_db_name, chapter.id),
-                    })
+            chapters_list = chapter_progress_cache.get(
+                school_db_name, class_number_id, subject_id, school_board_id, academic_year_id
+            )
+            if chapters_list is None:
+                chapters_list = self.get_chapters_with_progress(
+                    school_db_name, school_section_obj, subject_id,
+                    school_board_id, academic_year_id
+                )
+                chapter_progress_cache.set(
+                    school_db_name, class_number_id, subject_id,
+                    school_board_id, academic_year_id, chapters_list
+                )
             logger.info("Chapters fetched successfully.")
             return Response({"data": chapters_list},
                             status=status.HTTP_200_OK)
@@ -81,22 +87,43 @@ class SyllabusService:
             return Response({"error": "Failed to fetch chapters."},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def get_chapter_progress(self, school_db_name, chapter_id):
+    def get_chapters_with_progress(self, school_db_name, school_section_obj, subject_id,
+                                   school_board_id, academic_year_id):
+        """Fetch the subject's chapters with the section's lesson plan day counts."""
+        chapters = SchoolChapter.objects.using(school_db_name).filter(
+            subject_id=subject_id,
+            school_board_id=school_board_id,
+            academic_year_id=academic_year_id,
+            class_number_id=school_section_obj.class_instance_id
+        ).annotate(
+            section_progress_row=FilteredRelation(
+                'section_progress',
+                condition=Q(section_progress__class_section_id=school_section_obj.id)
+            )
+        ).order_by('chapter_number').values(
+            'id', 'chapter_name', 'chapter_number',
+            'section_progress_row__total_days', 'section_progress_row__completed_days'
+        )
 
-        total_days = SchoolLessonPlanDay.objects.using(school_db_name).filter(
-            chapter_id=chapter_id
-        ).count()
+        return [
+            {
+                "chapter_id": chapter["id"],
+                "chapter_name": chapter["chapter_name"],
+                "chapter_number": chapter["chapter_number"],
+                "progress": self.calculate_progress(
+                    chapter["section_progress_row__completed_days"] or 0,
+                    chapter["section_progress_row__total_days"] or 0
+                ),
+            }
+            for chapter in chapters
+        ]
 
-        if total_days == 0:
+    @staticmethod
+    def calculate_progress(completed_days, total_days):
+        """Return the completed percentage of lesson plan days."""
+        if not total_days:
             return 0
-
-        completed_days = SchoolLessonPlanDay.objects.using(school_db_name).filter(
-            chapter_id=chapter_id,
-            status='completed'
-        ).count()
-
-        progress = (completed_days / total_days) * 100
-        return round(progress, 2)
+        return round((completed_days / total_days) * 100, 2)
 
     def get_grade_by_teacher_id(self, request):
         """Fetch grade by teacher ID."""
@@ -120,14 +147,14 @@ class SyllabusService:
 
             boards= CommonFunctions().get_boards_dict()
 
+            progress_map = self.get_subjects_progress_and_chapters_count(
+                school_db_name, teacher_assignment_obj
+            )
+
             data = {}
             for assignment in teacher_assignment_obj:
-                progress, chapters_count = self.get_subject_progress_and_chapters_count(
-                    school_db_name,
-                    assignment["school_class_id"],
-                    assignment["school_class__class_instance_id"],
-                    assignment["subject_id"],
-                    assignment["school_class__board_id"]
+                progress, chapters_count = progress_map.get(
+                    (assignment["school_class_id"], assignment["subject_id"]), (0, 0)
                 )
                 assignment_data = {
                     "class_id": assignment["school_class_id"],
@@ -151,40 +178,57 @@ class SyllabusService:
             return Response({"error": "Failed to fetch grade."},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def get_subject_progress_and_chapters_count(self, school_db_name, section_id, class_id, subject_id,board_id):
-        """Calculate subject progress based on completed lesson plan days."""
-        chapters = SchoolChapter.objects.using(school_db_name).filter(
-            class_number_id=class_id,
-            subject_id=subject_id,
-            school_board_id=board_id
-        )
-
-        total_chapters = chapters.count()
-        if total_chapters == 0:
-            return 0,0
-
-        chapter_weight = 100 / total_chapters
-        total_progress = 0
-
-        for chapter in chapters:
-            total_days = SchoolLessonPlanDay.objects.using(school_db_name).filter(
-                chapter_id=chapter.id,
-                class_section_id=section_id
-            ).count()
-
-            if total_days == 0:
+    def get_subjects_progress_and_chapters_count(self, school_db_name, assignments):
+        """
+        Calculate subject progress for teacher assignments from the chapter
+        progress rollup. Returns {(section_id, subject_id): (progress, chapters_count)}.
+        """
+        assignments = list(assignments)
+        if not assignments:
+            return {}
+        section_ids = {a["school_class_id"] for a in assignments}
+        class_ids = {a["school_class__class_instance_id"] for a in assignments}
+        subject_ids = {a["subject_id"] for a in assignments}
+
+        chapters_count_map = {
+            (row['class_number_id'], row['subject_id'], row['school_board_id']): row['chapters_count']
+            for row in SchoolChapter.objects.using(school_db_name).filter(
+                class_number_id__in=class_ids,
+                subject_id__in=subject_ids
+            ).values('class_number_id', 'subject_id', 'school_board_id').annotate(
+                chapters_count=Count('id')
+            )
+        }
+
+        # (section_id, class_id, subject_id, board_id) -> sum of chapter completion ratios
+        completion_map = {}
+        for row in SchoolChapterProgress.objects.using(school_db_name).filter(
+            class_section_id__in=section_ids,
+            subject_id__in=subject_ids,
+            total_days__gt=0
+        ).values(
+            'class_section_id', 'subject_id', 'completed_days', 'total_days',
+            'chapter__class_number_id', 'chapter__school_board_id'
+        ):
+            key = (row['class_section_id'], row['chapter__class_number_id'],
+                   row['subject_id'], row['chapter__school_board_id'])
+            completion_map[key] = completion_map.get(key, 0) + row['completed_days'] / row['total_days']
+
+        progress_map = {}
+        for assignment in assignments:
+            class_id = assignment["school_class__class_instance_id"]
+            board_id = assignment["school_class__board_id"]
+            subject_id = assignment["subject_id"]
+            section_id = assignment["school_class_id"]
+            chapters_count = chapters_count_map.get((class_id, subject_id, board_id), 0)
+            if chapters_count == 0:
+                progress_map[(section_id, subject_id)] = (0, 0)
                 continue
-
-            completed_days = SchoolLessonPlanDay.objects.using(school_db_name).filter(
-                chapter_id=chapter.id,
-                class_section_id=section_id,
-                status='completed'
-            ).count()
-
-            chapter_progress = (completed_days / total_days) * chapter_weight
-            total_progress += chapter_progress
-
-        return round(total_progress, 2), total_chapters
+            completion = completion_map.get((section_id, class_id, subject_id, board_id), 0)
+            progress_map[(section_id, subject_id)] = (
+                round(completion * 100 / chapters_count, 2), chapters_count
+            )
+        return progress_map
 
     def get_syllabus_subject(self, request):
         """Fetch syllabus by subject."""
@@ -490,6 +534,7 @@ class SyllabusService:
                             setattr(topic, t_field, topic_data[t_field])
                     topic.save(using=school_db_name)
 
+            assistant_context_cache.invalidate(school_db_name, lesson_plan_day.id)
             logger.info("Lesson plan day updated successfully.")
 
             return Response({"message": "Lesson plan day updated successfully"},
@@ -696,6 +741,71 @@ class SyllabusService:
             return Response({"error": "Something went wrong while deleting prerequisite."},
                             status=status.HTTP_400_BAD_REQUEST)
     
+    @staticmethod
+    def load_ebook_content(ebook_instance):
+        """Return the extracted text of an ebook or None if it could not be loaded.
+
+        Falls back to the ebook content index and then to parsing the PDF
+        when the text file is missing in S3.
+        """
+        pdf_bytes_io = BytesIO()
+        s3_status = s3_client.download_file(f"{ebook_instance.file_path}.txt", pdf_bytes_io)
+        if s3_status:
+            pdf_bytes_io.seek(0)
+            return pdf_bytes_io.read().decode("utf-8")
+
+        logger.error("Failed to download ebook text from S3.")
+        if ebook_instance.content_hash:
+            pdf_text = ebook_content_index.get_text(ebook_instance.content_hash)
+            if pdf_text is not None:
+                return pdf_text
+
+        pdf_bytes_io = BytesIO()
+        s3_status = s3_client.download_file(f"{ebook_instance.file_path}.pdf", pdf_bytes_io)
+        if not s3_status:
+            logger.error("Failed to download ebook from S3.")
+            return None
+        content_hash, pdf_text = ebook_content_index.get_or_extract_text(pdf_bytes_io.getvalue())
+        if ebook_instance.content_hash != content_hash:
+            SchoolSyllabusEbooks.objects.filter(id=ebook_instance.id).update(content_hash=content_hash)
+        return pdf_text
+
+    def load_chapter_content(self, ebook_instance, chapter):
+        """Return the text of one chapter of an ebook, or of the whole ebook when
+        its chapter span index doesn't cover the chapter."""
+        pdf_text = self.load_ebook_content(ebook_instance)
+        if pdf_text is None:
+            return None
+        span_index = chapter_span_index.load(ebook_instance.file_path)
+        if span_index is None:
+            # Ebooks processed before the index existed get it on first use.
+            chapters = Chapter.objects.filter(ebook_id=ebook_instance.id).values('chapter_number', 'chapter_name')
+            span_index = chapter_span_index.build(pdf_text, list(chapters))
+            chapter_span_index.upload(ebook_instance.file_path, span_index)
+        chapter_text = chapter_span_index.slice(span_index, pdf_text, chapter.chapter_number)
+        if chapter_text is None:
+            logger.info(f"No chapter span for chapter {chapter.chapter_number} of ebook {ebook_instance.id}, using the whole ebook.")
+            return pdf_text
+        return chapter_text
+
+    @staticmethod
+    def build_lesson_plan(chapter, ebook_instance, pdf_content, num_days, time_period,
+                          teacher_instructions="", force_refresh=False):
+        """Prompt the LLM for a lesson plan and return it with normalized keys."""
+        subject_instructions = getattr(LangchainQueries, f"{ebook_instance.subject.name.upper()}_SUBJECT", LangchainQueries.OTHER_SUBJECT).value
+        lesson_plan = LangChainService().generate_lesson_plan(
+            chapter_number=chapter.chapter_number,
+            chapter_title=chapter.chapter_name,
+            num_days=num_days,
+            time_period=time_period,
+            teacher_instructions=teacher_instructions,
+            pdf_file_content=pdf_content,
+            subject=ebook_instance.subject.name,
+            subject_instructions=subject_instructions,
+            force_refresh=force_refresh
+        )
+        return CommonFunctions.normalize_keys(lesson_plan)
+
     def generate_lesson_plan(self, request):
         """Generate a lesson plan based on chapter details."""
         try:
@@ -705,6 +815,7 @@ class SyllabusService:
             num_days = request.data.get("num_days")
             time_period = request.data.get("time_period")
             teacher_instructions = request.data.get("instructions", "")
+            force_refresh = str(request.data.get("force_refresh", False)).lower() == "true"
 
             if not all([school_id, chapter_id, num_days, time_period]):
                 logger.error("Missing required parameters for generating lesson plan.")
@@ -730,36 +841,16 @@ class SyllabusService:
                 logger.error("Ebook not found for the chapter.")
                 return Response({"error": "Ebook not found for the chapter."},
                                 status=status.HTTP_404_NOT_FOUND)
-            pdf_bytes_io = BytesIO()
-            is_text_file = True
-            s3_status = s3_client.download_file(f"{ebook_instance.file_path}.txt", pdf_bytes_io)
-            if not s3_status:
-                logger.error("Failed to download ebook text from S3.")
-                s3_status = s3_client.download_file(f"{ebook_instance.file_path}.pdf", pdf_bytes_io)
-                is_text_file = False
-            if not s3_status:
-                logger.error("Failed to download ebook from S3.")
+
+            pdf_content = self.load_chapter_content(ebook_instance, chapter)
+            if pdf_content is None:
                 return Response({"error": "Failed to download ebook."},
                                 status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            lang_chain_service = LangChainService()
-            pdf_bytes_io.seek(0)
-            pdf_content = pdf_bytes_io
-            if is_text_file:
-                pdf_content = pdf_bytes_io.read().decode("utf-8")
-            
-            subject_instructions = getattr(LangchainQueries, f"{ebook_instance.subject.name.upper()}_SUBJECT", "OTHER_SUBJECT").value
-            lesson_plan = lang_chain_service.generate_lesson_plan(
-                chapter_number=chapter.chapter_number,
-                chapter_title=chapter.chapter_name,
-                num_days=num_days,
-                time_period=time_period,
-                teacher_instructions=teacher_instructions,
-                pdf_file_content=pdf_content,
-                subject=ebook_instance.subject.name,
-                subject_instructions=subject_instructions
-            )
 
-            normalized = CommonFunctions.normalize_keys(lesson_plan)
+            normalized = self.build_lesson_plan(
+                chapter, ebook_instance, pdf_content, num_days, time_period, teacher_instructions,
+                force_refresh=force_refresh
+            )
             logger.info("Lesson plan generated successfully.")
             return Response({"data": normalized},
                             status=status.HTTP_200_OK)
@@ -767,6 +858,96 @@ class SyllabusService:
             logger.error("Error in generate_lesson_plan: %s", e)
             return Response({"error": "Something went wrong while generating lesson plan. Please try again."},
                             status=status.HTTP_400_BAD_REQUEST)
+
+    def run_lesson_plan_job(self, school_id, chapter_id, num_days, time_period, instructions="",
+                            force_refresh=False):
+        """Job handler of the LLM job queue for lesson plan generation."""
+        school_db_name = CommonFunctions.get_school_db_name(school_id)
+        if not school_db_name:
+            raise PermanentJobError("Invalid school ID.")
+
+        chapter = SchoolChapter.objects.using(school_db_name).filter(id=chapter_id).first()
+        if not chapter:
+            raise PermanentJobError("Chapter not found.")
+
+        ebook_instance = SchoolSyllabusEbooks.objects.filter(
+            id=chapter.ebook_id
+        ).select_related('subject').first()
+        if not ebook_instance:
+            raise PermanentJobError("Ebook not found for the chapter.")
+
+        pdf_content = self.load_chapter_content(ebook_instance, chapter)
+        if pdf_content is None:
+            raise RuntimeError("Failed to download ebook.")
+
+        logger.info(f"Generating lesson plan for chapter {chapter_id} in {school_db_name}")
+        return self.build_lesson_plan(
+            chapter, ebook_instance, pdf_content, num_days, time_period, instructions,
+            force_refresh=force_refresh
+        )
+
+    def submit_lesson_plan_job(self, request):
+        """Queue lesson plan generation and return the job id to poll or subscribe to."""
+        try:
+            school_id = request.data.get("school_id") or getattr(request.user, 'school_id', None)
+            chapter_id = request.data.get("chapter_id")
+            num_days = request.data.get("num_days")
+            time_period = request.data.get("time_period")
+            teacher_instructions = request.data.get("instructions", "")
+            force_refresh = str(request.data.get("force_refresh", False)).lower() == "true"
+
+            if not all([school_id, chapter_id, num_days, time_period]):
+                logger.error("Missing required parameters for generating lesson plan.")
+                return Response({"error": "Missing required parameters."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            job = llm_job_queue.submit(
+                LESSON_PLAN_JOB,
+                {
+                    "school_id": school_id,
+                    "chapter_id": chapter_id,
+                    "num_days": num_days,
+                    "time_period": time_period,
+                    "instructions": teacher_instructions,
+                    "force_refresh": force_refresh,
+                },
+                user_id=request.user.id
+            )
+            if job is None:
+                return Response({"error": "Too many lesson plans are being generated. Please try again later."},
+                                status=status.HTTP_429_TOO_MANY_REQUESTS)
+
+            return Response({"data": {"job_id": job["job_id"], "status": job["status"]}},
+                            status=status.HTTP_202_ACCEPTED)
+        except Exception as e:
+            logger.error("Error in submit_lesson_plan_job: %s", e)
+            return Response({"error": "Something went wrong while generating lesson plan. Please try again."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+    def get_lesson_plan_job(self, request):
+        """Return the status of a lesson plan job and the lesson plan once it is ready."""
+        try:
+            job_id = request.GET.get("job_id")
+            if not job_id:
+                return Response({"error": "Missing job_id."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            job = llm_job_queue.get_job(job_id)
+            if not job or job["job_type"] != LESSON_PLAN_JOB or job["user_id"] != request.user.id:
+                return Response({"error": "Job not found."},
+                                status=status.HTTP_404_NOT_FOUND)
+
+            return Response({"data": {
+                "job_id": job["job_id"],
+                "status": job["status"],
+                "attempts": job["attempts"],
+                "lesson_plan": job["result"],
+                "error": job["error"] if job["status"] == llm_job_queue.FAILED else None,
+            }}, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error("Error in get_lesson_plan_job: %s", e)
+            return Response({"error": "Something went wrong while fetching the lesson plan."},
+                            status=status.HTTP_400_BAD_REQUEST)
     
     def save_lesson_plan(self, request):
         """Save the generated lesson plan."""
@@ -802,30 +983,35 @@ class SyllabusService:
                 return Response({"error": "Class section not found."},
                                 status=status.HTTP_404_NOT_FOUND)
             
-            school_lesson_plan_day = SchoolLessonPlanDay.objects.using(school_db_name).filter(
-                chapter=chapter,
-                class_section=class_section
-            )
-            if school_lesson_plan_day.exists():
-                school_lesson_plan_day.delete()
-
-            for day in lesson_plan_data['lesson_plan']:
-                lesson_plan_day = SchoolLessonPlanDay.objects.using(school_db_name).create(
+            with transaction.atomic(using=school_db_name):
+                school_lesson_plan_day = SchoolLessonPlanDay.objects.using(school_db_name).filter(
                     chapter=chapter,
-                    class_section=class_section,
-                    day=day.get('day'),
-                    learning_outcomes=day.get("learning_outcomes"),
-                    real_world_applications=day.get("real_world_applications"),
-                    taxonomy_alignment=day.get("taxonomy_alignment")
+                    class_section=class_section
                 )
-                topics = day.get("topics", [])
-                for topic in topics:
-                    topic_instance = Topic.objects.using(school_db_name).create(
-                        lesson_plan_day=lesson_plan_day,
-                        title=topic.get("title"),
-                        summary=topic.get("summary"),
-                        time_minutes=topic.get("time_minutes")
+                old_day_ids = list(school_lesson_plan_day.values_list('id', flat=True))
+                if old_day_ids:
+                    school_lesson_plan_day.delete()
+
+                for day in lesson_plan_data['lesson_plan']:
+                    lesson_plan_day = SchoolLessonPlanDay.objects.using(school_db_name).create(
+                        chapter=chapter,
+                        class_section=class_section,
+                        day=day.get('day'),
+                        learning_outcomes=day.get("learning_outcomes"),
+                        real_world_applications=day.get("real_world_applications"),
+                        taxonomy_alignment=day.get("taxonomy_alignment")
                     )
+                    topics = day.get("topics", [])
+                    for topic in topics:
+                        topic_instance = Topic.objects.using(school_db_name).create(
+                            lesson_plan_day=lesson_plan_day,
+                            title=topic.get("title"),
+                            summary=topic.get("summary"),
+                            time_minutes=topic.get("time_minutes")
+                        )
+                chapter_progress_rollup.refresh(school_db_name, chapter.id, class_section.id)
+            chapter_progress_cache.invalidate(school_db_name, class_section.id, chapter.subject_id)
+            assistant_context_cache.invalidate(school_db_name, *old_day_ids)
             logger.info("Lesson plan saved successfully.")
             return Response({"message": "Lesson plan saved successfully."},
                             status=status.HTTP_201_CREATED)
@@ -4,12 +4,15 @@ import logging
 import uuid
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Prefetch
+from django.db import transaction
 from rest_framework.response import Response
 from rest_framework import status
 
 from syllabus.models import WhiteboardSession,SchoolLessonPlanDay, WhiteboardDataChunk
 from core.common_modules.common_functions import CommonFunctions
+from syllabus.services.chapter_progress_cache import chapter_progress_cache
+from syllabus.services.chapter_progress_rollup import chapter_progress_rollup
+from syllabus.services.whiteboard_stroke_log import whiteboard_stroke_log
 
 logger = logging.getLogger(__name__)
 
@@ -115,27 +118,13 @@ class WhiteboardService:
             session = WhiteboardSession.objects.using(school_db_name).filter(
                 session_id=session_id,
                 is_active=True
-            ).prefetch_related(
-                Prefetch(
-                    'data_chunks',
-                    queryset=WhiteboardDataChunk.objects.using(school_db_name).filter()
-                )
             ).first()
             if not session:
                 return Response({"error": f"Whiteboard session with id {session_id} not found"},
                                 status=status.HTTP_404_NOT_FOUND)
 
-            data_chunks = session.data_chunks.all().order_by('-chunk_index').first()
-
-            # data = []
-            # for chunk in data_chunks:
-            #     for sub_chunk in chunk.data:
-            #         if isinstance(sub_chunk, list):
-            #             data.extend(sub_chunk)
-            #         else:
-            #             data.append(sub_chunk)
-
-            return Response({"data": data_chunks.data if data_chunks else {}}, status=status.HTTP_200_OK)
+            return Response({"data": whiteboard_stroke_log.load_board(school_db_name, session)},
+                            status=status.HTTP_200_OK)
 
         except Exception as e:
             logger.exception("Unexpected error fetching whiteboard data")
@@ -187,15 +176,28 @@ class WhiteboardService:
 
             school_name = CommonFunctions.get_school_db_name(school_id)
 
-            school_lesson_plan_day = SchoolLessonPlanDay.objects.using(school_name).filter(
+            school_lesson_plan_day = SchoolLessonPlanDay.objects.using(school_name).select_related(
+                'chapter'
+            ).filter(
                 id=lesson_plan_day_id
             ).first()
             if not school_lesson_plan_day:
                 return Response({"error": f"Whiteboard session with id {lesson_plan_day_id} not found"},
                                 status=status.HTTP_404_NOT_FOUND)
 
-            school_lesson_plan_day.status = lesson_status
-            school_lesson_plan_day.save(using=school_name)
+            with transaction.atomic(using=school_name):
+                school_lesson_plan_day.status = lesson_status
+                school_lesson_plan_day.save(using=school_name)
+                chapter_progress_rollup.refresh(
+                    school_name,
+                    school_lesson_plan_day.chapter_id,
+                    school_lesson_plan_day.class_section_id
+                )
+            chapter_progress_cache.invalidate(
+                school_name,
+                school_lesson_plan_day.class_section_id,
+                school_lesson_plan_day.chapter.subject_id
+            )
 
             logger.info("Whiteboard session status updated with lesson_plan_day_id: %s", lesson_plan_day_id)
             return Response({"message": "Whiteboard session status updated successfully"},
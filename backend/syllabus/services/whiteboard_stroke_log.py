@@ -0,0 +1,242 @@
+"""Append-only stroke log of whiteboard sessions buffered in Redis."""
+
+import json
+import logging
+
+import redis.asyncio as aioredis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from redis.exceptions import LockError
+
+from syllabus.models import WhiteboardSession, WhiteboardDataChunk
+
+logger = logging.getLogger(__name__)
+
+
+def is_draw_message(message):
+    return isinstance(message, dict) and message.get('type') == 'draw'
+
+
+def build_board(entries):
+    """
+    Rebuild the board from logged messages in order. Draw messages add
+    their points to the stroke list, any other object is a scene snapshot
+    whose pages replace earlier ones.
+
+    The Excalidraw page reads a page map and the teaching canvas a stroke
+    list, so a session holding both returns the kind written last and logs
+    what it leaves out.
+    """
+    strokes = []
+    scenes = {}
+    scenes_last = False
+    for message in entries:
+        if is_draw_message(message):
+            strokes.extend(message.get('data') or [])
+            scenes_last = False
+        elif isinstance(message, dict):
+            scenes.update(message)
+            scenes_last = True
+        elif isinstance(message, list):
+            strokes.extend(message)
+            scenes_last = False
+    if scenes and strokes:
+        if scenes_last:
+            logger.warning(f"Whiteboard board has scene pages and {len(strokes)} strokes, returning the pages")
+        else:
+            logger.warning(f"Whiteboard board has {len(scenes)} scene pages and strokes, returning the strokes")
+    if scenes and (scenes_last or not strokes):
+        return scenes
+    return strokes
+
+
+def drop_replaced_snapshots(messages):
+    """Drop the (raw, message) scene snapshots whose pages are all replaced by later snapshots."""
+    kept = []
+    replaced_pages = set()
+    for raw, message in reversed(messages):
+        if isinstance(message, dict) and not is_draw_message(message):
+            if message.keys() <= replaced_pages:
+                continue
+            replaced_pages.update(message.keys())
+        kept.append((raw, message))
+    kept.reverse()
+    return kept
+
+
+def chunk_entries(chunk_data):
+    """Return the logged messages of a chunk; chunks written before the log hold a single message."""
+    return chunk_data if isinstance(chunk_data, list) else [chunk_data]
+
+
+class WhiteboardStrokeLog:
+    """
+    Buffers the messages of a whiteboard session in a Redis list and flushes
+    them to the database, so every write is proportional to what changed
+    since the last flush rather than to the whole board.
+
+    Draw messages are appended as new WhiteboardDataChunk rows of at most
+    MAX_CHUNK_SIZE_BYTES. Scene snapshots carry the full page map, so they
+    are merged per flush and stored as one chunk per page: a page is only
+    rewritten when its content changed, and it then moves to the end of the
+    chunk order so reads replay it after older messages.
+
+    Logs and flush locks are keyed by school database and session, like the
+    channel group. Messages are only trimmed from Redis after their chunks
+    are committed, and the lock keeps the consumers of one session from
+    flushing the same messages twice.
+    """
+
+    KEY_PREFIX = "whiteboard"
+
+    def __init__(self):
+        config = settings.WHITEBOARD_CONFIG
+        self.redis_url = config['REDIS_URL']
+        self.flush_interval = config['FLUSH_INTERVAL']
+        self.flush_batch = config['FLUSH_BATCH']
+        self.max_chunk_size_bytes = config['MAX_CHUNK_SIZE_BYTES']
+        self.lock_timeout = config['LOCK_TIMEOUT']
+        self.broadcast_interval = config['BROADCAST_INTERVAL_MS'] / 1000
+        self.max_pending_frames = config['MAX_PENDING_FRAMES']
+        self.max_pending_bytes = config['MAX_PENDING_BYTES']
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = aioredis.Redis.from_url(self.redis_url)
+        return self._client
+
+    def group_name(self, school_db_name, session_id):
+        """Channel layer group of the connections to a session."""
+        return f"{self.KEY_PREFIX}_{school_db_name}_{session_id}"
+
+    def _log_key(self, school_db_name, session_id):
+        return f"{self.KEY_PREFIX}:{school_db_name}:{session_id}:log"
+
+    def _lock_key(self, school_db_name, session_id):
+        return f"{self.KEY_PREFIX}:{school_db_name}:{session_id}:flush_lock"
+
+    async def append(self, school_db_name, session_id, message):
+        """Append a received message (raw JSON) to the session's log."""
+        await self._get_client().rpush(self._log_key(school_db_name, session_id), message)
+
+    async def flush(self, school_db_name, session_id):
+        """Move the buffered messages of the session to the database. Returns the number flushed."""
+        client = self._get_client()
+        key = self._log_key(school_db_name, session_id)
+        lock = client.lock(self._lock_key(school_db_name, session_id), timeout=self.lock_timeout, blocking=False)
+        if not await lock.acquire():
+            return 0
+
+        flushed = 0
+        try:
+            while True:
+                raw_messages = await client.lrange(key, 0, self.flush_batch - 1)
+                if not raw_messages:
+                    break
+                await sync_to_async(self._write_chunks)(school_db_name, session_id, raw_messages)
+                await client.ltrim(key, len(raw_messages), -1)
+                flushed += len(raw_messages)
+                if len(raw_messages) < self.flush_batch:
+                    break
+        finally:
+            try:
+                await lock.release()
+            except LockError:
+                logger.warning(f"Whiteboard flush lock of session {session_id} expired before release")
+        return flushed
+
+    def _split_chunks(self, messages):
+        chunks = []
+        current = []
+        current_size = 0
+        for raw, message in messages:
+            size = len(raw) + 1
+            if current and current_size + size > self.max_chunk_size_bytes:
+                chunks.append(current)
+                current = []
+                current_size = 0
+            current.append(message)
+            current_size += size
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def load_board(self, school_db_name, session):
+        """Return the board of a session rebuilt from its flushed chunks."""
+        entries = []
+        for chunk_data in WhiteboardDataChunk.objects.using(school_db_name).filter(
+            session=session
+        ).order_by('chunk_index').values_list('data', flat=True).iterator():
+            entries.extend(chunk_entries(chunk_data))
+        return build_board(entries)
+
+    def _write_chunks(self, school_db_name, session_id, raw_messages):
+        stroke_messages = []
+        pages = {}
+        for raw in raw_messages:
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                logger.warning(f"Dropping invalid whiteboard message of session {session_id}")
+                continue
+            if isinstance(message, dict) and not is_draw_message(message):
+                pages.update((str(page), scene) for page, scene in message.items())
+            else:
+                stroke_messages.append((raw, message))
+        chunks = self._split_chunks(stroke_messages)
+        if not chunks and not pages:
+            return
+
+        with transaction.atomic(using=school_db_name):
+            session, _ = WhiteboardSession.objects.using(school_db_name).get_or_create(session_id=session_id)
+            next_index = (WhiteboardDataChunk.objects.using(school_db_name).filter(
+                session=session
+            ).aggregate(last_index=Max('chunk_index'))['last_index'] or 0) + 1
+            WhiteboardDataChunk.objects.using(school_db_name).bulk_create([
+                WhiteboardDataChunk(session=session, chunk_index=next_index + offset, data=data)
+                for offset, data in enumerate(chunks)
+            ])
+            next_index += len(chunks)
+            changed_pages = self._write_pages(school_db_name, session, pages, next_index)
+        logger.info(f"Flushed {len(raw_messages)} whiteboard messages of session {session_id} "
+                    f"into {len(chunks)} stroke chunks and {changed_pages} changed pages")
+
+    def _write_pages(self, school_db_name, session, pages, next_index):
+        """Store the changed pages of the merged snapshot, one chunk per page. Returns the number written."""
+        if not pages:
+            return 0
+        existing = {
+            chunk.page: chunk
+            for chunk in WhiteboardDataChunk.objects.using(school_db_name).filter(
+                session=session, page__in=pages.keys()
+            )
+        }
+        updated = []
+        created = []
+        for page, scene in pages.items():
+            data = [{page: scene}]
+            chunk = existing.get(page)
+            if chunk is not None and chunk.data == data:
+                continue
+            if chunk is None:
+                chunk = WhiteboardDataChunk(session=session, page=page)
+                created.append(chunk)
+            else:
+                updated.append(chunk)
+            chunk.data = data
+            chunk.chunk_index = next_index
+            chunk.updated_at = timezone.now()
+            next_index += 1
+        # Updated pages take indexes past every current chunk, so no unique index collides
+        WhiteboardDataChunk.objects.using(school_db_name).bulk_update(
+            updated, ['data', 'chunk_index', 'updated_at']
+        )
+        WhiteboardDataChunk.objects.using(school_db_name).bulk_create(created)
+        return len(updated) + len(created)
+
+
+whiteboard_stroke_log = WhiteboardStrokeLog()
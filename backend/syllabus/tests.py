@@ -1,3 +1,51 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from config.consumers.whiteboard_consumer import WhiteboardOutbox
+
+
+def frame(*messages):
+    """A group frame as the consumer queues it, with unparsed messages."""
+    return [(json.dumps(message), None) for message in messages]
+
+
+class WhiteboardOutboxTests(SimpleTestCase):
+
+    def test_frames_are_queued_until_the_limit(self):
+        outbox = WhiteboardOutbox(max_pending_frames=3, max_pending_bytes=1024 * 1024)
+        for index in range(3):
+            outbox.put(frame({"type": "draw", "data": [{"x": index}]}))
+
+        self.assertEqual(len(outbox.frames), 3)
+        self.assertTrue(outbox.ready.is_set())
+        self.assertFalse(outbox.needs_resync)
+
+    def test_merge_drops_replaced_snapshots(self):
+        outbox = WhiteboardOutbox(max_pending_frames=3, max_pending_bytes=1024 * 1024)
+        draw = {"type": "draw", "data": [{"x": 1}]}
+        outbox.put(frame({"0": {"elements": [1]}, "1": {"elements": [1]}}))
+        outbox.put(frame(draw))
+        outbox.put(frame({"0": {"elements": [2]}}))
+        outbox.put(frame({"0": {"elements": [3]}, "1": {"elements": [3]}}))
+
+        self.assertEqual(len(outbox.frames), 1)
+        merged = [json.loads(raw) for raw, _ in outbox.frames[0]]
+        self.assertEqual(merged, [draw, {"0": {"elements": [3]}, "1": {"elements": [3]}}])
+        self.assertFalse(outbox.needs_resync)
+
+    def test_backlog_over_the_byte_limit_waits_for_the_board(self):
+        outbox = WhiteboardOutbox(max_pending_frames=2, max_pending_bytes=100)
+        for index in range(3):
+            outbox.put(frame({"type": "draw", "data": [{"x": index, "color": "#000000"}] * 3}))
+
+        self.assertTrue(outbox.needs_resync)
+        self.assertEqual(len(outbox.frames), 0)
+
+        outbox.put(frame({"type": "draw", "data": []}))
+        self.assertEqual(len(outbox.frames), 0)
+
+        outbox.resynced()
+        outbox.put(frame({"type": "draw", "data": []}))
+        self.assertFalse(outbox.needs_resync)
+        self.assertEqual(len(outbox.frames), 1)
@@ -12,7 +12,8 @@ class EbookView(APIView):
     """View for managing eBooks."""
 
     def get_permissions(self):
-        if self.kwargs.get('action') in ['uploadEbook', 'deleteEbookById']:
+        if self.kwargs.get('action') in ['uploadEbook', 'deleteEbookById',
+                                         'getEbookDistribution', 'retryEbookDistribution']:
             return [IsSuperAdmin()]
         return [IsAuthenticated(),]
 
@@ -20,6 +21,8 @@ class EbookView(APIView):
         """Handle GET requests for eBook actions."""
         if action == 'getEbooks':
             return EbookService().get_ebook(request)
+        if action == 'getEbookDistribution':
+            return EbookService().get_ebook_distribution(request)
         return Response({"message": f"GET request for action: {action}"})
 
     def post(self, request, action=None):
@@ -27,6 +30,8 @@ class EbookView(APIView):
         
         if action == 'uploadEbook':
             return EbookService().upload_ebook(request)
+        if action == 'retryEbookDistribution':
+            return EbookService().retry_ebook_distribution(request)
         return Response({"message": f"POST request for action: {action}"})
     
     def delete(self, request, action=None):
@@ -57,6 +62,8 @@ class SyllabusView(APIView):
             return SyllabusService().get_lesson_plan_by_chapter_id(request)
         elif action == "getLessonDayPlan":
             return SyllabusService().get_lesson_plan_day_by_id(request)
+        elif action == 'getLessonPlanJob':
+            return SyllabusService().get_lesson_plan_job(request)
         return Response({"error": f"GET request not found for action: {action}"}, status=400)
 
     def post(self, request, action=None):
@@ -67,6 +74,8 @@ class SyllabusView(APIView):
             return SyllabusService().create_prerequisite(request)
         elif action == 'generateLessonPlan':
             return SyllabusService().generate_lesson_plan(request)
+        elif action == 'generateLessonPlanAsync':
+            return SyllabusService().submit_lesson_plan_job(request)
         elif action == "saveLessonPlan":
             return SyllabusService().save_lesson_plan(request)
         return Response({"error": f"POST request not found for action: {action}"}, status=400)
@@ -105,6 +114,8 @@ class AIChatView(APIView):
         """Handle POST requests for AI chat actions."""
         if action == 'chatWithAssistant':
             return AiAssistantService(request).chat_with_assistant()
+        elif action == 'streamChatWithAssistant':
+            return AiAssistantService(request).stream_chat_with_assistant()
         return Response({"error": f"POST request not found for action: {action}"}, status=400)
     
     def delete(self, request, action=None):
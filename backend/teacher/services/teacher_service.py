@@ -17,10 +17,10 @@ from core.models import Role, User
 from core.common_modules.password_validator import is_valid_password
 from core.common_modules.send_email import EmailService
 from core.common_modules.common_functions import CommonFunctions
+from core.common_modules.tenant_replicas import tenant_replicas
 
 from classes.models import ClassAssignment
 
-from school.models import SchoolDbMetadata
 
 logger = logging.getLogger(__name__)
 
@@ -75,7 +75,10 @@ class TeacherService:
                 logger.error("Invalid password format.")
                 return JsonResponse({"error": "Password must be at least 8 characters long and contain at least one uppercase letter, one lowercase letter, one number, and one special character."}, status=400)
             
-            school_db_name = SchoolDbMetadata.objects.filter(school_id=school_id).first().db_name
+            school_db_name = CommonFunctions.get_school_db_name(school_id)
+            if not school_db_name:
+                logger.error(f"School with ID {school_id} not found or inactive.")
+                return JsonResponse({"error": "School not found or school is inactive."}, status=404)
 
 
             with transaction.atomic(using='default'):
@@ -193,7 +196,10 @@ class TeacherService:
             if not school_id:
                 logger.error("School ID is required for editing teacher.")
                 return JsonResponse({"error": "School ID is required."}, status=400)
-            school_db_name = SchoolDbMetadata.objects.filter(school_id=school_id).first().db_name
+            school_db_name = CommonFunctions.get_school_db_name(school_id)
+            if not school_db_name:
+                logger.error(f"School with ID {school_id} not found or inactive.")
+                return JsonResponse({"error": "School not found or school is inactive."}, status=404)
 
             if not teacher_id:
                 logger.error("Teacher ID is required for editing.")
@@ -340,7 +346,10 @@ class TeacherService:
                 logger.error("Academic Year ID is required for editing.")
                 return JsonResponse({"error": "Academic Year ID is required."}, status=400)
 
-            school_db_name = SchoolDbMetadata.objects.filter(school_id=school_id).first().db_name
+            school_db_name = CommonFunctions.get_school_db_name(school_id)
+            if not school_db_name:
+                logger.error(f"School with ID {school_id} not found or inactive.")
+                return JsonResponse({"error": "School not found or school is inactive."}, status=404)
 
             try:
                 teacher = Teacher.objects.using(school_db_name).get(teacher_id=teacher_id)
@@ -441,7 +450,11 @@ class TeacherService:
             #     return JsonResponse({"error": "Academic Year ID is required."}, status=400)
 
 
-            school_db_name = SchoolDbMetadata.objects.filter(school_id=school_id).first().db_name
+            school_db_name = CommonFunctions.get_school_db_name(school_id)
+            if not school_db_name:
+                logger.error(f"School with ID {school_id} not found or inactive.")
+                return JsonResponse({"error": "School not found or school is inactive."}, status=404)
+            school_db_name = tenant_replicas.read_alias(school_db_name)
 
             academic_year = CommonFunctions().get_latest_academic_year(school_db_name)
 
@@ -507,7 +520,10 @@ class TeacherService:
                 logger.error("School ID is required to delete a teacher.")
                 return JsonResponse({"error": "School ID is required."}, status=400)
 
-            school_db_name = SchoolDbMetadata.objects.filter(school_id=school_id).first().db_name
+            school_db_name = CommonFunctions.get_school_db_name(school_id)
+            if not school_db_name:
+                logger.error(f"School with ID {school_id} not found or inactive.")
+                return JsonResponse({"error": "School not found or school is inactive."}, status=404)
 
             with transaction.atomic(using='default'):
                 with transaction.atomic(using=school_db_name):
@@ -562,7 +578,10 @@ class TeacherService:
                 logger.error("School ID is required to reactivate a teacher.")
                 return JsonResponse({"error": "School ID is required."}, status=400)
 
-            school_db_name = SchoolDbMetadata.objects.filter(school_id=school_id).first().db_name
+            school_db_name = CommonFunctions.get_school_db_name(school_id)
+            if not school_db_name:
+                logger.error(f"School with ID {school_id} not found or inactive.")
+                return JsonResponse({"error": "School not found or school is inactive."}, status=404)
 
             with transaction.atomic(using='default'):
                 with transaction.atomic(using=school_db_name):